@@ -0,0 +1,288 @@
+"""
+Benchmarks for the tools, response parsing, context truncation and session I/O
+
+Runs each benchmark on deterministic synthetic data, prints a table and
+writes JSON results (one file per commit) that can be compared against an
+earlier run:
+
+    python benchmarks/run.py                              # small scale, 10k files
+    python benchmarks/run.py --scale large                # 1M files (slow to generate)
+    python benchmarks/run.py --baseline benchmarks/results/abc1234.json
+
+With --baseline, the exit code is 1 when a benchmark's median got slower
+than its threshold allows, so it can gate a change in CI.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import NEEDLE, make_large_file, make_model_output, make_repo, make_session  # noqa: E402
+
+# Sizes per scale: repository files, session messages, model output characters, large file lines
+SCALES: Dict[str, Dict[str, int]] = {
+    'small': {'files': 10_000, 'messages': 2_000, 'output_chars': 100_000, 'log_lines': 200_000},
+    'medium': {'files': 100_000, 'messages': 10_000, 'output_chars': 1_000_000, 'log_lines': 1_000_000},
+    'large': {'files': 1_000_000, 'messages': 50_000, 'output_chars': 5_000_000, 'log_lines': 5_000_000},
+}
+
+# Allowed slowdown of the median against the baseline, as a fraction
+DEFAULT_THRESHOLD = 0.25
+THRESHOLDS: Dict[str, float] = {
+    # Filesystem-bound; more run-to-run noise
+    'glob_cold': 0.5,
+    'grep_cold': 0.5,
+    'session_save_full': 0.5,
+}
+# Differences below this many milliseconds are never reported as regressions
+NOISE_FLOOR_MS = 1.0
+
+
+class Benchmark:
+    """A named measurement: setup() once, then run() timed repeatedly"""
+
+    def __init__(self, name: str, run: Callable[[], Any], repeat: int = 5,
+                 setup: Optional[Callable[[], None]] = None, teardown: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.run = run
+        self.repeat = repeat
+        self.setup = setup
+        self.teardown = teardown
+
+    def measure(self) -> Dict[str, Any]:
+        """Timings in milliseconds; the first run is reported separately (cold caches)"""
+        if self.setup is not None:
+            self.setup()
+        try:
+            times = []
+            for _ in range(self.repeat + 1):
+                start = time.perf_counter()
+                self.run()
+                times.append((time.perf_counter() - start) * 1000)
+        finally:
+            if self.teardown is not None:
+                self.teardown()
+
+        warm = times[1:]
+        return {
+            'first_ms': round(times[0], 3),
+            'median_ms': round(statistics.median(warm), 3),
+            'min_ms': round(min(warm), 3),
+            'max_ms': round(max(warm), 3),
+            'runs': len(warm),
+        }
+
+
+def check(result, name: str):
+    """Fail loudly if a tool benchmark measured an error instead of the work"""
+    if getattr(result, 'success', True) is False:
+        raise RuntimeError(f"{name} failed: {result.error}")
+    return result
+
+
+def tool_benchmarks(repo: str, log_file: str) -> List[Benchmark]:
+    from src.tools import GlobTool, GrepTool, ReadTool
+
+    grep = GrepTool(use_index=False)
+    indexed_grep = GrepTool(use_index=True)
+    glob = GlobTool()
+    read = ReadTool()
+    sample = os.path.join('pkg_0', 'mod_0', 'file_2.py')
+
+    with open(log_file, 'rb') as f:
+        log_lines = sum(1 for _ in f)
+
+    return [
+        # First grep/glob in a fresh process pays for walking the tree
+        Benchmark('grep_cold', lambda: check(grep.execute(NEEDLE, "."), 'grep'), repeat=1),
+        Benchmark('glob_cold', lambda: check(glob.execute("**/*.md", "."), 'glob'), repeat=1),
+        Benchmark('grep_literal', lambda: check(grep.execute(NEEDLE, "."), 'grep')),
+        Benchmark('grep_regex', lambda: check(grep.execute(r"def \w+_handler_3\(", ".", file_pattern="*.py",
+                                                           max_results=200), 'grep')),
+        Benchmark('grep_indexed', lambda: check(indexed_grep.execute(NEEDLE, "."), 'grep')),
+        Benchmark('glob_all_py', lambda: check(glob.execute("**/*.py", ".", max_results=1000), 'glob')),
+        Benchmark('glob_subtree', lambda: check(glob.execute("pkg_0/**/*.py", "."), 'glob')),
+        Benchmark('glob_mtime', lambda: check(glob.execute("**/*.md", ".", sort_by="mtime", max_results=50), 'glob')),
+        Benchmark('read_small', lambda: check(read.execute(sample), 'read'), repeat=20),
+        Benchmark('read_large_range', lambda: check(read.execute(log_file, start_line=log_lines // 2,
+                                                                 end_line=log_lines // 2 + 200), 'read')),
+        Benchmark('read_large_tail', lambda: check(read.execute(log_file, tail_lines=200), 'read')),
+    ]
+
+
+def parser_benchmarks(output_chars: int) -> List[Benchmark]:
+    from src.utils.response_parser import ResponseParser, StreamingToolCallParser
+
+    output = make_model_output(output_chars, tool_calls=20)
+
+    def stream_parse():
+        parser = StreamingToolCallParser()
+        for i in range(0, len(output), 32):
+            parser.feed(output[i:i + 32])
+        parser.close()
+
+    return [
+        Benchmark('parse_tool_calls', lambda: ResponseParser.extract_tool_calls(output)),
+        Benchmark('parse_stream', stream_parse),
+    ]
+
+
+def context_benchmarks(messages: int) -> List[Benchmark]:
+    from src.utils.context_manager import ContextManager
+
+    history = make_session(messages)
+    system_prompt = "You are a coding assistant. " * 200
+    growing = list(history)
+    manager = ContextManager(max_messages=20, max_tokens_estimate=8000)
+    manager.truncate_history(growing, system_prompt)
+
+    def next_turn():
+        # Steady state: one message added per call on a long history
+        growing.append({"role": "user", "content": "Tool results:\nsrc/main.py:1: ok"})
+        manager.truncate_history(growing, system_prompt)
+
+    return [
+        Benchmark('truncate_cold', lambda: ContextManager(max_messages=20, max_tokens_estimate=8000)
+                  .truncate_history(history, system_prompt)),
+        Benchmark('truncate_turn', next_turn, repeat=50),
+    ]
+
+
+def session_benchmarks(messages: int, workdir: str) -> List[Benchmark]:
+    from src.utils.session_manager import SessionManager
+
+    history = make_session(messages, seed=1)
+    manager = SessionManager(os.path.join(workdir, 'sessions'), fsync='never')
+    growing: List[Dict[str, str]] = []
+
+    def save_full():
+        manager.create_session('bench_full')
+        manager.save_message(history)
+
+    def prepare_append():
+        manager.create_session('bench_append')
+        growing[:] = history
+        manager.save_message(growing)
+
+    def append_turn():
+        growing.append({"role": "user", "content": "Next step, please."})
+        manager.save_message(growing)
+
+    return [
+        Benchmark('session_save_full', save_full, repeat=3),
+        Benchmark('session_load', lambda: manager.load_session('bench_full'), setup=save_full),
+        Benchmark('session_append', append_turn, repeat=50, setup=prepare_append),
+    ]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Descriptions of benchmarks whose median regressed beyond their threshold"""
+    regressions = []
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        before, after = previous['median_ms'], current['median_ms']
+        threshold = THRESHOLDS.get(name, DEFAULT_THRESHOLD)
+        if after - before > NOISE_FLOOR_MS and after > before * (1 + threshold):
+            regressions.append(f"{name}: {before:.2f} ms -> {after:.2f} ms "
+                               f"(+{(after / before - 1) * 100:.0f}%, allowed {threshold * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark termicode's tools, parser, context and sessions")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--files', type=int, help="Override the number of repository files")
+    parser.add_argument('--data-dir', help="Where synthetic data is kept between runs (default: temp dir)")
+    parser.add_argument('--only', help="Comma-separated benchmark name prefixes to run")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--baseline', help="Earlier results to compare against")
+    args = parser.parse_args()
+    # Benchmarks run inside the synthetic repository; resolve paths first
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    sizes = dict(SCALES[args.scale])
+    if args.files:
+        sizes['files'] = args.files
+
+    data_dir = args.data_dir or os.path.join(tempfile.gettempdir(), 'termicode-bench')
+    repo = os.path.join(data_dir, f"repo-{sizes['files']}")
+    print(f"Preparing synthetic data in {data_dir} ...")
+    make_repo(repo, sizes['files'])
+    log_file = os.path.join(data_dir, f"log-{sizes['log_lines']}.txt")
+    if not os.path.exists(log_file):
+        make_large_file(log_file, sizes['log_lines'])
+
+    # Keep the trigram index and sessions out of the user's directories
+    os.environ['XDG_CACHE_HOME'] = os.path.join(data_dir, 'cache')
+    workdir = tempfile.mkdtemp(prefix='termicode-bench-')
+    os.chdir(repo)
+
+    benchmarks = (tool_benchmarks(repo, log_file) + parser_benchmarks(sizes['output_chars'])
+                  + context_benchmarks(sizes['messages']) + session_benchmarks(sizes['messages'], workdir))
+    if args.only:
+        prefixes = tuple(p.strip() for p in args.only.split(',') if p.strip())
+        benchmarks = [b for b in benchmarks if b.name.startswith(prefixes)]
+
+    results: Dict[str, Any] = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'sizes': sizes,
+        'results': {},
+    }
+
+    print(f"\n{'benchmark':<20} {'first ms':>10} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    try:
+        for benchmark in benchmarks:
+            stats = benchmark.measure()
+            results['results'][benchmark.name] = stats
+            print(f"{benchmark.name:<20} {stats['first_ms']:>10.2f} {stats['median_ms']:>10.2f} "
+                  f"{stats['min_ms']:>10.2f} {stats['max_ms']:>10.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = output or os.path.join(ROOT, 'benchmarks', 'results', f"{results['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('sizes') != sizes:
+            print(f"⚠ Baseline was measured with different sizes: {baseline.get('sizes')}")
+        regressions = compare(results, baseline)
+        if regressions:
+            print("\n❌ Regressions against the baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
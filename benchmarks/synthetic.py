@@ -0,0 +1,133 @@
+"""Deterministic synthetic data for the benchmarks: repositories, sessions, model outputs"""
+import json
+import os
+import random
+from typing import Dict, List
+
+WORDS = (
+    "user session config request handler parser index cache buffer stream token "
+    "client server path file result error value record queue worker module layout"
+).split()
+
+# Literal planted in one file out of NEEDLE_EVERY, for selective grep benchmarks
+NEEDLE = "needle_marker_7f3a"
+NEEDLE_EVERY = 1000
+
+# Marker written once a repository is complete, so it can be reused
+REPO_MARKER = ".synthetic-repo.json"
+
+
+def _python_file(rng: random.Random, index: int) -> str:
+    lines = [f'"""Module {index}"""', "import os", ""]
+    for number in range(rng.randint(2, 5)):
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}"
+        lines += [
+            f"def {name}_handler_{number}({rng.choice(WORDS)}, {rng.choice(WORDS)}=None):",
+            f'    """Handle {rng.choice(WORDS)} {rng.choice(WORDS)}"""',
+            f"    value = {rng.choice(WORDS)}.get('{rng.choice(WORDS)}', {rng.randint(0, 999)})",
+            f"    return os.path.join(str(value), '{rng.choice(WORDS)}')",
+            "",
+        ]
+    if index % NEEDLE_EVERY == 0:
+        lines.append(f"# {NEEDLE}")
+    return "\n".join(lines) + "\n"
+
+
+def make_repo(root: str, files: int, seed: int = 0, files_per_dir: int = 100) -> str:
+    """
+    Create (or reuse) a source tree of about `files` files under root
+
+    Mostly Python files in two directory levels, with some Markdown and
+    JavaScript, plus an ignored build/ and node_modules/ that tools must skip.
+    """
+    marker = os.path.join(root, REPO_MARKER)
+    spec = {'files': files, 'seed': seed, 'files_per_dir': files_per_dir}
+    if os.path.exists(marker):
+        with open(marker, 'r', encoding='utf-8') as f:
+            if json.load(f) == spec:
+                return root
+
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, '.gitignore'), 'w', encoding='utf-8') as f:
+        f.write("build/\n*.log\n")
+
+    dirs_per_package = 10
+    for index in range(files):
+        directory = index // files_per_dir
+        folder = os.path.join(root, f"pkg_{directory // dirs_per_package}", f"mod_{directory % dirs_per_package}")
+        if index % files_per_dir == 0:
+            os.makedirs(folder, exist_ok=True)
+
+        kind = index % 20
+        if kind == 0:
+            name, content = f"notes_{index}.md", f"# Notes {index}\n\n" + " ".join(rng.choices(WORDS, k=60)) + "\n"
+        elif kind == 1:
+            name, content = f"view_{index}.js", f"export function {rng.choice(WORDS)}View{index}() {{ return null; }}\n"
+        else:
+            name, content = f"file_{index}.py", _python_file(rng, index)
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    # Directories the walker must skip
+    for skipped in ('build', 'node_modules'):
+        folder = os.path.join(root, skipped, 'nested')
+        os.makedirs(folder, exist_ok=True)
+        for index in range(max(1, files // 100)):
+            with open(os.path.join(folder, f"skipped_{index}.py"), 'w', encoding='utf-8') as f:
+                f.write(f"# {NEEDLE}\n")
+
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+    return root
+
+
+def make_large_file(path: str, lines: int, seed: int = 0) -> str:
+    """A log-like text file with the given number of lines"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for number in range(lines):
+            level = "ERROR" if number % 997 == 0 else "INFO"
+            f.write(f"2024-01-01T00:00:{number % 60:02d} {level} {' '.join(rng.choices(WORDS, k=12))} id={number}\n")
+    return path
+
+
+def make_session(messages: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Conversation history: user turns, assistant replies with tool calls, tool results"""
+    rng = random.Random(seed)
+    history: List[Dict[str, str]] = []
+    for index in range(messages):
+        if index % 3 == 0:
+            content = f"Please look at the {rng.choice(WORDS)} {rng.choice(WORDS)} and fix it."
+        elif index % 3 == 1:
+            content = make_model_output(rng.randint(200, 2000), tool_calls=1, seed=seed + index)
+        else:
+            content = "Tool results:\n" + "\n".join(
+                f"src/{rng.choice(WORDS)}.py:{rng.randint(1, 500)}: {' '.join(rng.choices(WORDS, k=8))}"
+                for _ in range(rng.randint(5, 60))
+            )
+        history.append({"role": "user" if index % 3 != 1 else "assistant", "content": content})
+    return history
+
+
+def make_model_output(chars: int, tool_calls: int = 3, seed: int = 0) -> str:
+    """Model response of about `chars` characters of prose with fenced JSON tool calls spread through it"""
+    rng = random.Random(seed)
+    sections = max(1, tool_calls)
+    prose_per_section = max(1, chars // sections)
+    parts = []
+    for index in range(sections):
+        words = []
+        size = 0
+        while size < prose_per_section:
+            word = rng.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        parts.append(" ".join(words))
+        if index < tool_calls:
+            call = {"tool_calls": [{
+                "name": "grep",
+                "arguments": {"pattern": f"def {rng.choice(WORDS)}_\\w+", "file_pattern": "*.py"}
+            }]}
+            parts.append("```json\n" + json.dumps(call, indent=2) + "\n```")
+    return "\n\n".join(parts)
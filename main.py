@@ -4,6 +4,8 @@ import os
 import sys
 from dotenv import load_dotenv
 from src.assistant import CodingAssistant
+from src.tools.content_cache import get_content_cache
+from src.utils.session_manager import SessionManager
 from src.utils import Colors, Spinner, print_box, print_section, print_success, print_error, print_info
 
 # Set UTF-8 encoding for Windows console
@@ -36,14 +38,42 @@ def print_banner():
     print(f"  {Colors.BRIGHT_GREEN}•{Colors.RESET} Run shell commands")
     print(f"  {Colors.BRIGHT_GREEN}•{Colors.RESET} Interactive diff viewer")
     print()
-    print(f"{Colors.DIM}Commands: {Colors.BRIGHT_WHITE}clear{Colors.DIM}, {Colors.BRIGHT_WHITE}pwd{Colors.DIM}, {Colors.BRIGHT_WHITE}context{Colors.DIM}, {Colors.BRIGHT_WHITE}exit{Colors.RESET}")
+    print(f"{Colors.DIM}Commands: {Colors.BRIGHT_WHITE}clear{Colors.DIM}, {Colors.BRIGHT_WHITE}pwd{Colors.DIM}, {Colors.BRIGHT_WHITE}context{Colors.DIM}, {Colors.BRIGHT_WHITE}/compact <session>{Colors.DIM}, {Colors.BRIGHT_WHITE}/reindex{Colors.DIM}, {Colors.BRIGHT_WHITE}exit{Colors.RESET}")
     print(f"{Colors.DIM}{'─' * 60}{Colors.RESET}\n")
 
 
+def run_session_command(user_input: str) -> bool:
+    """Handle /compact <session> and /reindex; returns False for other input"""
+    parts = user_input.split()
+    if parts[0] not in ('/compact', '/reindex'):
+        return False
+
+    # A separate manager, so the assistant's current session is left alone
+    sessions_dir = ".termicode_sessions"
+    if not os.path.isdir(sessions_dir):
+        print_error(f"No sessions in {os.path.abspath(sessions_dir)}")
+        return True
+    manager = SessionManager(sessions_dir)
+    try:
+        if parts[0] == '/reindex':
+            count = manager.rebuild_index()
+            print_success(f"Session index rebuilt ({count} sessions).")
+        elif len(parts) != 2:
+            print_error("Usage: /compact <session>")
+        else:
+            info = manager.compact_session(parts[1])
+            print_success(f"Session '{info['name']}' compacted ({info['message_count']} messages, {info['size_kb']:.1f} KB).")
+    except Exception as e:
+        print_error(f"{parts[0]} failed: {e}")
+    finally:
+        manager.index.close()
+    return True
+
+
 def main():
     """Main CLI loop with enhanced UI"""
-    # Check for HF_TOKEN
-    if not os.environ.get("HF_TOKEN"):
+    # Check for HF_TOKEN (not needed to replay recorded completions in-process)
+    if not os.environ.get("HF_TOKEN") and not os.environ.get("BASE_URL", "").startswith("fake:"):
         print_error("HF_TOKEN environment variable is not set!")
         print(f"{Colors.YELLOW}Please set it with: {Colors.BOLD}export HF_TOKEN='your-token'{Colors.RESET}")
         sys.exit(1)
@@ -91,15 +121,26 @@ def main():
                 print_info(f"Current directory: {Colors.BOLD}{os.getcwd()}{Colors.RESET}")
                 continue
 
+            if run_session_command(user_input):
+                continue
+
             if user_input.lower() == 'context':
                 context_info = assistant.get_context_info()
                 print()
                 print(f"{Colors.BRIGHT_CYAN}Context Information:{Colors.RESET}")
                 print(f"  Messages: {Colors.BOLD}{context_info['total_messages']}{Colors.RESET} ({context_info['user_messages']} user, {context_info['assistant_messages']} assistant)")
-                print(f"  Estimated tokens: {Colors.BOLD}{context_info['estimated_tokens']}{Colors.RESET} / {assistant.context_manager.max_tokens_estimate}")
+                print(f"  Estimated tokens: {Colors.BOLD}{context_info['estimated_tokens']}{Colors.RESET} / {assistant.context_manager.max_tokens_estimate} {Colors.DIM}({context_info['tokenizer']}){Colors.RESET}")
                 print(f"  Usage: {Colors.BOLD}{context_info['usage_percentage']:.1f}%{Colors.RESET}")
                 if context_info['usage_percentage'] > 80:
                     print(f"  {Colors.YELLOW}⚠ Warning: Context is getting full. Consider using 'clear' command.{Colors.RESET}")
+                if context_info['api_requests']:
+                    print(f"  Prompt cache: {Colors.BOLD}{context_info['cache_hit_rate']:.1f}%{Colors.RESET} {Colors.DIM}({context_info['cached_tokens']} of {context_info['prompt_tokens']} prompt tokens cached over {context_info['api_requests']} requests){Colors.RESET}")
+                completion_cache = assistant.ai_client.completion_cache
+                if completion_cache is not None:
+                    replay_stats = completion_cache.stats()
+                    print(f"  Completion cache: {Colors.BOLD}{replay_stats['entries']}{Colors.RESET} responses, {replay_stats['bytes'] // 1024} KB {Colors.DIM}({replay_stats['hits']} hits, {replay_stats['misses']} misses){Colors.RESET}")
+                cache_stats = get_content_cache().stats()
+                print(f"  File cache: {Colors.BOLD}{cache_stats['entries']}{Colors.RESET} files, {cache_stats['bytes'] // 1024} KB {Colors.DIM}({cache_stats['hits']} hits, {cache_stats['misses']} misses){Colors.RESET}")
                 print()
                 continue
 
@@ -107,6 +148,8 @@ def main():
             print()
             thinking_spinner = Spinner("AI is thinking", style="dots2")
             thinking_spinner.start()
+            # Rate limits and fallbacks show up in the spinner instead of looking like a hang
+            assistant.ai_client.on_retry = thinking_spinner.update_message
 
             # Collect response
             response_chunks = []
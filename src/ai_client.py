@@ -1,30 +1,356 @@
 """AI Client wrapper for HuggingFace API using OpenAI SDK"""
+import asyncio
+import importlib.util
+import json
 import os
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+import queue
+import random
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+from openai import (
+    APIConnectionError, APIError, APIStatusError, APITimeoutError, AsyncOpenAI, BadRequestError,
+    DefaultAsyncHttpxClient, Timeout
+)
+from openai.types.chat import ChatCompletionChunk, ChatCompletionMessage
+from src.utils.completion_cache import CompletionCache, completion_key
+from src.utils.response_parser import ToolCallAssembler
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - openai depends on httpx
+    httpx = None
+
+
+HF_ROUTER_URL = "https://router.huggingface.co/v1"
+
+# Model ID prefixes known to handle native function calling (tools=) well;
+# other models use the fenced-JSON protocol unless TOOL_CALLING=native
+NATIVE_TOOL_MODELS = (
+    "deepseek-ai/deepseek-v3",
+    "qwen/qwen2.5",
+    "qwen/qwen3",
+    "meta-llama/llama-3.1",
+    "meta-llama/llama-3.3",
+    "meta-llama/llama-4",
+    "moonshotai/kimi-k2",
+    "zai-org/glm-4.5",
+    "openai/gpt-oss",
+)
+
+
+def supports_native_tools(model: str) -> bool:
+    """Whether a model is known to support native function calling"""
+    return model.lower().startswith(NATIVE_TOOL_MODELS)
+
+
+class _EventLoopThread:
+    """An asyncio event loop running on a daemon thread, for calling async code from sync code"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="termicode-ai-loop", daemon=True)
+        self._thread.start()
+
+    def submit(self, coroutine) -> "asyncio.Future":
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine) -> Any:
+        """Run a coroutine on the loop and wait for its result"""
+        return self.submit(coroutine).result()
+
+    def iterate(self, async_iterator: AsyncIterator) -> Iterator:
+        """
+        Consume an async iterator on the loop, yielding its items here
+
+        Closing the returned generator early cancels the async side, which
+        closes the underlying HTTP stream.
+        """
+        items: "queue.Queue" = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in async_iterator:
+                    items.put(item)
+            except BaseException as e:
+                items.put(e)
+                raise
+            finally:
+                items.put(done)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = items.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    if isinstance(item, asyncio.CancelledError):
+                        break
+                    raise item
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+@dataclass
+class RetryPolicy:
+    """How AIClient retries, hedges and resumes requests"""
+    max_attempts: int = 4                 # Tries per model for rate limits, 5xx and connection errors
+    base_delay: float = 0.5               # Backoff before the 2nd try; doubles per try (full jitter)
+    max_delay: float = 20.0               # Longest computed backoff
+    max_retry_after: float = 60.0         # Longest Retry-After honored before moving to a fallback model
+    hedge_after: Optional[float] = None   # Seconds without a first chunk before a duplicate stream is started
+    max_resumes: int = 2                  # Continuations requested for a stream that drops mid-response
+
+
+# Status codes worth another try: timeouts, conflicts, rate limits and server errors
+RETRY_STATUSES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# Sent after a partial answer when a stream dropped, to get the rest of it
+CONTINUE_PROMPT = ("Your previous response was cut off after the text above. Continue exactly where it "
+                   "stopped, without repeating any of it and without any preamble.")
+
+# Shortest repeated text trimmed from the start of a continuation
+MIN_OVERLAP = 8
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an API error is transient"""
+    if isinstance(error, APIConnectionError):  # includes timeouts and dropped streams
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRY_STATUSES
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+# Adjusts request parameters before they are sent, e.g. to add provider cache hints
+RequestHook = Callable[[Dict[str, Any]], None]
+
+
+def prompt_cache_key_hint(key: str) -> RequestHook:
+    """
+    Hook sending prompt_cache_key with every request
+
+    Providers that support it (OpenAI-style) route requests with the same
+    key to the same prompt cache, which raises the hit rate for a session
+    whose prompt prefix stays the same across turns.
+    """
+    def hook(params: Dict[str, Any]):
+        params["extra_body"] = {**params.get("extra_body", {}), "prompt_cache_key": key}
+    return hook
+
+
+def cache_breakpoints_hint(params: Dict[str, Any]):
+    """
+    Hook marking the system message and the last message as cache breakpoints
+
+    For providers that only cache explicitly marked prefixes (cache_control,
+    Anthropic-style, e.g. through OpenRouter): the system prompt is cached
+    on its own, and the whole conversation so far is cached for the next
+    turn to extend. The caller's message dicts are left unchanged.
+    """
+    messages = list(params["messages"])
+    if not messages:
+        return
+    marks = {len(messages) - 1}
+    if messages and messages[0].get("role") == "system":
+        marks.add(0)
+
+    for index in marks:
+        message = messages[index]
+        content = message.get("content")
+        if isinstance(content, str) and content:
+            messages[index] = {**message, "content": [
+                {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+            ]}
+    params["messages"] = messages
+
+
+def cached_tokens(usage: Any) -> int:
+    """Prompt tokens served from the provider's prompt cache, as reported in usage"""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    cached = getattr(details, 'cached_tokens', None)
+    if cached is None:
+        # DeepSeek's own field name
+        cached = getattr(usage, 'prompt_cache_hit_tokens', None)
+    return cached or 0
+
+
+@dataclass
+class UsageStats:
+    """Token usage reported by the API, summed over requests"""
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    last_prompt_tokens: int = 0
+    last_cached_tokens: int = 0
+
+    def record(self, usage: Any):
+        prompt = getattr(usage, 'prompt_tokens', None) or 0
+        cached = cached_tokens(usage)
+        self.requests += 1
+        self.prompt_tokens += prompt
+        self.cached_tokens += cached
+        self.completion_tokens += getattr(usage, 'completion_tokens', None) or 0
+        self.last_prompt_tokens = prompt
+        self.last_cached_tokens = cached
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from cache"""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
+def _overlap(previous: str, continuation: str) -> int:
+    """Length of the longest start of continuation that repeats the end of previous"""
+    for size in range(min(len(previous), len(continuation), 400), MIN_OVERLAP - 1, -1):
+        if previous.endswith(continuation[:size]):
+            return size
+    return 0
 
 
 class AIClient:
-    """Wrapper for AI model interaction via HuggingFace"""
+    """
+    Wrapper for AI model interaction via HuggingFace
 
-    def __init__(self, model: str = "deepseek-ai/DeepSeek-V3.2-Exp"):
-        self.model = model
-        self.client = OpenAI(
-            base_url="https://router.huggingface.co/v1",
-            api_key=os.environ.get("HF_TOKEN"),
-        )
+    Requests run on AsyncOpenAI over one pooled HTTP client, driven by an
+    event loop on a background thread. chat/chat_stream are blocking
+    facades over achat/achat_stream, so every caller (the main loop, the
+    summarizer thread, concurrent sub-requests) shares the same warm
+    connections. Idle connections are kept alive for keepalive_expiry
+    seconds, long enough to survive the pause while the user types the
+    next message, so consecutive turns skip the TCP/TLS handshake.
+
+    Transient failures (429, 5xx, connection errors) are retried with
+    jittered exponential backoff, honoring Retry-After; when a model keeps
+    failing, the next fallback model is tried. Streams can be hedged (a
+    duplicate request after hedge_after seconds without a first chunk, the
+    slower one cancelled), and a stream that drops mid-response is resumed
+    by asking the model to continue from the text received so far.
+
+    Token usage (including prompt tokens served from the provider's prompt
+    cache) is collected in usage; streams ask for it with include_usage.
+    request_hooks may adjust every request, e.g. to add cache hints.
+
+    With a completion_cache, responses (messages and whole streams) are
+    stored by a hash of model, temperature and normalized messages, and an
+    identical request is answered from disk without contacting the API.
+    """
 
+    def __init__(
+        self,
+        model: str = "deepseek-ai/DeepSeek-V3.2-Exp",
+        base_url: str = HF_ROUTER_URL,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 120.0,
+        max_connections: int = 16,
+        keepalive_expiry: float = 300.0,
+        fallback_models: Optional[List[str]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        completion_cache: Optional[CompletionCache] = None
+    ):
+        """
+        Args:
+            model: Model ID
+            base_url: OpenAI-compatible API endpoint
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait between received bytes (first token included)
+            max_connections: Connections in the pool
+            keepalive_expiry: Seconds an idle connection is kept for reuse
+            fallback_models: Models to try, in order, when the model keeps failing
+            retry_policy: Retry, hedging and resumption settings
+            completion_cache: Where to store and replay completions (default: no caching)
+        """
         if not os.environ.get("HF_TOKEN"):
             raise ValueError("HF_TOKEN environment variable is required")
 
-    def chat(
+        self.model = model
+        self.base_url = base_url
+        self.fallback_models = [m for m in (fallback_models or []) if m and m != model]
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.completion_cache = completion_cache
+        self.timeout = Timeout(connect=connect_timeout, read=read_timeout, write=30.0, pool=connect_timeout)
+
+        # Set by the UI to report retries and fallbacks: on_retry(message)
+        self.on_retry: Optional[Callable[[str], None]] = None
+
+        # Applied in order to the parameters of every request
+        self.request_hooks: List[RequestHook] = []
+
+        self.usage = UsageStats()
+        # Ask for a final usage chunk on streams (turned off if the server rejects it)
+        self.include_usage = True
+
+        http_options: Dict[str, Any] = {"timeout": self.timeout}
+        if httpx is not None:
+            http_options["limits"] = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry
+            )
+            # Multiplexes concurrent requests over one connection when h2 is installed
+            http_options["http2"] = importlib.util.find_spec("h2") is not None
+
+        self._loop = _EventLoopThread()
+        # The HTTP client binds to the loop it is used on, so create it there
+        self.async_client: AsyncOpenAI = self._loop.run(self._create_client(http_options))
+
+    async def _create_client(self, http_options: Dict[str, Any]) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            base_url=self.base_url,
+            api_key=os.environ.get("HF_TOKEN"),
+            timeout=self.timeout,
+            # Retries are handled here (backoff, Retry-After, fallbacks)
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(**http_options)
+        )
+
+    def _params(
         self,
         messages: List[Dict[str, str]],
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None,
-        stream: bool = False
-    ) -> Any:
-        """Send chat completion request to AI model"""
+        temperature: float,
+        max_tokens: Optional[int],
+        stream: bool,
+        tools: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
         params = {
             "model": self.model,
             "messages": messages,
@@ -34,33 +360,364 @@ class AIClient:
         if max_tokens:
             params["max_tokens"] = max_tokens
 
+        if tools:
+            params["tools"] = tools
+            params["tool_choice"] = "auto"
+
         if stream:
             params["stream"] = True
-            return self.client.chat.completions.create(**params)
+            if self.include_usage:
+                params["stream_options"] = {"include_usage": True}
+
+        for hook in self.request_hooks:
+            hook(params)
+
+        return params
+
+    def _notify(self, message: str):
+        if self.on_retry is not None:
+            try:
+                self.on_retry(message)
+            except Exception:
+                pass
+
+    async def _with_retries(self, attempt: Callable[[str], Awaitable[Any]]) -> Any:
+        """Run attempt(model) with backoff, then with each fallback model"""
+        policy = self.retry_policy
+        models = [self.model] + self.fallback_models
+        error: Optional[BaseException] = None
+
+        for index, model in enumerate(models):
+            for number in range(1, max(1, policy.max_attempts) + 1):
+                try:
+                    return await attempt(model)
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    error = e
+
+                if number >= policy.max_attempts:
+                    break
+
+                delay = retry_after(error)
+                if delay is None:
+                    delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** (number - 1)))
+                elif delay > policy.max_retry_after:
+                    if index + 1 < len(models):
+                        # Not worth waiting for; the fallback may answer now
+                        break
+                    delay = policy.max_retry_after
+
+                self._notify(f"{self._describe(error)}; retrying in {delay:.1f}s "
+                             f"(attempt {number + 1}/{policy.max_attempts})")
+                await asyncio.sleep(delay)
+
+            if index + 1 < len(models):
+                self._notify(f"{model} is unavailable ({self._describe(error)}); falling back to {models[index + 1]}")
+
+        raise error
+
+    @staticmethod
+    def _describe(error: BaseException) -> str:
+        if isinstance(error, APIStatusError):
+            return f"HTTP {error.status_code}"
+        if isinstance(error, APITimeoutError):
+            return "request timed out"
+        return "connection error"
+
+    async def _hedged(self, start: Callable[[], Awaitable[Any]], discard: Callable[[Any], Awaitable[None]]) -> Any:
+        """
+        Await start(); if it takes longer than hedge_after, race a second start()
+
+        The first to succeed wins; the other is cancelled, or passed to
+        discard if it succeeded as well.
+        """
+        delay = self.retry_policy.hedge_after
+        first = asyncio.ensure_future(start())
+        if not delay:
+            return await first
+
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self._notify(f"No response after {delay:.1f}s; sending a second request")
+                tasks.add(asyncio.ensure_future(start()))
+
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        tasks.discard(task)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            for task in tasks:
+                try:
+                    result = await task
+                except BaseException:
+                    continue
+                await discard(result)
 
-        completion = self.client.chat.completions.create(**params)
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        tools: Optional[List[Dict[str, Any]]] = None
+    ) -> Any:
+        """Send chat completion request to AI model and return the message (with .tool_calls if tools are given)"""
+        if self.completion_cache is not None:
+            cached = self.completion_cache.get(
+                completion_key(self.model, temperature, messages, max_tokens, tools, kind="chat"))
+            if cached is not None:
+                return ChatCompletionMessage.model_validate(cached)
+
+        params = self._params(messages, temperature, max_tokens, stream=False, tools=tools)
+        answered_by: List[str] = []
+
+        async def attempt(model: str):
+            completion = await self.async_client.chat.completions.create(**{**params, "model": model})
+            answered_by.append(model)
+            return completion
+
+        completion = await self._with_retries(attempt)
+        if completion.usage is not None:
+            self.usage.record(completion.usage)
 
         if not completion.choices or len(completion.choices) == 0:
             raise ValueError("No response from AI model")
 
-        return completion.choices[0].message
+        message = completion.choices[0].message
+        if self.completion_cache is not None:
+            # Keyed by the model that answered, so a fallback's answer is
+            # never replayed as the primary model's
+            key = completion_key(answered_by[-1], temperature, messages, max_tokens, tools, kind="chat")
+            self.completion_cache.put(key, message.model_dump(exclude_none=True))
+        return message
+
+    async def _chunk_stream(self, params: Dict[str, Any]) -> AsyncIterator[ChatCompletionChunk]:
+        """
+        One streaming request, as parsed chunks
+
+        The event stream is read to its end (past [DONE]) so the connection
+        goes back to the pool instead of being closed mid-response. A
+        transport failure mid-stream surfaces as APIConnectionError.
+        """
+        async with self.async_client.chat.completions.with_streaming_response.create(**params) as response:
+            try:
+                async for line in response.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if not data or data == "[DONE]":
+                        continue
+
+                    payload = json.loads(data)
+                    if isinstance(payload, dict) and payload.get("error"):
+                        error = payload["error"]
+                        message = error.get("message") if isinstance(error, dict) else None
+                        raise APIError(message or "An error occurred during streaming",
+                                       request=response.http_request, body=error)
+
+                    chunk = ChatCompletionChunk.model_validate(payload)
+                    if chunk.usage is not None:
+                        self.usage.record(chunk.usage)
+                    yield chunk
+            except APIError:
+                raise
+            except Exception as e:
+                raise APIConnectionError(message=f"Stream interrupted: {e}", request=response.http_request) from e
+
+    async def achat_chunks(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        tools: Optional[List[Dict[str, Any]]] = None
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        """
+        Stream raw completion chunks
+
+        Opening the stream (up to its first chunk) is retried, hedged and
+        falls back like achat; failures after that are raised. Streams read
+        to the end are stored in the completion cache, if any.
+        """
+        if self.completion_cache is not None:
+            cached = self.completion_cache.get(
+                completion_key(self.model, temperature, messages, max_tokens, tools, kind="stream"))
+            if cached is not None:
+                for payload in cached:
+                    yield ChatCompletionChunk.model_validate(payload)
+                return
+
+        params = self._params(messages, temperature, max_tokens, stream=True, tools=tools)
+        answered_by: List[str] = []
+
+        async def open_stream(model: str):
+            request = {**params, "model": model}
+            if not self.include_usage:
+                request.pop("stream_options", None)
+            chunks = self._chunk_stream(request)
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except BaseException:
+                await chunks.aclose()
+                raise
+            return chunks, first
+
+        async def close_stream(opened):
+            await opened[0].aclose()
+
+        async def attempt(model: str):
+            try:
+                opened = await self._hedged(lambda: open_stream(model), close_stream)
+            except BadRequestError as e:
+                if not (self.include_usage and "stream_options" in str(e)):
+                    raise
+                # Server without usage reporting on streams
+                self.include_usage = False
+                opened = await self._hedged(lambda: open_stream(model), close_stream)
+            answered_by.append(model)
+            return opened
+
+        chunks, first = await self._with_retries(attempt)
+        recorded: Optional[List[Dict[str, Any]]] = [] if self.completion_cache is not None else None
+        try:
+            if first is not None:
+                if recorded is not None:
+                    recorded.append(first.model_dump(exclude_unset=True))
+                yield first
+            async for chunk in chunks:
+                if recorded is not None:
+                    recorded.append(chunk.model_dump(exclude_unset=True))
+                yield chunk
+            if recorded is not None:
+                # Keyed by the model that answered (see achat)
+                key = completion_key(answered_by[-1], temperature, messages, max_tokens, tools, kind="stream")
+                self.completion_cache.put(key, recorded)
+        finally:
+            await chunks.aclose()
+
+    async def achat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        tools: Optional[List[Dict[str, Any]]] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Stream chat completion text
+
+        With tools, native function calls are assembled from the streamed
+        fragments and yielded as tool call dicts ({'id', 'name',
+        'arguments'}) as soon as each is complete, between the text pieces.
+
+        If the stream drops mid-response, a continuation is requested with
+        the partial answer as context, and text it repeats is trimmed (not
+        once a tool call has started: those cannot be stitched together).
+        """
+        received: List[str] = []
+        request = messages
+        resumes = 0
+        assembler = ToolCallAssembler()
+
+        while True:
+            # Start of a continuation, held back until its overlap with the
+            # text already shown can be trimmed
+            held = "" if received else None
+            try:
+                async for chunk in self.achat_chunks(request, temperature, max_tokens, tools=tools):
+                    if not (chunk.choices and len(chunk.choices) > 0):
+                        continue
+                    delta = chunk.choices[0].delta
+                    if getattr(delta, 'tool_calls', None):
+                        for call in assembler.feed(delta.tool_calls):
+                            yield call
+                    if not delta.content:
+                        continue
+                    text = delta.content
+
+                    if held is not None:
+                        held += text
+                        if len(held) < 400:
+                            continue
+                        text, held = held[_overlap("".join(received), held):], None
+
+                    received.append(text)
+                    yield text
+
+                if held:
+                    text = held[_overlap("".join(received), held):]
+                    received.append(text)
+                    yield text
+                for call in assembler.close():
+                    yield call
+                return
+            except Exception as e:
+                if not is_retryable(e) or resumes >= self.retry_policy.max_resumes or assembler.started:
+                    raise
+                resumes += 1
+
+            if held:
+                text = held[_overlap("".join(received), held):]
+                received.append(text)
+                yield text
+
+            if received:
+                self._notify("Response interrupted; asking the model to continue")
+                request = messages + [
+                    {"role": "assistant", "content": "".join(received)},
+                    {"role": "user", "content": CONTINUE_PROMPT}
+                ]
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        tools: Optional[List[Dict[str, Any]]] = None
+    ) -> Any:
+        """Send chat completion request to AI model"""
+        if stream:
+            return self._loop.iterate(self.achat_chunks(messages, temperature, max_tokens, tools=tools))
+
+        return self._loop.run(self.achat(messages, temperature, max_tokens, tools=tools))
 
     def chat_stream(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        tools: Optional[List[Dict[str, Any]]] = None
     ):
-        """Stream chat completion responses"""
-        stream = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=True
-        )
+        """Stream chat completion responses (text pieces, plus tool call dicts when tools are given)"""
+        yield from self._loop.iterate(self.achat_stream(messages, temperature, max_tokens, tools=tools))
+
+    def warm_up(self):
+        """Open a pooled connection in the background so the first request skips the handshake"""
+        async def connect():
+            try:
+                await self.async_client.models.list()
+            except Exception:
+                # Only an optimization; the first real request reports errors
+                pass
+
+        self._loop.submit(connect())
 
-        for chunk in stream:
-            if chunk.choices and len(chunk.choices) > 0:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+    def close(self):
+        """Close pooled connections and stop the event loop"""
+        try:
+            self._loop.run(self.async_client.close())
+        finally:
+            self._loop.stop()
+            if self.completion_cache is not None:
+                self.completion_cache.close()
@@ -1,16 +1,33 @@
 """Main assistant logic"""
+import hashlib
+import json
 import os
-import re
+import time
+from concurrent.futures import wait
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
-from src.ai_client import AIClient
+from openai import BadRequestError, UnprocessableEntityError
+from src.ai_client import (
+    HF_ROUTER_URL, AIClient, RetryPolicy, cache_breakpoints_hint, prompt_cache_key_hint, supports_native_tools
+)
 from src.utils.tool_executor import ToolExecutor
 from src.utils.interactive_executor import InteractiveToolExecutor
-from src.utils.response_parser import ResponseParser
+from src.utils.response_parser import ResponseParser, StreamingToolCallParser, native_tool_call
 from src.utils.session_manager import SessionManager
+from src.utils.completion_cache import CompletionCache
 from src.utils.context_manager import ContextManager
+from src.utils.summarizer import HistorySummarizer
 from src.prompts import get_system_prompt
 
 
+@dataclass
+class AgentLoopConfig:
+    """Limits for the tool-use loop run within a single user turn"""
+    max_steps: int = 10          # Model completions per user turn
+    token_budget: int = 200000   # Estimated prompt + completion tokens per user turn
+    time_budget: float = 600.0   # Wall-clock seconds per user turn
+
+
 class CodingAssistant:
     """Terminal-based coding assistant"""
 
@@ -19,13 +36,51 @@ class CodingAssistant:
         model: str = None,
         interactive: bool = True,
         enable_session: bool = False,
-        session_name: Optional[str] = None
+        session_name: Optional[str] = None,
+        loop_config: Optional[AgentLoopConfig] = None,
+        enable_summary: bool = True
     ):
         # Read model from environment if not provided
         if model is None:
             model = os.getenv('MODEL', 'deepseek-ai/DeepSeek-V3.2-Exp')
 
-        self.ai_client = AIClient(model=model)
+        # Optional: comma-separated models tried when the main one keeps failing,
+        # and seconds without a first token before a duplicate request is raced
+        fallback_models = [m.strip() for m in os.getenv('FALLBACK_MODELS', '').split(',') if m.strip()]
+        try:
+            hedge_after = float(os.getenv('HEDGE_AFTER', '') or 0) or None
+        except ValueError:
+            hedge_after = None
+
+        # Optional: replay identical requests from an on-disk completion cache
+        completion_cache = None
+        if os.getenv('COMPLETION_CACHE', 'off').lower() in ('on', 'true', '1'):
+            try:
+                cache_mb = float(os.getenv('COMPLETION_CACHE_MB', '') or 64)
+                cache_hours = float(os.getenv('COMPLETION_CACHE_HOURS', '') or 168)
+            except ValueError:
+                cache_mb, cache_hours = 64, 168
+            completion_cache = CompletionCache(
+                max_bytes=int(cache_mb * 1024 * 1024),
+                ttl=cache_hours * 3600 if cache_hours > 0 else None
+            )
+
+        # Optional: another OpenAI-compatible endpoint, e.g. a local fake server;
+        # fake:TRANSCRIPT replays recorded completions in-process
+        base_url = os.getenv('BASE_URL', '') or HF_ROUTER_URL
+        if base_url.startswith('fake:'):
+            from src.fake_llm import FakeAIClient
+            self.ai_client = FakeAIClient.from_url(base_url, model=model)
+        else:
+            self.ai_client = AIClient(
+                model=model,
+                base_url=base_url,
+                fallback_models=fallback_models,
+                retry_policy=RetryPolicy(hedge_after=hedge_after),
+                completion_cache=completion_cache
+            )
+        # Connect while the rest starts up and the user types
+        self.ai_client.warm_up()
         self.tool_executor = ToolExecutor()
         self.interactive_executor = InteractiveToolExecutor(verbose=False) if interactive else None
         self.response_parser = ResponseParser()
@@ -34,8 +89,27 @@ class CodingAssistant:
         # Read MODE from environment (DEBUG or SILENT)
         self.mode = os.getenv('MODE', 'SILENT').upper()
 
-        # Initialize with system prompt
-        self.system_prompt = get_system_prompt()
+        # Tool calling protocol: native function calling (tools passed to the
+        # API) or fenced JSON in the response text. TOOL_CALLING=auto picks
+        # native for models known to support it.
+        tool_calling = os.getenv('TOOL_CALLING', 'auto').lower()
+        if tool_calling in ('native', 'json'):
+            self.native_tools = tool_calling == 'native'
+        else:
+            self.native_tools = supports_native_tools(model)
+
+        # Initialize with system prompt (fixed for the session, so it stays a
+        # byte-identical prefix that provider-side prompt caches can reuse)
+        self.system_prompt = get_system_prompt(native_tools=self.native_tools)
+
+        # Optional provider cache hints: comma-separated "key" (prompt_cache_key)
+        # and/or "breakpoints" (cache_control on the system and last message)
+        hints = {h.strip() for h in os.getenv('PROMPT_CACHE_HINTS', '').lower().split(',') if h.strip()}
+        if 'key' in hints:
+            digest = hashlib.sha256(self.system_prompt.encode('utf-8')).hexdigest()[:16]
+            self.ai_client.request_hooks.append(prompt_cache_key_hint(f"termicode-{digest}"))
+        if 'breakpoints' in hints:
+            self.ai_client.request_hooks.append(cache_breakpoints_hint)
 
         # Session management
         self.enable_session = enable_session
@@ -44,6 +118,12 @@ class CodingAssistant:
         # Context management (prevent token overflow)
         self.context_manager = ContextManager(max_messages=20, max_tokens_estimate=8000)
 
+        # Rolling summaries of messages evicted from the context (built in the background)
+        self.summarizer = HistorySummarizer(self.ai_client) if enable_summary else None
+
+        # Agent loop limits (tool rounds per user turn)
+        self.loop_config = loop_config or AgentLoopConfig()
+
         # Load session if specified
         if enable_session and session_name:
             try:
@@ -54,86 +134,276 @@ class CodingAssistant:
 
     def _get_messages(self) -> List[Dict[str, str]]:
         """Get messages for API call including system prompt with context management"""
-        # Truncate history if it exceeds limits
-        truncated_history = self.context_manager.truncate_history(
+        # Truncate history if it exceeds limits (evicted messages are summarized)
+        truncated_history = self.context_manager.compress_history(
             self.conversation_history,
-            self.system_prompt
+            self.system_prompt,
+            self.summarizer
         )
 
         return [
             {"role": "system", "content": self.system_prompt},
-            *truncated_history
+            *self._api_messages(truncated_history)
         ]
 
+    def _api_messages(self, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        History messages in the form the API expects for the current protocol
+
+        History keeps tool rounds as an assistant message (text plus the
+        calls as a ```json block) and a user message with the results; native
+        rounds also carry the calls' ids ('tool_calls' / 'tool_results').
+        With native tools, a round whose two messages are both present is
+        sent as an assistant tool_calls message plus one tool message per
+        result; anything else (JSON protocol, or half a round left by
+        truncation) is sent as plain text.
+        """
+        messages = []
+        i = 0
+        while i < len(history):
+            message = history[i]
+            results = history[i + 1] if i + 1 < len(history) else None
+
+            calls = message.get('tool_calls') if message.get('role') == 'assistant' else None
+            if self.native_tools and calls and results and self._answers(results, calls):
+                text, _ = self.response_parser.extract_tool_calls(message.get('content', ''))
+                messages.append({"role": "assistant", "content": text or None, "tool_calls": calls})
+                messages.extend(
+                    {"role": "tool", "tool_call_id": result['tool_call_id'], "content": result['content']}
+                    for result in results['tool_results']
+                )
+                i += 2
+                continue
+
+            messages.append({"role": message.get('role'), "content": message.get('content', '')})
+            i += 1
+        return messages
+
+    @staticmethod
+    def _answers(results: Dict[str, Any], calls: List[Dict[str, Any]]) -> bool:
+        """Whether a tool results message answers exactly the given native calls"""
+        answered = [result.get('tool_call_id') for result in results.get('tool_results') or []]
+        return results.get('role') == 'user' and sorted(answered) == sorted(call.get('id') for call in calls)
+
+    def _schedule_summaries(self):
+        """Summarize soon-to-be-evicted history while the user is typing"""
+        if self.summarizer:
+            self.context_manager.schedule_summaries(
+                self.conversation_history,
+                self.system_prompt,
+                self.summarizer
+            )
+
     def _save_to_session(self):
         """Save current conversation to session file (if enabled)"""
         if self.enable_session and self.session_manager:
             self.session_manager.save_message(self.conversation_history)
 
+    def _stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        executor: Optional[ToolExecutor] = None,
+        show_raw: bool = True
+    ):
+        """
+        Stream a completion, dispatching tool calls as soon as they are complete
+
+        Yields display chunks (raw chunks, or text outside ```json blocks when
+        show_raw is False). Tool calls are submitted to the executor's scheduler
+        while the model is still generating, so tool latency overlaps with
+        generation. With native tools, calls arrive as structured function
+        calls; fenced JSON in the text is still honored. Returns
+        (assistant_message, tool_results, native_calls).
+        """
+        parser = StreamingToolCallParser()
+        futures = []
+        native_calls = []
+        tools = executor.get_tool_definitions() if executor and self.native_tools else None
+
+        try:
+            for chunk in self.ai_client.chat_stream(messages, temperature=0.7, tools=tools):
+                if isinstance(chunk, dict):
+                    native_calls.append(chunk)
+                    futures.append(executor.submit_tool_call(chunk))
+                    if show_raw:
+                        yield "\n" + self.response_parser.format_tool_calls([chunk]) + "\n"
+                    continue
+
+                completed = parser.feed(chunk)
+
+                if executor:
+                    for call in completed:
+                        futures.append(executor.submit_tool_call(call))
+
+                if show_raw:
+                    yield chunk
+                else:
+                    visible = parser.take_visible()
+                    if visible:
+                        yield visible
+
+            parser.close()
+            if not show_raw:
+                visible = parser.take_visible()
+                if visible:
+                    yield visible
+        finally:
+            # Never leave tools running behind the caller's back
+            wait(futures)
+
+        tool_results = [future.result() for future in futures]
+        return parser.text, tool_results, native_calls
+
     def get_context_info(self) -> Dict[str, Any]:
         """Get information about current context usage"""
-        return self.context_manager.get_context_stats(self.conversation_history)
+        info = self.context_manager.get_context_stats(self.conversation_history)
+        usage = self.ai_client.usage
+        info['api_requests'] = usage.requests
+        info['prompt_tokens'] = usage.prompt_tokens
+        info['cached_tokens'] = usage.cached_tokens
+        info['cache_hit_rate'] = usage.cache_hit_rate * 100
+        return info
+
+    def _complete_response(self, messages: List[Dict[str, str]], executor: Optional[ToolExecutor] = None):
+        """
+        Non-streaming counterpart of _stream_response
+
+        Yields the text part of the response and returns
+        (assistant_message, tool_results, native_calls).
+        """
+        tools = executor.get_tool_definitions() if executor and self.native_tools else None
+        response = self.ai_client.chat(messages, temperature=0.7, tools=tools)
+        assistant_message = response.content or ""
+
+        native_calls = [
+            native_tool_call(call.id, call.function.name, call.function.arguments)
+            for call in getattr(response, 'tool_calls', None) or []
+        ]
 
-    def process_message(self, user_message: str) -> str:
-        """Process user message and return response"""
-        # Add user message to history
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
+        # Parse response for tool calls
+        text_content, tool_calls = self.response_parser.extract_tool_calls(assistant_message)
 
-        # Get AI response
-        messages = self._get_messages()
-        response = self.ai_client.chat(messages, temperature=0.7)
+        if text_content:
+            yield text_content
 
-        assistant_message = response.content
+        tool_results = []
+        tool_calls = (tool_calls or []) + native_calls
+        if tool_calls and executor:
+            tool_results = executor.execute_tool_calls(tool_calls)
 
-        # Parse response for tool calls
-        text_content, tool_calls = self.response_parser.extract_tool_calls(assistant_message)
+        return assistant_message, tool_results, native_calls
 
-        full_response_parts = []
+    def _request(self, messages: List[Dict[str, Any]], stream: bool, executor: Optional[ToolExecutor], show_raw: bool):
+        """One model completion (streamed or not); returns (assistant_message, tool_results, native_calls)"""
+        if stream:
+            return (yield from self._stream_response(messages, executor=executor, show_raw=show_raw))
+        return (yield from self._complete_response(messages, executor=executor))
 
-        # Add text content if any
-        if text_content:
-            full_response_parts.append(text_content)
+    def _run_agent_loop(
+        self,
+        stream: bool = True,
+        executor: Optional[ToolExecutor] = None,
+        show_raw: bool = True,
+        show_tool_output: bool = True
+    ):
+        """
+        Run model completions and tool rounds until the model stops calling tools
+
+        Shared by all entry points. Each step sends the (truncated) history,
+        executes any tool calls and feeds the results back, bounded by
+        self.loop_config (max steps, token budget, wall-clock budget).
+        Yields display chunks.
+        """
+        config = self.loop_config
+        started = time.time()
+        tokens_used = 0
+
+        for step in range(1, config.max_steps + 1):
+            messages = self._get_messages()
 
-        # Execute tool calls if present
-        if tool_calls:
-            tool_results = self.tool_executor.execute_tool_calls(tool_calls)
-            tool_output = self.response_parser.format_tool_results(tool_results)
-            full_response_parts.append(tool_output)
+            try:
+                assistant_message, tool_results, native_calls = yield from self._request(
+                    messages, stream, executor, show_raw
+                )
+            except (BadRequestError, UnprocessableEntityError) as e:
+                if not (self.native_tools and 'tool' in str(e).lower()):
+                    raise
+                # The provider rejected tools=: use the fenced-JSON protocol from now on
+                self.native_tools = False
+                self.system_prompt = get_system_prompt(native_tools=False)
+                messages = self._get_messages()
+                assistant_message, tool_results, native_calls = yield from self._request(
+                    messages, stream, executor, show_raw
+                )
+
+            tokens_used += self.context_manager.get_total_tokens(messages)
+
+            # Native calls are recorded in history as the ```json block the
+            # text protocol uses (so token counts, summaries and sessions see
+            # them), plus their ids for rebuilding native messages
+            message: Dict[str, Any] = {"role": "assistant", "content": assistant_message}
+            if native_calls:
+                rendered = self.response_parser.format_tool_calls(native_calls)
+                message["content"] = f"{assistant_message}\n\n{rendered}" if assistant_message.strip() else rendered
+                message["tool_calls"] = [
+                    {
+                        "id": call['id'],
+                        "type": "function",
+                        "function": {"name": call['name'], "arguments": json.dumps(call['arguments'])}
+                    }
+                    for call in native_calls
+                ]
+
+            tokens_used += self.context_manager.estimate_tokens(message["content"])
+            self.conversation_history.append(message)
+
+            if not tool_results:
+                return
 
             # Add tool results to conversation for context
-            tool_context = f"Tool execution results:\n{tool_output}"
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
-            self.conversation_history.append({
+            tool_output = self.response_parser.format_tool_results(tool_results)
+            results_message: Dict[str, Any] = {
                 "role": "user",
-                "content": tool_context
-            })
+                "content": f"{ContextManager.TOOL_RESULTS_PREFIX}\n{tool_output}"
+            }
+            if native_calls:
+                results_message["tool_results"] = [
+                    {"tool_call_id": result['id'], "content": result['result']}
+                    for result in tool_results if result.get('id')
+                ]
+            self.conversation_history.append(results_message)
 
-            # Get follow-up response from AI
-            messages = self._get_messages()
-            follow_up = self.ai_client.chat(messages, temperature=0.7)
-            follow_up_content = follow_up.content
+            yield "\n\n"
+            if show_tool_output:
+                yield tool_output
+
+            # Stop when a budget is exhausted; tool results stay in history
+            # so the next user message continues from here
+            stop_reason = None
+            if step >= config.max_steps:
+                stop_reason = f"step limit ({config.max_steps})"
+            elif tokens_used >= config.token_budget:
+                stop_reason = f"token budget ({config.token_budget})"
+            elif time.time() - started >= config.time_budget:
+                stop_reason = f"time budget ({config.time_budget:.0f}s)"
+
+            if stop_reason:
+                yield f"\n[Stopped after {step} tool round(s): {stop_reason} reached. Send a message to continue.]\n"
+                return
 
-            full_response_parts.append("\n" + follow_up_content)
+            yield "\n"
 
-            # Add to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": follow_up_content
-            })
-        else:
-            # No tool calls, just add assistant message to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
+    def process_message(self, user_message: str) -> str:
+        """Process user message and return response"""
+        # Add user message to history
+        self.conversation_history.append({
+            "role": "user",
+            "content": user_message
+        })
 
-        return "\n".join(full_response_parts)
+        response = "".join(self._run_agent_loop(stream=False, executor=self.tool_executor))
+        self._schedule_summaries()
+        return response
 
     def process_message_stream(self, user_message: str):
         """Process message with streaming response"""
@@ -143,57 +413,9 @@ class CodingAssistant:
             "content": user_message
         })
 
-        # Stream AI response
-        messages = self._get_messages()
-        full_response = []
-
-        for chunk in self.ai_client.chat_stream(messages, temperature=0.7):
-            full_response.append(chunk)
-            yield chunk
-
-        # Process complete response for tool calls
-        assistant_message = "".join(full_response)
-        text_content, tool_calls = self.response_parser.extract_tool_calls(assistant_message)
-
-        # Execute tool calls if present
-        if tool_calls:
-            yield "\n\n"
-
-            tool_results = self.tool_executor.execute_tool_calls(tool_calls)
-            tool_output = self.response_parser.format_tool_results(tool_results)
-            yield tool_output
-
-            # Add to conversation history
-            tool_context = f"Tool execution results:\n{tool_output}"
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
-            self.conversation_history.append({
-                "role": "user",
-                "content": tool_context
-            })
-
-            # Get follow-up response
-            yield "\n"
-            messages = self._get_messages()
-            follow_up_parts = []
-
-            for chunk in self.ai_client.chat_stream(messages, temperature=0.7):
-                follow_up_parts.append(chunk)
-                yield chunk
-
-            # Add to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": "".join(follow_up_parts)
-            })
-        else:
-            # No tool calls, just add to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
+        # Stream AI responses, executing tool calls as they arrive
+        yield from self._run_agent_loop(stream=True, executor=self.tool_executor)
+        self._schedule_summaries()
 
     def process_message_stream_interactive(self, user_message: str):
         """Process message with interactive UI (clean output with diffs)"""
@@ -203,87 +425,16 @@ class CodingAssistant:
             "content": user_message
         })
 
-        # Stream AI response
-        messages = self._get_messages()
-        full_response = []
-
-        # In DEBUG mode, show everything including JSON blocks
-        if self.mode == 'DEBUG':
-            for chunk in self.ai_client.chat_stream(messages, temperature=0.7):
-                full_response.append(chunk)
-                yield chunk
-        else:
-            # In SILENT mode, collect all response first then filter JSON blocks
-            for chunk in self.ai_client.chat_stream(messages, temperature=0.7):
-                full_response.append(chunk)
-
-            # Remove JSON blocks from response
-            response_text = "".join(full_response)
-
-            # Remove all ```json ... ``` blocks (non-greedy match)
-            cleaned_text = re.sub(r'```json.*?```', '', response_text, flags=re.DOTALL)
-
-            # Yield the cleaned text
-            if cleaned_text.strip():
-                yield cleaned_text
-
-        # Process complete response for tool calls
-        assistant_message = "".join(full_response)
-        text_content, tool_calls = self.response_parser.extract_tool_calls(assistant_message)
-
-        # Execute tool calls if present (with interactive UI)
-        if tool_calls and self.interactive_executor:
-            yield "\n\n"
-
-            # Use interactive executor for clean UI
-            tool_results = self.interactive_executor.execute_tool_calls_interactive(tool_calls)
-
-            # Add to conversation history
-            tool_output_plain = self.response_parser.format_tool_results(tool_results)
-            tool_context = f"Tool execution results:\n{tool_output_plain}"
-
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
-            self.conversation_history.append({
-                "role": "user",
-                "content": tool_context
-            })
-
-            # Get follow-up response
-            yield "\n"
-            messages = self._get_messages()
-            follow_up_parts = []
-
-            # Stream follow-up response (with SILENT mode filtering)
-            if self.mode == 'DEBUG':
-                for chunk in self.ai_client.chat_stream(messages, temperature=0.7):
-                    follow_up_parts.append(chunk)
-                    yield chunk
-            else:
-                # SILENT mode - collect and filter
-                for chunk in self.ai_client.chat_stream(messages, temperature=0.7):
-                    follow_up_parts.append(chunk)
-
-                # Remove JSON blocks (non-greedy match)
-                follow_up_text = "".join(follow_up_parts)
-                cleaned_follow_up = re.sub(r'```json.*?```', '', follow_up_text, flags=re.DOTALL)
-
-                if cleaned_follow_up.strip():
-                    yield cleaned_follow_up
-
-            # Add to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": "".join(follow_up_parts)
-            })
-        else:
-            # No tool calls or no interactive executor, just add to history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
+        # In DEBUG mode, show everything including JSON blocks;
+        # in SILENT mode, only the text outside ```json blocks is shown.
+        # Tool results are displayed by the interactive executor itself.
+        yield from self._run_agent_loop(
+            stream=True,
+            executor=self.interactive_executor,
+            show_raw=self.mode == 'DEBUG',
+            show_tool_output=False
+        )
+        self._schedule_summaries()
 
         # Save to session if enabled
         self._save_to_session()
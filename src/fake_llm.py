@@ -0,0 +1,488 @@
+"""
+Offline stand-in for the model API: recorded completions replayed at a set speed
+
+Two ways to use it, both selected through the base URL:
+
+- An OpenAI-compatible HTTP server (python -m src.fake_llm), for AIClient
+  with BASE_URL=http://127.0.0.1:8780/v1. Exercises the whole HTTP path.
+- FakeAIClient, an in-process drop-in for AIClient, for
+  BASE_URL=fake:path/to/transcript.jsonl?latency=0.2&tps=50. No sockets.
+
+Completions come from a transcript (JSON lines), matched by a hash of the
+normalized messages and tools, or else taken in recorded order. The server
+can also record: with --record-from, requests it has no answer for are
+sent to a real endpoint and the answers are appended to the transcript.
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionChunk, ChatCompletionMessage
+from src.ai_client import RetryPolicy, UsageStats
+from src.utils.completion_cache import completion_key
+from src.utils.response_parser import native_tool_call
+
+# Answer for requests the transcript has nothing for
+DEFAULT_RESPONSE = "No recorded response for this request."
+
+
+@dataclass
+class ReplaySpeed:
+    """How fast recorded completions are played back"""
+    latency: float = 0.0             # Seconds before the first token
+    tokens_per_second: float = 0.0   # Token rate after that (0 = as fast as possible)
+    chars_per_token: int = 4         # Characters sent per streamed token
+
+
+class Transcript:
+    """
+    Recorded completions, one JSON object per line
+
+    Each entry is {"key": ..., "response": {"content": str, "tool_calls":
+    [{"id", "name", "arguments"}]}}. A request is answered by the entry with
+    the same key; failing that (in sequential mode), by the next entry not
+    yet used, so a recorded session replays even when tool outputs (timings,
+    temp paths) make the requests differ slightly.
+    """
+
+    def __init__(self, path: Optional[str] = None, sequential: bool = True):
+        """
+        Args:
+            path: JSONL file (None = in memory only)
+            sequential: Fall back to the next unused entry when no key matches
+        """
+        self.path = path
+        self.sequential = sequential
+        self.entries: List[Dict[str, Any]] = []
+        self._used: set = set()
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self.entries.append(json.loads(line))
+
+    @staticmethod
+    def key(messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Request key; model and sampling settings are left out so any model can replay"""
+        return completion_key("", 0, messages, tools=tools, kind="replay")
+
+    def lookup(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """Recorded response for a request, or None"""
+        key = self.key(messages, tools)
+        with self._lock:
+            for index, entry in enumerate(self.entries):
+                if entry.get('key') == key:
+                    self._used.add(index)
+                    return entry['response']
+            if self.sequential:
+                for index, entry in enumerate(self.entries):
+                    if index not in self._used:
+                        self._used.add(index)
+                        return entry['response']
+        return None
+
+    def record(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]], response: Dict[str, Any]):
+        """Add a response (appended to the file, if any)"""
+        entry = {'key': self.key(messages, tools), 'response': response}
+        with self._lock:
+            self.entries.append(entry)
+            self._used.add(len(self.entries) - 1)
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def response_from_message(message: Any) -> Dict[str, Any]:
+    """Transcript response from an API response message"""
+    return {
+        'content': message.content or "",
+        'tool_calls': [
+            native_tool_call(call.id, call.function.name, call.function.arguments)
+            for call in getattr(message, 'tool_calls', None) or []
+        ],
+    }
+
+
+def api_tool_calls(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """A response's tool calls in OpenAI format"""
+    return [
+        {
+            'id': call.get('id') or f"call_{index}",
+            'type': 'function',
+            'function': {'name': call['name'], 'arguments': json.dumps(call.get('arguments') or {})},
+        }
+        for index, call in enumerate(response.get('tool_calls') or [])
+    ]
+
+
+class FakeLLM:
+    """Answers chat requests from a transcript, optionally recording from a real client"""
+
+    def __init__(self, transcript: Transcript, speed: Optional[ReplaySpeed] = None, upstream=None):
+        """
+        Args:
+            transcript: Recorded completions
+            speed: Playback timing (default: instant)
+            upstream: AIClient asked (and recorded) when the transcript has no answer
+        """
+        self.transcript = transcript
+        self.speed = speed or ReplaySpeed()
+        self.upstream = upstream
+
+    def respond(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None,
+                temperature: float = 0.7, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        response = self.transcript.lookup(messages, tools)
+        if response is not None:
+            return response
+        if self.upstream is None:
+            return {'content': DEFAULT_RESPONSE, 'tool_calls': []}
+
+        message = self.upstream.chat(messages, temperature=temperature, max_tokens=max_tokens, tools=tools)
+        response = response_from_message(message)
+        self.transcript.record(messages, tools, response)
+        return response
+
+    def pieces(self, text: str) -> List[str]:
+        """Text split into streamed tokens"""
+        size = max(1, self.speed.chars_per_token)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def token_delay(self) -> float:
+        return 1.0 / self.speed.tokens_per_second if self.speed.tokens_per_second > 0 else 0.0
+
+    def chunks(self, response: Dict[str, Any], model: str, include_usage: bool = False,
+               prompt_tokens: int = 0) -> Iterator[Tuple[float, Dict[str, Any]]]:
+        """Stream chunk payloads for a response, each with the delay to wait before sending it"""
+        base = {'id': f"chatcmpl-{uuid.uuid4().hex[:12]}", 'object': 'chat.completion.chunk',
+                'created': int(time.time()), 'model': model}
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return {**base, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+
+        delay = self.token_delay()
+        tokens = 0
+        yield self.speed.latency, chunk({'role': 'assistant', 'content': ''})
+
+        for piece in self.pieces(response.get('content') or ""):
+            tokens += 1
+            yield delay, chunk({'content': piece})
+
+        for index, call in enumerate(api_tool_calls(response)):
+            function = call['function']
+            yield delay, chunk({'tool_calls': [{'index': index, 'id': call['id'], 'type': 'function',
+                                                'function': {'name': function['name'], 'arguments': ''}}]})
+            for piece in self.pieces(function['arguments']):
+                tokens += 1
+                yield delay, chunk({'tool_calls': [{'index': index, 'function': {'arguments': piece}}]})
+
+        yield 0.0, chunk({}, 'tool_calls' if response.get('tool_calls') else 'stop')
+        if include_usage:
+            yield 0.0, {**base, 'choices': [], 'usage': {
+                'prompt_tokens': prompt_tokens, 'completion_tokens': tokens,
+                'total_tokens': prompt_tokens + tokens
+            }}
+
+    def completion(self, response: Dict[str, Any], model: str, prompt_tokens: int = 0) -> Dict[str, Any]:
+        """Non-streaming completion payload for a response"""
+        message: Dict[str, Any] = {'role': 'assistant', 'content': response.get('content') or ""}
+        tool_calls = api_tool_calls(response)
+        if tool_calls:
+            message['tool_calls'] = tool_calls
+        tokens = len(self.pieces(message['content']))
+        return {
+            'id': f"chatcmpl-{uuid.uuid4().hex[:12]}", 'object': 'chat.completion',
+            'created': int(time.time()), 'model': model,
+            'choices': [{'index': 0, 'message': message, 'finish_reason': 'tool_calls' if tool_calls else 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': tokens,
+                      'total_tokens': prompt_tokens + tokens},
+        }
+
+
+def _prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Rough prompt size for the reported usage (4 chars ≈ 1 token)"""
+    return sum(len(str(message.get('content') or "")) for message in messages) // 4
+
+
+class FakeAIClient:
+    """
+    In-process replacement for AIClient backed by a FakeLLM
+
+    Same interface (chat, chat_stream, the async variants, usage, hooks),
+    but no network: responses come from the transcript, paced by the
+    replay speed, so the assistant loop can be timed deterministically.
+    """
+
+    def __init__(self, llm: FakeLLM, model: str = "fake-model"):
+        self.llm = llm
+        self.model = model
+        self.base_url = "fake:"
+        self.fallback_models: List[str] = []
+        self.retry_policy = RetryPolicy()
+        self.completion_cache = None
+        self.on_retry = None
+        self.request_hooks: List[Any] = []
+        self.usage = UsageStats()
+        self.include_usage = True
+
+    @classmethod
+    def from_url(cls, url: str, model: str = "fake-model") -> "FakeAIClient":
+        """
+        Client for a fake: URL
+
+        fake:PATH?latency=SECONDS&tps=TOKENS_PER_SECOND&sequential=0 replays
+        the transcript at PATH (empty PATH: every request gets the default
+        answer).
+        """
+        parts = urlsplit(url)
+        options = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        path = (parts.netloc + parts.path) or None
+        speed = ReplaySpeed(
+            latency=float(options.get('latency', 0)),
+            tokens_per_second=float(options.get('tps', 0)),
+            chars_per_token=int(options.get('chars_per_token', 4))
+        )
+        transcript = Transcript(path, sequential=options.get('sequential', '1') not in ('0', 'false'))
+        return cls(FakeLLM(transcript, speed), model=model)
+
+    def _respond(self, messages, temperature, max_tokens, tools) -> Tuple[Dict[str, Any], int]:
+        response = self.llm.respond(messages, tools, temperature, max_tokens)
+        return response, _prompt_tokens(messages)
+
+    def _record_usage(self, payload: Dict[str, Any]):
+        if payload.get('usage'):
+            self.usage.record(CompletionUsage.model_validate(payload['usage']))
+
+    def chat(self, messages, temperature: float = 0.7, max_tokens: Optional[int] = None,
+             stream: bool = False, tools=None) -> Any:
+        if stream:
+            return self._chunks(messages, temperature, max_tokens, tools)
+
+        response, prompt_tokens = self._respond(messages, temperature, max_tokens, tools)
+        time.sleep(self.llm.speed.latency)
+        payload = self.llm.completion(response, self.model, prompt_tokens)
+        self._record_usage(payload)
+        return ChatCompletionMessage.model_validate(payload['choices'][0]['message'])
+
+    def _chunks(self, messages, temperature, max_tokens, tools) -> Iterator[ChatCompletionChunk]:
+        response, prompt_tokens = self._respond(messages, temperature, max_tokens, tools)
+        for delay, payload in self.llm.chunks(response, self.model, True, prompt_tokens):
+            if delay:
+                time.sleep(delay)
+            self._record_usage(payload)
+            yield ChatCompletionChunk.model_validate(payload)
+
+    def chat_stream(self, messages, temperature: float = 0.7, max_tokens: Optional[int] = None, tools=None):
+        response, prompt_tokens = self._respond(messages, temperature, max_tokens, tools)
+        delay = self.llm.token_delay()
+
+        time.sleep(self.llm.speed.latency)
+        for piece in self.llm.pieces(response.get('content') or ""):
+            if delay:
+                time.sleep(delay)
+            yield piece
+        for call in response.get('tool_calls') or []:
+            yield call
+
+        self._record_usage(self.llm.completion(response, self.model, prompt_tokens))
+
+    async def achat(self, messages, temperature: float = 0.7, max_tokens: Optional[int] = None, tools=None) -> Any:
+        response, prompt_tokens = self._respond(messages, temperature, max_tokens, tools)
+        await asyncio.sleep(self.llm.speed.latency)
+        payload = self.llm.completion(response, self.model, prompt_tokens)
+        self._record_usage(payload)
+        return ChatCompletionMessage.model_validate(payload['choices'][0]['message'])
+
+    async def achat_chunks(self, messages, temperature: float = 0.7, max_tokens: Optional[int] = None,
+                           tools=None) -> AsyncIterator[ChatCompletionChunk]:
+        response, prompt_tokens = self._respond(messages, temperature, max_tokens, tools)
+        for delay, payload in self.llm.chunks(response, self.model, True, prompt_tokens):
+            if delay:
+                await asyncio.sleep(delay)
+            self._record_usage(payload)
+            yield ChatCompletionChunk.model_validate(payload)
+
+    async def achat_stream(self, messages, temperature: float = 0.7, max_tokens: Optional[int] = None,
+                           tools=None) -> AsyncIterator[Any]:
+        response, prompt_tokens = self._respond(messages, temperature, max_tokens, tools)
+        delay = self.llm.token_delay()
+
+        await asyncio.sleep(self.llm.speed.latency)
+        for piece in self.llm.pieces(response.get('content') or ""):
+            if delay:
+                await asyncio.sleep(delay)
+            yield piece
+        for call in response.get('tool_calls') or []:
+            yield call
+
+        self._record_usage(self.llm.completion(response, self.model, prompt_tokens))
+
+    def warm_up(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """OpenAI-compatible endpoints: GET /v1/models and POST /v1/chat/completions"""
+
+    protocol_version = 'HTTP/1.1'
+    # Tokens go out as soon as they are written
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': self.server.model, 'object': 'model'}]})
+        else:
+            self._send_json(404, {'error': {'message': f"Not found: {self.path}"}})
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Not found: {self.path}"}})
+            return
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            messages = body['messages']
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {'error': {'message': f"Invalid request: {e}"}})
+            return
+
+        llm: FakeLLM = self.server.llm
+        model = body.get('model') or self.server.model
+        try:
+            response = llm.respond(messages, body.get('tools'), body.get('temperature', 0.7), body.get('max_tokens'))
+        except Exception as e:
+            self._send_json(502, {'error': {'message': f"Upstream request failed: {e}"}})
+            return
+        prompt_tokens = _prompt_tokens(messages)
+
+        if not body.get('stream'):
+            time.sleep(llm.speed.latency)
+            self._send_json(200, llm.completion(response, model, prompt_tokens))
+            return
+
+        include_usage = bool((body.get('stream_options') or {}).get('include_usage'))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for delay, payload in llm.chunks(response, model, include_usage, prompt_tokens):
+                if delay:
+                    time.sleep(delay)
+                self._write_chunk(f"data: {json.dumps(payload)}\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading (e.g. cancelled a hedged request)
+            self.close_connection = True
+
+    def _write_chunk(self, text: str):
+        data = text.encode('utf-8')
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeLLMServer:
+    """OpenAI-compatible HTTP server answering from a FakeLLM"""
+
+    def __init__(self, llm: FakeLLM, host: str = "127.0.0.1", port: int = 0, model: str = "fake-model"):
+        """
+        Args:
+            llm: Source of the responses
+            host: Interface to listen on
+            port: Port to listen on (0 = any free port)
+            model: Model ID reported by /v1/models
+        """
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.llm = llm
+        self.httpd.model = model
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded completions over an OpenAI-compatible API")
+    parser.add_argument('--transcript', help="JSONL transcript to replay (and record into)")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument('--tps', type=float, default=0.0, help="Tokens per second (0 = unthrottled)")
+    parser.add_argument('--chars-per-token', type=int, default=4)
+    parser.add_argument('--strict', action='store_true', help="Only answer requests whose key matches an entry")
+    parser.add_argument('--record-from', metavar='BASE_URL',
+                        help="Forward unmatched requests to this API (HF_TOKEN, MODEL) and record the answers")
+    args = parser.parse_args()
+
+    upstream = None
+    if args.record_from:
+        from src.ai_client import AIClient
+        upstream = AIClient(model=os.getenv('MODEL', 'deepseek-ai/DeepSeek-V3.2-Exp'), base_url=args.record_from)
+
+    llm = FakeLLM(
+        Transcript(args.transcript, sequential=not args.strict and not upstream),
+        ReplaySpeed(args.latency, args.tps, args.chars_per_token),
+        upstream=upstream
+    )
+    server = FakeLLMServer(llm, args.host, args.port)
+    print(f"Serving {len(llm.transcript.entries)} recorded completions on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        if upstream is not None:
+            upstream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 from .base import Tool, ToolResult
 from .file_tools import ReadTool, WriteTool, EditTool, GlobTool, GrepTool
 from .bash_tool import BashTool
+from .output_tools import OutputStore, ReadOutputTool
+from .job_tools import JobManager, JobStatusTool, JobOutputTool, JobCancelTool
 
 __all__ = [
     'Tool',
@@ -12,4 +14,10 @@ __all__ = [
     'GlobTool',
     'GrepTool',
     'BashTool',
+    'OutputStore',
+    'ReadOutputTool',
+    'JobManager',
+    'JobStatusTool',
+    'JobOutputTool',
+    'JobCancelTool',
 ]
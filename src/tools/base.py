@@ -1,6 +1,7 @@
 """Base classes for tool system"""
+import os
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 from dataclasses import dataclass
 
 
@@ -20,6 +21,23 @@ class ToolResult:
 class Tool(ABC):
     """Base class for all tools"""
 
+    # Read-only tools may run concurrently with each other
+    read_only: bool = False
+
+    # Directory relative paths refer to (set by ToolExecutor to the bash
+    # shell's current directory); None = the process working directory
+    working_directory: Optional[Callable[[], str]] = None
+
+    def resolve_path(self, path: str) -> str:
+        """path as the model means it: relative paths are taken from working_directory"""
+        if not path or os.path.isabs(path) or self.working_directory is None:
+            return path
+        base = self.working_directory()
+        if not base or os.path.normpath(base) == os.getcwd():
+            # Keep relative paths (and the paths in results) as given
+            return path
+        return os.path.join(base, path)
+
     @property
     @abstractmethod
     def name(self) -> str:
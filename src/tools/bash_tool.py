@@ -1,20 +1,48 @@
 """Bash command execution tool"""
 import subprocess
 import os
-from typing import Dict, Any
+import queue
+import threading
+import time
+from typing import Dict, Any, Optional
 from .base import Tool, ToolResult
+from .shell_session import QUEUE_SIZE, OutputCapture, OutputListener, ShellSession, pump_output
+from .job_tools import JobManager
 
 
 class BashTool(Tool):
     """Execute bash/shell commands"""
 
+    def __init__(self, persistent: Optional[bool] = None, jobs: Optional[JobManager] = None):
+        """
+        Args:
+            persistent: Run commands in one long-lived shell so cd and exported
+                variables carry over (default: on for POSIX unless BASH_SESSION=off)
+            jobs: Where background commands run (default: a manager of its own)
+        """
+        if persistent is None:
+            persistent = os.name == 'posix' and os.getenv('BASH_SESSION', 'on').lower() not in ('0', 'off', 'false', 'no')
+        self.session = ShellSession() if persistent else None
+        self.jobs = jobs or JobManager()
+
+        # Set by the UI to see output live: on_output(stream_name, text)
+        self.on_output: Optional[OutputListener] = None
+
+    def current_directory(self) -> str:
+        """Where the shell is now (cd persists in a session), i.e. what relative paths refer to"""
+        return self.session.cwd if self.session is not None else os.getcwd()
+
     @property
     def name(self) -> str:
         return "bash"
 
     @property
     def description(self) -> str:
-        return "Execute a bash/shell command and return the output. Use for git, npm, pip, and other CLI tools."
+        return ("Execute a bash/shell command and return the output. Use for git, npm, pip, and other CLI tools. "
+                "The shell persists between calls: cd, exported variables and activated virtualenvs carry over, "
+                "and relative paths given to the file tools (read_file, glob, grep, ...) follow the shell's cd. "
+                "Set background=true for long builds or test runs: the command then runs as a job that "
+                "job_status, job_output and job_cancel manage while you keep working.")
 
     @property
     def parameters(self) -> Dict[str, Any]:
@@ -29,27 +57,49 @@ class BashTool(Tool):
                     "type": "integer",
                     "description": "Timeout in seconds (default: 30)",
                     "default": 30
+                },
+                "background": {
+                    "type": "boolean",
+                    "description": "If true, start the command as a background job and return its job id immediately",
+                    "default": False
+                },
+                "restart": {
+                    "type": "boolean",
+                    "description": "If true, start a fresh shell first (resets cd and environment variables)",
+                    "default": False
                 }
             },
             "required": ["command"]
         }
 
-    def execute(self, command: str, timeout: int = 30) -> ToolResult:
+    def execute(self, command: str, timeout: int = 30, restart: bool = False, background: bool = False) -> ToolResult:
+        if background:
+            return self._start_job(command, restart)
+        if self.session is None:
+            return self._run_subprocess(command, timeout)
+
         try:
-            # Use shell=True to support commands with pipes, redirects, etc.
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=os.getcwd()
-            )
+            if restart:
+                self.session.restart()
+
+            previous_cwd = self.session.cwd
+            result = self.session.run(command, timeout=timeout, on_output=self.on_output)
 
             output = result.stdout
             if result.stderr:
                 output += f"\nSTDERR:\n{result.stderr}"
 
+            if result.timed_out:
+                error = f"Command timed out after {timeout} seconds"
+                if result.shell_exited:
+                    error += " (the command ignored interrupts; the shell was restarted)"
+                return ToolResult(success=False, output=output, error=error)
+
+            if result.shell_exited:
+                output += f"\n(shell exited with code {result.returncode}; a new shell will be started)"
+            elif self.session.cwd != previous_cwd:
+                output += f"\n(working directory is now {self.session.cwd})"
+
             if result.returncode != 0:
                 return ToolResult(
                     success=False,
@@ -58,8 +108,91 @@ class BashTool(Tool):
                 )
 
             return ToolResult(success=True, output=output or "Command executed successfully (no output)")
+        except Exception as e:
+            return ToolResult(success=False, output="", error=str(e))
+
+    def _start_job(self, command: str, restart: bool) -> ToolResult:
+        """Start the command as a background job in the shell's directory and environment"""
+        cwd, env = os.getcwd(), None
+        if self.session is not None:
+            if restart:
+                self.session.restart()
+            # Jobs get their own process, but see what the shell has set up so far
+            env = self.session.environment()
+            cwd = self.session.cwd
+
+        try:
+            job = self.jobs.start(command, cwd=cwd, env=env)
+        except (RuntimeError, OSError) as e:
+            return ToolResult(success=False, output="", error=str(e))
+
+        return ToolResult(
+            success=True,
+            output=(f"Started {job.job_id} in {job.cwd}: {command}\n"
+                    f"Use job_status (optionally with wait), job_output and job_cancel with job_id \"{job.job_id}\".")
+        )
+
+    def _run_subprocess(self, command: str, timeout: int) -> ToolResult:
+        """Run the command in a fresh shell (no state is kept between calls)"""
+        try:
+            # Use shell=True to support commands with pipes, redirects, etc.
+            process = subprocess.Popen(
+                command,
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=os.getcwd()
+            )
+
+            # Stream both pipes into bounded captures
+            pieces: "queue.Queue" = queue.Queue(QUEUE_SIZE)
+            for stream, name in ((process.stdout, 'stdout'), (process.stderr, 'stderr')):
+                threading.Thread(target=pump_output, args=(stream, name, pieces), daemon=True).start()
+
+            captures = {'stdout': OutputCapture(), 'stderr': OutputCapture()}
+            open_streams = 2
+            deadline = time.monotonic() + timeout
+
+            while open_streams:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    process.kill()
+                    process.wait()
+                    return ToolResult(success=False, output="", error=f"Command timed out after {timeout} seconds")
+                try:
+                    name, piece = pieces.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if piece is None:
+                    open_streams -= 1
+                    continue
+                captures[name].append(piece)
+                self._forward(name, piece)
+
+            returncode = process.wait()
+
+            output = captures['stdout'].text()
+            stderr = captures['stderr'].text()
+            if stderr:
+                output += f"\nSTDERR:\n{stderr}"
+
+            if returncode != 0:
+                return ToolResult(
+                    success=False,
+                    output=output,
+                    error=f"Command exited with code {returncode}"
+                )
+
+            return ToolResult(success=True, output=output or "Command executed successfully (no output)")
 
-        except subprocess.TimeoutExpired:
-            return ToolResult(success=False, output="", error=f"Command timed out after {timeout} seconds")
         except Exception as e:
             return ToolResult(success=False, output="", error=str(e))
+
+    def _forward(self, name: str, text: str):
+        """Pass a piece of output to the live listener, if any"""
+        if self.on_output is not None:
+            try:
+                self.on_output(name, text)
+            except Exception:
+                pass
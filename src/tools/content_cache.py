@@ -0,0 +1,152 @@
+"""Bounded cache of decoded file contents shared by file tools"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class FileContentCache:
+    """
+    LRU cache of decoded file lines, validated against the file's stat
+
+    Entries are keyed by absolute path and remember the (mtime_ns, size,
+    inode) the content was read with; a lookup whose stat no longer matches
+    re-reads the file, so a hit costs one stat call and never returns stale
+    content. Memory is bounded by max_bytes (the decoded text size of all
+    entries); least recently used entries are evicted first, and files
+    larger than the cap are read but not cached.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, encoding: str = 'utf-8'):
+        """
+        Initialize cache
+
+        Args:
+            max_bytes: Total decoded size of cached files
+            encoding: Text encoding used to decode files
+        """
+        self.max_bytes = max_bytes
+        self.encoding = encoding
+
+        self._lock = threading.Lock()
+        # path -> ((mtime_ns, size, inode), lines, size_in_chars)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int, int], List[str], int]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(stat: os.stat_result) -> Tuple[int, int, int]:
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def get_lines(self, file_path: str) -> List[str]:
+        """
+        Lines of file_path, split on '\n' only and kept with their endings
+
+        '\r' is left untranslated, so line numbers agree with byte-level
+        readers such as LineIndex. The returned list is shared with the
+        cache and must not be modified.
+        Raises OSError/UnicodeDecodeError like reading the file would.
+        """
+        path = os.path.abspath(file_path)
+        key = self._key(os.stat(path))
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with open(path, 'r', encoding=self.encoding, newline='') as f:
+            # Key from the open file: if it changes while being read, the
+            # next lookup sees a newer stat and reloads
+            key = self._key(os.fstat(f.fileno()))
+            content = f.read()
+
+        lines = [line + '\n' for line in content.split('\n')]
+        # The text after the last '\n' has no ending (or is empty)
+        lines[-1] = lines[-1][:-1]
+        if not lines[-1]:
+            lines.pop()
+
+        self._store(path, key, lines)
+        return lines
+
+    def get_text(self, file_path: str) -> str:
+        """Whole content of file_path with universal newlines (like read())"""
+        return "".join(self.get_lines(file_path)).replace('\r\n', '\n').replace('\r', '\n')
+
+    def peek(self, file_path: str) -> Optional[List[str]]:
+        """Cached lines for file_path without validating them (None if not cached)"""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(file_path))
+            return entry[1] if entry else None
+
+    def invalidate(self, file_path: str):
+        """Drop the entry for file_path"""
+        with self._lock:
+            entry = self._entries.pop(os.path.abspath(file_path), None)
+            if entry:
+                self._bytes -= entry[2]
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and memory use"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _store(self, path: str, key: Tuple[int, int, int], lines: List[str]):
+        size = sum(len(line) for line in lines)
+        if size > self.max_bytes:
+            self.invalidate(path)
+            return
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old:
+                self._bytes -= old[2]
+
+            self._entries[path] = (key, lines, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+
+_content_cache: Optional[FileContentCache] = None
+_content_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> FileContentCache:
+    """
+    Process-wide content cache
+
+    Sized by the READ_CACHE_MB env var (default: 64).
+    """
+    global _content_cache
+    with _content_cache_lock:
+        if _content_cache is None:
+            try:
+                max_mb = float(os.getenv('READ_CACHE_MB', '64'))
+            except ValueError:
+                max_mb = 64
+            _content_cache = FileContentCache(max_bytes=int(max_mb * 1024 * 1024))
+        return _content_cache
@@ -1,15 +1,37 @@
 """File operation tools"""
 import os
 import glob as glob_module
-import re
+import heapq
+import itertools
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from .base import Tool, ToolResult
+from .walker import walk_files, glob_files
+from .search import search_files
+from .trigram_index import TrigramIndex
+from .workspace import get_workspace
+from .content_cache import FileContentCache, get_content_cache
+from .line_reader import LargeFileReader
 
 
 class ReadTool(Tool):
     """Read file contents"""
 
+    read_only = True
+
+    # Files above this size are read through mmap instead of the content cache
+    LARGE_FILE_BYTES = 8 * 1024 * 1024
+    # Largest output returned by a single read
+    MAX_OUTPUT_BYTES = 256 * 1024
+
+    def __init__(self, cache: Optional[FileContentCache] = None):
+        """
+        Args:
+            cache: Content cache shared with the other file tools (default: process-wide cache)
+        """
+        self.cache = cache or get_content_cache()
+        self.reader = LargeFileReader()
+
     @property
     def name(self) -> str:
         return "read_file"
@@ -34,44 +56,118 @@ class ReadTool(Tool):
                 "end_line": {
                     "type": "integer",
                     "description": "Optional: Line number to stop reading at (inclusive)"
+                },
+                "tail_lines": {
+                    "type": "integer",
+                    "description": "Optional: Read only the last N lines (e.g., of a log file)"
+                },
+                "byte_offset": {
+                    "type": "integer",
+                    "description": "Optional: Read raw text starting at this byte offset instead of lines"
+                },
+                "byte_length": {
+                    "type": "integer",
+                    "description": "Optional: Number of bytes to read from byte_offset"
                 }
             },
             "required": ["file_path"]
         }
 
-    def execute(self, file_path: str, start_line: int = None, end_line: int = None) -> ToolResult:
+    def execute(self, file_path: str, start_line: int = None, end_line: int = None,
+                tail_lines: int = None, byte_offset: int = None, byte_length: int = None) -> ToolResult:
         try:
             # Convert to absolute path if relative
+            file_path = self.resolve_path(file_path)
             if not os.path.isabs(file_path):
                 file_path = os.path.abspath(file_path)
 
             if not os.path.exists(file_path):
-                return ToolResult(success=False, output="", error=f"File not found: {file_path}")
-
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            if start_line is not None:
-                start_line = max(1, start_line) - 1
+                error = f"File not found: {file_path}"
+                workspace = get_workspace()
+                if workspace:
+                    similar = workspace.find(os.path.basename(file_path))
+                    if similar:
+                        error += f" (did you mean: {', '.join(similar)}?)"
+                return ToolResult(success=False, output="", error=error)
+
+            if byte_offset is not None or byte_length is not None:
+                return self._read_bytes(file_path, byte_offset or 0, byte_length)
+
+            if os.path.getsize(file_path) > self.LARGE_FILE_BYTES:
+                # Seek straight to the range through mmap; memory stays constant
+                numbered, total, truncated = self.reader.read_lines(
+                    file_path, start_line, end_line, tail_lines, max_bytes=self.MAX_OUTPUT_BYTES
+                )
             else:
-                start_line = 0
+                # Served from memory when the file is unchanged since the last read
+                numbered, total, truncated = self._read_cached(file_path, start_line, end_line, tail_lines)
 
-            if end_line is not None:
-                end_line = min(len(lines), end_line)
-            else:
-                end_line = len(lines)
+            # Tails of large files are not numbered (see LargeFileReader.read_lines)
+            output = "\n".join(f"{number:4d} | {line}" if number is not None else f"     | {line}"
+                               for number, line in numbered)
 
-            numbered_lines = [f"{i+1:4d} | {line.rstrip()}" for i, line in enumerate(lines[start_line:end_line], start=start_line)]
-            output = "\n".join(numbered_lines)
+            if truncated and total is None:
+                output += (f"\n... (output limited to {self.MAX_OUTPUT_BYTES // 1024} KB; "
+                           f"showing the last {len(numbered)} lines)")
+            elif truncated:
+                next_line = numbered[-1][0] + 1 if numbered else 1
+                output += (f"\n... (output limited to {self.MAX_OUTPUT_BYTES // 1024} KB of {total} lines; "
+                           f"continue with start_line={next_line})")
 
             return ToolResult(success=True, output=output)
         except Exception as e:
             return ToolResult(success=False, output="", error=str(e))
 
+    def _read_cached(self, file_path: str, start_line: Optional[int], end_line: Optional[int],
+                     tail_lines: Optional[int] = None) -> Tuple[List[Tuple[int, str]], int, bool]:
+        """Read a line range (or the last tail_lines lines) of a small file through the content cache"""
+        lines = self.cache.get_lines(file_path)
+
+        if tail_lines is not None:
+            start_line, end_line = max(0, len(lines) - max(0, tail_lines)), None
+        elif start_line is not None:
+            start_line = max(1, start_line) - 1
+        else:
+            start_line = 0
+
+        if end_line is not None:
+            end_line = min(len(lines), end_line)
+        else:
+            end_line = len(lines)
+
+        numbered = []
+        used = 0
+        for i in range(start_line, end_line):
+            line = lines[i].rstrip()
+            used += len(line) + 1
+            if used > self.MAX_OUTPUT_BYTES and numbered:
+                return numbered, len(lines), True
+            numbered.append((i + 1, line))
+
+        return numbered, len(lines), False
+
+    def _read_bytes(self, file_path: str, byte_offset: int, byte_length: Optional[int]) -> ToolResult:
+        """Read a byte range as text"""
+        if byte_length is None:
+            byte_length = self.MAX_OUTPUT_BYTES
+
+        text, end, size = self.reader.read_bytes(file_path, byte_offset, byte_length, max_bytes=self.MAX_OUTPUT_BYTES)
+
+        if end < size and end < byte_offset + byte_length:
+            text += f"\n... (output limited to {self.MAX_OUTPUT_BYTES // 1024} KB; continue with byte_offset={end})"
+        return ToolResult(success=True, output=text)
+
 
 class WriteTool(Tool):
     """Write content to a file"""
 
+    def __init__(self, cache: Optional[FileContentCache] = None):
+        """
+        Args:
+            cache: Content cache to invalidate after writing (default: process-wide cache)
+        """
+        self.cache = cache or get_content_cache()
+
     @property
     def name(self) -> str:
         return "write_file"
@@ -100,6 +196,7 @@ class WriteTool(Tool):
     def execute(self, file_path: str, content: str) -> ToolResult:
         try:
             # Convert to absolute path if relative
+            file_path = self.resolve_path(file_path)
             if not os.path.isabs(file_path):
                 file_path = os.path.abspath(file_path)
 
@@ -112,6 +209,11 @@ class WriteTool(Tool):
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
 
+            self.cache.invalidate(file_path)
+            workspace = get_workspace()
+            if workspace:
+                workspace.invalidate(file_path)
+
             # Verify file was created
             if not os.path.exists(file_path):
                 return ToolResult(success=False, output="", error=f"File was not created: {file_path}")
@@ -124,6 +226,13 @@ class WriteTool(Tool):
 class EditTool(Tool):
     """Edit file by replacing text"""
 
+    def __init__(self, cache: Optional[FileContentCache] = None):
+        """
+        Args:
+            cache: Content cache to read from and invalidate (default: process-wide cache)
+        """
+        self.cache = cache or get_content_cache()
+
     @property
     def name(self) -> str:
         return "edit_file"
@@ -161,14 +270,14 @@ class EditTool(Tool):
     def execute(self, file_path: str, old_text: str, new_text: str, replace_all: bool = False) -> ToolResult:
         try:
             # Convert to absolute path if relative
+            file_path = self.resolve_path(file_path)
             if not os.path.isabs(file_path):
                 file_path = os.path.abspath(file_path)
 
             if not os.path.exists(file_path):
                 return ToolResult(success=False, output="", error=f"File not found: {file_path}")
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = self.cache.get_text(file_path)
 
             if old_text not in content:
                 return ToolResult(success=False, output="", error="Text to replace not found in file")
@@ -183,6 +292,11 @@ class EditTool(Tool):
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(new_content)
 
+            self.cache.invalidate(file_path)
+            workspace = get_workspace()
+            if workspace:
+                workspace.invalidate(file_path)
+
             return ToolResult(success=True, output=f"Replaced {count} occurrence(s) in {file_path}")
         except Exception as e:
             return ToolResult(success=False, output="", error=str(e))
@@ -191,13 +305,15 @@ class EditTool(Tool):
 class GlobTool(Tool):
     """Find files matching pattern"""
 
+    read_only = True
+
     @property
     def name(self) -> str:
         return "glob"
 
     @property
     def description(self) -> str:
-        return "Find files matching a glob pattern (e.g., '**/*.py', 'src/*.js')"
+        return "Find files matching a glob pattern (e.g., '**/*.py', 'src/*.js'). Respects .gitignore and skips directories like .git and node_modules."
 
     @property
     def parameters(self) -> Dict[str, Any]:
@@ -211,21 +327,63 @@ class GlobTool(Tool):
                 "path": {
                     "type": "string",
                     "description": "Base directory to search in (default: current directory)"
+                },
+                "sort_by": {
+                    "type": "string",
+                    "enum": ["name", "mtime"],
+                    "description": "Sort by path name or by modification time, newest first (default: name)"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of files to return (default: 1000)"
                 }
             },
             "required": ["pattern"]
         }
 
-    def execute(self, pattern: str, path: str = ".") -> ToolResult:
+    def execute(self, pattern: str, path: str = ".", sort_by: str = "name",
+                max_results: int = 1000) -> ToolResult:
         try:
-            os.chdir(path)
-            matches = glob_module.glob(pattern, recursive=True)
-            matches = sorted([str(Path(m)) for m in matches if os.path.isfile(m)])
+            path = self.resolve_path(path)
+            if not os.path.isdir(path):
+                return ToolResult(success=False, output="", error=f"Directory not found: {path}")
+
+            def mtime(match):
+                try:
+                    return match[0].stat().st_mtime if match[0] else os.stat(match[1]).st_mtime
+                except OSError:
+                    return 0.0
+
+            if os.path.isabs(pattern) or '..' in pattern.replace('\\', '/').split('/'):
+                # Outside the base directory: no pruning possible, use glob
+                found = (
+                    (None, m, os.path.relpath(m, path))
+                    for m in glob_module.glob(os.path.join(path, pattern), recursive=True)
+                    if os.path.isfile(m)
+                )
+            else:
+                found = (
+                    (entry, entry.path, relative)
+                    for entry, relative in glob_files(path, pattern, source=get_workspace())
+                )
+
+            if sort_by == "mtime":
+                matches = list(found)
+                truncated = len(matches) > max_results
+                matches = heapq.nlargest(max_results, matches, key=mtime)
+                names = [str(Path(relative)) for _, _, relative in matches]
+            else:
+                # Stream: stop walking once enough files are found
+                matches = list(itertools.islice(found, max_results + 1))
+                truncated = len(matches) > max_results
+                names = sorted(str(Path(relative)) for _, _, relative in matches[:max_results])
 
-            if not matches:
+            if not names:
                 return ToolResult(success=True, output="No files found matching pattern")
 
-            output = "\n".join(matches)
+            output = "\n".join(names)
+            if truncated:
+                output += f"\n... (stopped after {max_results} files; narrow the pattern or path)"
             return ToolResult(success=True, output=output)
         except Exception as e:
             return ToolResult(success=False, output="", error=str(e))
@@ -234,13 +392,33 @@ class GlobTool(Tool):
 class GrepTool(Tool):
     """Search for pattern in files"""
 
+    read_only = True
+
+    def __init__(self, use_index: Optional[bool] = None):
+        """
+        Args:
+            use_index: Narrow searches with a persistent trigram index of the
+                working directory (default: GREP_INDEX env var, off)
+        """
+        if use_index is None:
+            use_index = os.getenv('GREP_INDEX', 'off').lower() in ('1', 'on', 'true', 'yes')
+        self.use_index = use_index
+        self._indexes: Dict[str, TrigramIndex] = {}
+
+    def _get_index(self) -> TrigramIndex:
+        """Trigram index for the current working directory (created lazily)"""
+        root = os.getcwd()
+        if root not in self._indexes:
+            self._indexes[root] = TrigramIndex(root, source=get_workspace(root))
+        return self._indexes[root]
+
     @property
     def name(self) -> str:
         return "grep"
 
     @property
     def description(self) -> str:
-        return "Search for a regex pattern in files. Can filter by file type."
+        return "Search for a regex pattern in files. Can filter by file type. Skips binaries and directories like .git and node_modules."
 
     @property
     def parameters(self) -> Dict[str, Any]:
@@ -268,6 +446,11 @@ class GrepTool(Tool):
                     "type": "boolean",
                     "description": "If true, show line numbers",
                     "default": True
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of matching lines to return (default: 1000)",
+                    "default": 1000
                 }
             },
             "required": ["pattern"]
@@ -279,38 +462,38 @@ class GrepTool(Tool):
         path: str = ".",
         file_pattern: str = "*",
         case_insensitive: bool = False,
-        show_line_numbers: bool = True
+        show_line_numbers: bool = True,
+        max_results: int = 1000
     ) -> ToolResult:
         try:
-            flags = re.IGNORECASE if case_insensitive else 0
-            regex = re.compile(pattern, flags)
-
-            results = []
-
+            path = self.resolve_path(path)
             # Find files to search
             if os.path.isfile(path):
                 files = [path]
             else:
-                glob_pattern = os.path.join(path, "**", file_pattern)
-                files = glob_module.glob(glob_pattern, recursive=True)
-                files = [f for f in files if os.path.isfile(f)]
-
-            for file_path in files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        for line_num, line in enumerate(f, 1):
-                            if regex.search(line):
-                                if show_line_numbers:
-                                    results.append(f"{file_path}:{line_num}: {line.rstrip()}")
-                                else:
-                                    results.append(f"{file_path}: {line.rstrip()}")
-                except Exception:
-                    continue
+                # Hidden files (.github, .env.example, ...) are searched; ignored
+                # directories and .gitignore rules still prune the walk
+                files = walk_files(path, file_pattern, include_hidden=True, source=get_workspace())
+                if self.use_index:
+                    index = self._get_index()
+                    # The index covers the working directory; elsewhere, scan everything
+                    if index.contains(path):
+                        files = index.filter_files(files, pattern)
+
+            results, truncated = search_files(
+                files,
+                pattern,
+                ignore_case=case_insensitive,
+                show_line_numbers=show_line_numbers,
+                max_results=max_results
+            )
 
             if not results:
                 return ToolResult(success=True, output="No matches found")
 
             output = "\n".join(results)
+            if truncated:
+                output += f"\n... (stopped after {max_results} matches; narrow the pattern or path)"
             return ToolResult(success=True, output=output)
         except Exception as e:
             return ToolResult(success=False, output="", error=str(e))
@@ -0,0 +1,364 @@
+"""Background jobs for long-running commands and the tools that manage them"""
+import atexit
+import codecs
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from .base import Tool, ToolResult
+
+
+class Job:
+    """One background command; its combined stdout/stderr goes to a log file"""
+
+    def __init__(self, job_id: str, command: str, cwd: str, log_path: str, process: subprocess.Popen):
+        self.job_id = job_id
+        self.command = command
+        self.cwd = cwd
+        self.log_path = log_path
+        self.process = process
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.cancelled = False
+
+        # Position up to which job_output has returned the log
+        self.read_offset = 0
+        self._read_lock = threading.Lock()
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    @property
+    def running(self) -> bool:
+        if self.finished is None and self.process.poll() is not None:
+            self.finished = time.time()
+        return self.finished is None
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self.process.poll()
+
+    def status(self) -> str:
+        """Short state description, e.g. 'running' or 'exited with code 1'"""
+        if self.running:
+            return "running"
+        if self.cancelled:
+            return "cancelled"
+        return f"exited with code {self.returncode}"
+
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    def output_size(self) -> int:
+        try:
+            return os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+
+    def read_new(self, max_bytes: int) -> str:
+        """Output written since the previous call (at most max_bytes of it)"""
+        with self._read_lock:
+            try:
+                with open(self.log_path, 'rb') as f:
+                    f.seek(self.read_offset)
+                    data = f.read(max_bytes)
+            except OSError:
+                return ""
+            self.read_offset += len(data)
+            # Keeps a character split across two reads intact
+            return self._decoder.decode(data)
+
+
+class JobManager:
+    """
+    Runs commands in the background and keeps track of them by job id
+
+    Each job runs in its own process group (on POSIX) with stdin from
+    /dev/null and its output appended to a log file, so a job can print any
+    amount without holding memory here, and its output can be fetched
+    incrementally while it runs. Finished jobs are kept (oldest dropped
+    first, log files deleted) until max_finished is exceeded; running jobs
+    are killed when the process exits.
+    """
+
+    # Seconds between SIGTERM and SIGKILL when cancelling
+    CANCEL_GRACE = 3.0
+
+    def __init__(self, max_running: int = 8, max_finished: int = 32):
+        """
+        Args:
+            max_running: Number of jobs that may run at the same time
+            max_finished: Number of finished jobs to remember
+        """
+        self.max_running = max_running
+        self.max_finished = max_finished
+
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._counter = 0
+        self._log_dir: Optional[str] = None
+        atexit.register(self.close)
+
+    def start(self, command: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> Job:
+        """
+        Start a command in the background
+
+        Raises RuntimeError when max_running jobs are already running.
+        """
+        with self._lock:
+            if sum(1 for job in self._jobs.values() if job.running) >= self.max_running:
+                raise RuntimeError(f"{self.max_running} background jobs are already running; "
+                                   f"wait for one to finish or cancel it")
+
+            if self._log_dir is None:
+                self._log_dir = tempfile.mkdtemp(prefix='termicode-jobs-')
+            self._counter += 1
+            job_id = f"job-{self._counter}"
+            log_path = os.path.join(self._log_dir, f"{job_id}.log")
+            cwd = cwd if cwd and os.path.isdir(cwd) else os.getcwd()
+
+            with open(log_path, 'wb') as log:
+                if os.name == 'posix':
+                    process = subprocess.Popen(
+                        command, shell=True, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                        cwd=cwd, env=env, start_new_session=True
+                    )
+                else:
+                    process = subprocess.Popen(
+                        command, shell=True, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                        cwd=cwd, env=env, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP
+                    )
+
+            job = Job(job_id, command, cwd, log_path, process)
+            self._jobs[job_id] = job
+            self._prune()
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """Known jobs, oldest first"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def wait(self, job: Job, timeout: float) -> bool:
+        """Wait up to timeout seconds for a job to finish; True if it has"""
+        try:
+            job.process.wait(timeout=max(0, timeout))
+        except subprocess.TimeoutExpired:
+            pass
+        return not job.running
+
+    def cancel(self, job: Job) -> bool:
+        """Stop a job and everything it started; False if it had already finished"""
+        if not job.running:
+            return False
+        job.cancelled = True
+
+        self._signal(job, signal.SIGTERM if os.name == 'posix' else None)
+        if not self.wait(job, self.CANCEL_GRACE):
+            self._signal(job, signal.SIGKILL if os.name == 'posix' else None)
+            self.wait(job, self.CANCEL_GRACE)
+        return True
+
+    def close(self):
+        """Kill running jobs and delete all logs"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for job in jobs:
+            if job.running:
+                job.cancelled = True
+                self._signal(job, signal.SIGKILL if os.name == 'posix' else None)
+        if self._log_dir is not None:
+            shutil.rmtree(self._log_dir, ignore_errors=True)
+            self._log_dir = None
+
+    @staticmethod
+    def _signal(job: Job, sig: Optional[int]):
+        try:
+            if sig is None:
+                # Windows: terminate the whole process tree
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(job.process.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            else:
+                os.killpg(job.process.pid, sig)
+        except OSError:
+            pass
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_finished (lock held)"""
+        finished = [job for job in self._jobs.values() if not job.running]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.job_id]
+            try:
+                os.remove(job.log_path)
+            except OSError:
+                pass
+
+
+def format_size(size: int) -> str:
+    return f"{size} bytes" if size < 1024 else f"{size // 1024} KB"
+
+
+def describe_job(job: Job) -> str:
+    """One-line summary of a job"""
+    return (f"{job.job_id}: {job.status()} after {job.elapsed():.1f}s, "
+            f"{format_size(job.output_size())} of output ({job.command})")
+
+
+class JobStatusTool(Tool):
+    """Report the state of background jobs"""
+
+    read_only = True
+
+    # Longest a single call may wait for a job to finish
+    MAX_WAIT = 300
+
+    def __init__(self, manager: JobManager):
+        self.manager = manager
+
+    @property
+    def name(self) -> str:
+        return "job_status"
+
+    @property
+    def description(self) -> str:
+        return ("Check on background jobs started with bash background=true. "
+                "Without a job_id, lists all jobs. Can wait for a job to finish.")
+
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Optional: Job to check (e.g., 'job-1'; default: list all jobs)"
+                },
+                "wait": {
+                    "type": "integer",
+                    "description": f"Optional: Seconds to wait for the job to finish (default: 0, max: {self.MAX_WAIT})"
+                }
+            },
+            "required": []
+        }
+
+    def execute(self, job_id: str = None, wait: int = 0) -> ToolResult:
+        if not job_id:
+            jobs = self.manager.jobs()
+            if not jobs:
+                return ToolResult(success=True, output="No background jobs")
+            return ToolResult(success=True, output="\n".join(describe_job(job) for job in jobs))
+
+        job = self.manager.get(job_id)
+        if job is None:
+            return ToolResult(success=False, output="", error=f"Unknown job: {job_id}")
+
+        if wait:
+            self.manager.wait(job, min(wait, self.MAX_WAIT))
+
+        output = describe_job(job)
+        unread = job.output_size() - job.read_offset
+        if unread > 0:
+            output += f"\n{format_size(unread)} of new output; use job_output to read it"
+        return ToolResult(success=True, output=output)
+
+
+class JobOutputTool(Tool):
+    """Fetch a background job's output incrementally"""
+
+    read_only = True
+
+    # Largest piece of output returned by a single call (within the bash output budget)
+    MAX_BYTES = 6000
+
+    def __init__(self, manager: JobManager):
+        self.manager = manager
+
+    @property
+    def name(self) -> str:
+        return "job_output"
+
+    @property
+    def description(self) -> str:
+        return ("Read the output of a background job. Each call returns the output written since the "
+                "previous call, so repeated calls follow a running job.")
+
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Job to read (e.g., 'job-1')"
+                }
+            },
+            "required": ["job_id"]
+        }
+
+    def execute(self, job_id: str) -> ToolResult:
+        job = self.manager.get(job_id)
+        if job is None:
+            return ToolResult(success=False, output="", error=f"Unknown job: {job_id}")
+
+        # Status first: output read after a finished status is then complete
+        status = job.status()
+        text = job.read_new(self.MAX_BYTES)
+
+        remaining = job.output_size() - job.read_offset
+        if remaining > 0:
+            note = f"({format_size(remaining)} more; call job_output again to continue)"
+        elif status == "running":
+            note = "(job still running; call job_output again for new output)"
+        else:
+            note = f"(job {status}; no more output)"
+
+        if not text:
+            return ToolResult(success=True, output=f"No new output {note}")
+        if not text.endswith('\n'):
+            text += '\n'
+        return ToolResult(success=True, output=f"{text}{note}")
+
+
+class JobCancelTool(Tool):
+    """Stop a background job"""
+
+    def __init__(self, manager: JobManager):
+        self.manager = manager
+
+    @property
+    def name(self) -> str:
+        return "job_cancel"
+
+    @property
+    def description(self) -> str:
+        return "Cancel a running background job and the processes it started."
+
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Job to cancel (e.g., 'job-1')"
+                }
+            },
+            "required": ["job_id"]
+        }
+
+    def execute(self, job_id: str) -> ToolResult:
+        job = self.manager.get(job_id)
+        if job is None:
+            return ToolResult(success=False, output="", error=f"Unknown job: {job_id}")
+
+        if not self.manager.cancel(job):
+            return ToolResult(success=True, output=f"{job_id} is not running ({job.status()})")
+        return ToolResult(success=True, output=f"Cancelled {describe_job(job)}")
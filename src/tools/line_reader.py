@@ -0,0 +1,245 @@
+"""Line-range reads of large files through mmap and a sparse line index"""
+import bisect
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, List, Optional, Tuple
+
+
+class LineIndex:
+    """
+    Sparse newline index of one file
+
+    Stores (byte offset, newlines before it) checkpoints at a fixed
+    interval, at most MAX_CHECKPOINTS of them, so memory stays constant
+    regardless of file size. Finding the start of a line bisects the
+    checkpoints and scans forward at most one interval.
+    """
+
+    MAX_CHECKPOINTS = 4096
+    CHUNK = 1024 * 1024       # bytes counted per step while indexing
+    SKIP_CHUNK = 64 * 1024    # bytes skipped per step while seeking
+
+    def __init__(self, f: BinaryIO, size: int, key: Tuple[int, int, int]):
+        self.size = size
+        self.key = key
+
+        chunks_per_checkpoint = max(1, -(-size // (self.MAX_CHECKPOINTS * self.CHUNK)))
+        interval = chunks_per_checkpoint * self.CHUNK
+
+        self.offsets: List[int] = [0]
+        self.newlines: List[int] = [0]
+        total = 0
+
+        # Counted with plain reads rather than through the mapping, so the
+        # scan does not leave the whole file resident in this process
+        last = b''
+        f.seek(0)
+        for start in range(0, size, self.CHUNK):
+            chunk = f.read(min(self.CHUNK, size - start))
+            if not chunk:
+                break
+            total += chunk.count(b'\n')
+            last = chunk[-1:]
+            end = start + len(chunk)
+            if end % interval == 0 and end < size:
+                self.offsets.append(end)
+                self.newlines.append(total)
+
+        self.newline_count = total
+        self.line_count = total + (1 if size and last != b'\n' else 0)
+
+    def line_start(self, mm: mmap.mmap, line: int) -> int:
+        """Byte offset where 0-based line starts (size if past the end)"""
+        if line <= 0:
+            return 0
+        if line > self.newline_count:
+            return self.size
+
+        # Last checkpoint with fewer than `line` newlines before it
+        i = bisect.bisect_left(self.newlines, line) - 1
+        pos, seen = self.offsets[i], self.newlines[i]
+
+        # Skip whole blocks, then walk newline by newline
+        while True:
+            end = min(pos + self.SKIP_CHUNK, self.size)
+            count = mm[pos:end].count(b'\n')
+            if seen + count >= line or end >= self.size:
+                break
+            pos, seen = end, seen + count
+
+        while seen < line:
+            pos = mm.find(b'\n', pos) + 1
+            seen += 1
+        return pos
+
+
+class LargeFileReader:
+    """
+    Reads line ranges, tails and byte ranges of files without loading them
+
+    Files are memory-mapped per read; line indexes are cached per file and
+    reused while the file's (mtime_ns, size, inode) is unchanged.
+    """
+
+    def __init__(self, max_indexes: int = 16):
+        """
+        Args:
+            max_indexes: Number of per-file line indexes to keep
+        """
+        self.max_indexes = max_indexes
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+
+    def _cached_index(self, path: str, stat: os.stat_result) -> Optional[LineIndex]:
+        """Line index of path if one is cached for its current (mtime_ns, size, inode)"""
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            index = self._indexes.get(path)
+            if index is not None and index.key == key:
+                self._indexes.move_to_end(path)
+                return index
+        return None
+
+    def _index(self, path: str, f: BinaryIO, stat: os.stat_result) -> LineIndex:
+        index = self._cached_index(path, stat)
+        if index is not None:
+            return index
+
+        index = LineIndex(f, stat.st_size, (stat.st_mtime_ns, stat.st_size, stat.st_ino))
+
+        with self._lock:
+            self._indexes[path] = index
+            self._indexes.move_to_end(path)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def read_lines(
+        self,
+        file_path: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        tail_lines: Optional[int] = None,
+        max_bytes: int = 256 * 1024
+    ) -> Tuple[List[Tuple[Optional[int], str]], Optional[int], bool]:
+        """
+        Read a range of lines
+
+        Args:
+            file_path: File to read
+            start_line: First line, 1-indexed (default: 1)
+            end_line: Last line, inclusive (default: end of file)
+            tail_lines: Read the last N lines instead of start_line/end_line
+            max_bytes: Stop once this many bytes have been read
+
+        Returns:
+            ([(line_number, text)], total_lines, truncated)
+
+        A tail is read backward from the end of the file. Unless a line
+        index for the file is already cached, its line numbers and the
+        total are None: counting them would mean reading the whole file,
+        which a growing log would repeat on every tail.
+        """
+        path = os.path.abspath(file_path)
+
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                return [], 0, False
+
+            if tail_lines is not None:
+                index = self._cached_index(path, stat)
+            else:
+                index = self._index(path, f, stat)
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if index is None:
+                    return self._tail(mm, stat.st_size, tail_lines, max_bytes)
+
+                total = index.line_count
+
+                if tail_lines is not None:
+                    first = max(0, total - max(0, tail_lines))
+                    last = total
+                else:
+                    first = max(1, start_line or 1) - 1
+                    last = min(total, end_line) if end_line is not None else total
+
+                lines: List[Tuple[int, str]] = []
+                pos = index.line_start(mm, first)
+                used = 0
+                truncated = False
+
+                for number in range(first, last):
+                    end = mm.find(b'\n', pos)
+                    end = index.size if end == -1 else end + 1
+                    length = end - pos
+                    if used + length > max_bytes and lines:
+                        truncated = True
+                        break
+
+                    # A single line longer than max_bytes is cut
+                    raw = mm[pos:pos + min(length, max_bytes)]
+                    used += len(raw)
+                    lines.append((number + 1, raw.decode('utf-8', errors='replace').rstrip()))
+                    pos = end
+                    if length > max_bytes:
+                        truncated = True
+                        break
+
+                return lines, total, truncated
+
+    @staticmethod
+    def _tail(mm: mmap.mmap, size: int, count: int,
+              max_bytes: int) -> Tuple[List[Tuple[Optional[int], str]], None, bool]:
+        """Last count lines (unnumbered), found by scanning back from the end"""
+        if count <= 0:
+            return [], None, False
+
+        # A final '\n' ends the last line rather than starting another
+        search_end = size - 1 if mm[size - 1:size] == b'\n' else size
+        start = size
+        found = 0
+        truncated = False
+        while found < count:
+            newline = mm.rfind(b'\n', 0, search_end)
+            line_start = newline + 1
+            if size - line_start > max_bytes and found:
+                truncated = True
+                break
+            start = line_start
+            found += 1
+            if newline == -1:
+                break
+            search_end = newline
+
+        data = mm[start:size]
+        if len(data) > max_bytes:
+            # A single line longer than max_bytes is cut
+            data = data[:max_bytes]
+            truncated = True
+        elif data.endswith(b'\n'):
+            data = data[:-1]
+
+        return ([(None, raw.decode('utf-8', errors='replace').rstrip()) for raw in data.split(b'\n')],
+                None, truncated)
+
+    def read_bytes(self, file_path: str, offset: int, length: int,
+                   max_bytes: int = 256 * 1024) -> Tuple[str, int, int]:
+        """
+        Read a byte range, decoded as UTF-8 (invalid sequences replaced)
+
+        Returns:
+            (text, end_offset, file_size)
+        """
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            offset = max(0, offset)
+            if offset >= size or length <= 0:
+                return "", min(offset, size), size
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[offset:offset + min(length, max_bytes)]
+            return data.decode('utf-8', errors='replace'), offset + len(data), size
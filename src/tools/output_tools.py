@@ -0,0 +1,131 @@
+"""Side store for full tool outputs and the tool that pages through it"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from .base import Tool, ToolResult
+
+
+class OutputStore:
+    """
+    Full tool outputs kept out of the conversation, addressed by handle
+
+    Bounded by entry count and total size; the oldest outputs are dropped
+    first.
+    """
+
+    def __init__(self, max_entries: int = 50, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Number of outputs to keep
+            max_bytes: Total size of kept outputs (characters)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._outputs: "OrderedDict[str, Tuple[str, List[str]]]" = OrderedDict()  # handle -> (tool, lines)
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._counter = 0
+
+    def put(self, tool_name: str, text: str) -> str:
+        """Store an output and return its handle"""
+        lines = text.splitlines()
+        size = len(text)
+
+        with self._lock:
+            self._counter += 1
+            handle = f"out-{self._counter}"
+            self._outputs[handle] = (tool_name, lines)
+            self._sizes[handle] = size
+            self._bytes += size
+
+            while self._outputs and (len(self._outputs) > self.max_entries or self._bytes > self.max_bytes):
+                old, _ = self._outputs.popitem(last=False)
+                self._bytes -= self._sizes.pop(old)
+
+        return handle
+
+    def get_lines(self, handle: str) -> Optional[List[str]]:
+        """Lines of a stored output (None if unknown or evicted)"""
+        with self._lock:
+            entry = self._outputs.get(handle)
+            return entry[1] if entry else None
+
+    def clear(self):
+        """Drop every stored output"""
+        with self._lock:
+            self._outputs.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+
+class ReadOutputTool(Tool):
+    """Page through a tool output that was shortened for the conversation"""
+
+    read_only = True
+
+    # Largest page returned by a single call
+    MAX_PAGE_CHARS = 8000
+
+    def __init__(self, store: OutputStore):
+        self.store = store
+
+    @property
+    def name(self) -> str:
+        return "read_output"
+
+    @property
+    def description(self) -> str:
+        return "Read lines of a tool output that was shortened, using the handle given in its summary (e.g., 'out-3')."
+
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "handle": {
+                    "type": "string",
+                    "description": "Handle of the stored output (e.g., 'out-3')"
+                },
+                "start_line": {
+                    "type": "integer",
+                    "description": "Optional: Line number to start reading from (1-indexed, default: 1)"
+                },
+                "num_lines": {
+                    "type": "integer",
+                    "description": "Optional: Number of lines to read (default: 200)"
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": "Optional: Only return lines containing this text"
+                }
+            },
+            "required": ["handle"]
+        }
+
+    def execute(self, handle: str, start_line: int = 1, num_lines: int = 200, pattern: str = None) -> ToolResult:
+        lines = self.store.get_lines(handle)
+        if lines is None:
+            return ToolResult(success=False, output="", error=f"Unknown or expired output handle: {handle}")
+
+        start = max(1, start_line or 1) - 1
+        selected = [(i + 1, line) for i, line in enumerate(lines) if i >= start and (not pattern or pattern in line)]
+
+        page = []
+        used = 0
+        last_number = 0
+        for number, line in selected[:max(1, num_lines)]:
+            used += len(line) + 8
+            if used > self.MAX_PAGE_CHARS and page:
+                break
+            page.append(f"{number:4d} | {line}")
+            last_number = number
+
+        if not page:
+            return ToolResult(success=True, output=f"No lines to show ({len(lines)} lines in {handle})")
+
+        output = "\n".join(page)
+        if len(page) < len(selected):
+            output += f"\n... ({len(lines)} lines in {handle}; continue with start_line={last_number + 1})"
+        return ToolResult(success=True, output=output)
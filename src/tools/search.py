@@ -0,0 +1,179 @@
+"""Parallel file content search used by GrepTool"""
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+
+# Bytes sniffed to decide whether a file is binary
+BINARY_SNIFF_BYTES = 8192
+
+
+def is_binary_file(file_path: str) -> bool:
+    """Treat files with a NUL byte near the start as binary"""
+    try:
+        with open(file_path, 'rb') as f:
+            return b'\0' in f.read(BINARY_SNIFF_BYTES)
+    except OSError:
+        return True
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Literal substrings every match of pattern must contain
+
+    Only plain top-level literal runs are considered (no alternation at the
+    top level), which is enough for the usual identifier/phrase searches.
+    Returns an empty list when there are none.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError):
+        return []
+
+    if parsed.state.flags & re.IGNORECASE:
+        # Inline (?i): literals would need case folding
+        return []
+
+    literals = []
+    run: List[str] = []
+    for op, arg in parsed:
+        if op is sre_constants.LITERAL:
+            run.append(chr(arg))
+            continue
+        if op is sre_constants.BRANCH:
+            return []
+        if run:
+            literals.append("".join(run))
+        run = []
+    if run:
+        literals.append("".join(run))
+
+    return literals
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """Longest literal substring every match of pattern must contain (or None)"""
+    literals = required_literals(pattern)
+    return max(literals, key=len) if literals else None
+
+
+def _scan_file(
+    file_path: str,
+    regex: "re.Pattern",
+    literal: Optional[str],
+    ignore_case: bool,
+    show_line_numbers: bool,
+    limit: int
+) -> List[str]:
+    """Search one file; returns formatted matching lines (at most limit)"""
+    if is_binary_file(file_path):
+        return []
+
+    try:
+        # Lines are numbered by '\n' only, like read_file and edit_file
+        with open(file_path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+            content = f.read()
+    except OSError:
+        return []
+
+    # Literal fast path: skip files (and lines) that cannot match.
+    # Case-insensitive comparison via lower() is only exact for ASCII.
+    needle = None
+    if literal:
+        if not ignore_case:
+            needle = literal
+        elif content.isascii() and literal.isascii():
+            needle = literal.lower()
+            content_for_literal = content.lower()
+        if needle is not None:
+            haystack = content if not ignore_case else content_for_literal
+            if needle not in haystack:
+                return []
+
+    lines = content.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+
+    results = []
+    for line_num, line in enumerate(lines, 1):
+        if line.endswith('\r'):
+            line = line[:-1]
+        if needle is not None:
+            candidate = line.lower() if ignore_case else line
+            if needle not in candidate:
+                continue
+        if regex.search(line):
+            if show_line_numbers:
+                results.append(f"{file_path}:{line_num}: {line.rstrip()}")
+            else:
+                results.append(f"{file_path}: {line.rstrip()}")
+            if len(results) >= limit:
+                break
+
+    return results
+
+
+def search_files(
+    files: Iterable[str],
+    pattern: str,
+    ignore_case: bool = False,
+    show_line_numbers: bool = True,
+    max_results: int = 1000,
+    max_workers: Optional[int] = None
+) -> Tuple[List[str], bool]:
+    """
+    Search files for a regex, scanning them on a worker pool
+
+    Results keep the order of files. Stops submitting work once max_results
+    matching lines are collected.
+
+    Returns:
+        (matching lines, truncated) where truncated means max_results was hit
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    regex = re.compile(pattern, flags)
+    literal = required_literal(pattern)
+
+    max_workers = max_workers or min(16, (os.cpu_count() or 4) * 2)
+    in_flight = max_workers * 4
+
+    results: List[str] = []
+    truncated = False
+    files_iter = iter(files)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="termicode-grep") as pool:
+        pending = deque()
+
+        def fill():
+            while len(pending) < in_flight:
+                file_path = next(files_iter, None)
+                if file_path is None:
+                    return
+                pending.append(pool.submit(
+                    _scan_file, file_path, regex, literal, ignore_case,
+                    show_line_numbers, max_results
+                ))
+
+        fill()
+        while pending:
+            future = pending.popleft()
+            results.extend(future.result())
+
+            if len(results) >= max_results:
+                truncated = True
+                results = results[:max_results]
+                for remaining in pending:
+                    remaining.cancel()
+                break
+
+            fill()
+
+    return results, truncated
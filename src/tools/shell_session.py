@@ -0,0 +1,365 @@
+"""Long-lived shell process shared by successive bash tool calls"""
+import codecs
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+# Receives (stream name, text) for each piece of output as it arrives
+OutputListener = Callable[[str, str], None]
+
+
+# Most bytes read from a pipe at once
+READ_CHUNK = 64 * 1024
+# Pieces buffered between a pipe reader and its consumer (backpressure beyond that)
+QUEUE_SIZE = 256
+
+
+class OutputCapture:
+    """
+    Bounded capture of a command's output: a fixed head plus a ring buffer tail
+
+    Memory stays flat no matter how much a command prints; the middle of
+    long outputs is dropped and replaced by a note saying how much.
+    """
+
+    def __init__(self, head_bytes: int = 16 * 1024, tail_bytes: int = 48 * 1024):
+        """
+        Args:
+            head_bytes: Characters kept from the start of the output
+            tail_bytes: Characters kept from the end of the output
+        """
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+
+        self._head: List[str] = []
+        self._head_size = 0
+        self._tail: Deque[str] = deque()
+        self._tail_size = 0
+
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+        self.dropped_lines = 0
+
+    def append(self, text: str):
+        """Add a piece of output"""
+        self.total_bytes += len(text)
+
+        room = self.head_bytes - self._head_size
+        if room > 0:
+            self._head.append(text[:room])
+            self._head_size += min(room, len(text))
+            text = text[room:]
+            if not text:
+                return
+
+        self._tail.append(text)
+        self._tail_size += len(text)
+        while self._tail_size > self.tail_bytes:
+            excess = self._tail_size - self.tail_bytes
+            first = self._tail[0]
+            if len(first) <= excess:
+                dropped = self._tail.popleft()
+            else:
+                dropped, self._tail[0] = first[:excess], first[excess:]
+            self._tail_size -= len(dropped)
+            self.dropped_bytes += len(dropped)
+            self.dropped_lines += dropped.count('\n')
+
+    def text(self) -> str:
+        """Captured output, with a note where the middle was dropped"""
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if not self.dropped_bytes:
+            return head + tail
+
+        if head and not head.endswith('\n'):
+            head += '\n'
+        return (f"{head}[... {self.dropped_lines} lines ({self.dropped_bytes // 1024} KB) of output "
+                f"not kept; {self.total_bytes // 1024} KB in total ...]\n{tail}")
+
+
+def pump_output(stream, name: str, output: "queue.Queue"):
+    """Forward decoded pieces of a pipe to a queue as (name, text), then (name, None) at EOF"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    try:
+        # read1 returns whatever is available, so output arrives while it is produced
+        for raw in iter(lambda: stream.read1(READ_CHUNK), b''):
+            text = decoder.decode(raw)
+            if text:
+                output.put((name, text))
+        text = decoder.decode(b'', final=True)
+        if text:
+            output.put((name, text))
+    except (OSError, ValueError):
+        pass
+    output.put((name, None))
+
+
+@dataclass
+class ShellOutput:
+    """Result of one command run in a shell session"""
+    stdout: str
+    stderr: str
+    returncode: Optional[int]
+    timed_out: bool = False
+    shell_exited: bool = False
+
+
+class ShellSession:
+    """
+    A shell that stays alive between commands (POSIX only)
+
+    Commands are written to the shell's stdin wrapped in `eval` (so syntax
+    errors cannot desynchronize the session) with stdin redirected from
+    /dev/null, followed by a unique sentinel carrying the exit code and
+    working directory on stdout and stderr. cd, exported variables and
+    activated virtualenvs therefore persist across calls.
+
+    The shell runs in its own process group and traps SIGINT, so a timed
+    out command is interrupted with SIGINT while the shell itself survives.
+    A command that ignores SIGINT gets the whole group killed; the session
+    then restarts on the next command.
+    """
+
+    # Seconds to keep interrupting a timed out command before killing the shell
+    INTERRUPT_GRACE = 2.0
+
+    def __init__(self, shell: Optional[str] = None, cwd: Optional[str] = None):
+        """
+        Args:
+            shell: Shell executable (default: bash if available, else /bin/sh)
+            cwd: Starting directory (default: current directory)
+        """
+        self.shell = shell or shutil.which('bash') or '/bin/sh'
+        self.cwd = cwd or os.getcwd()
+
+        self._process: Optional[subprocess.Popen] = None
+        self._output: "queue.Queue" = queue.Queue(QUEUE_SIZE)
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """Start the shell process"""
+        args = [self.shell]
+        if os.path.basename(self.shell) == 'bash':
+            args += ['--noprofile', '--norc']
+
+        self._output = queue.Queue(QUEUE_SIZE)
+        self._process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.cwd if os.path.isdir(self.cwd) else None,
+            start_new_session=True
+        )
+
+        for stream, name in ((self._process.stdout, 'stdout'), (self._process.stderr, 'stderr')):
+            threading.Thread(target=pump_output, args=(stream, name, self._output), daemon=True).start()
+
+        # Interrupts go to the command; the shell runs this no-op trap and continues
+        self._write("trap : INT\n")
+
+    def close(self):
+        """Stop the shell and everything it started"""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        for stream in (process.stdin, process.stdout, process.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+        # Unblock pipe readers waiting on a full queue so they can exit
+        try:
+            while True:
+                self._output.get_nowait()
+        except queue.Empty:
+            pass
+
+    def restart(self):
+        """Start a fresh shell (loses cd and variables, keeps the last directory)"""
+        with self._lock:
+            self.close()
+            self.start()
+
+    def run(self, command: str, timeout: float = 30, on_output: Optional[OutputListener] = None) -> ShellOutput:
+        """
+        Run one command and wait for it (or until timeout)
+
+        Output is kept in bounded captures; on_output, if given, sees each
+        piece of output as it arrives.
+        """
+        with self._lock:
+            if not self.alive:
+                self.close()
+                self.start()
+
+            sentinel = f"__TERMICODE_{uuid.uuid4().hex}__"
+            quoted = "'" + command.replace("'", "'\\''") + "'"
+            script = (
+                f"eval {quoted} < /dev/null\n"
+                f"__termicode_rc=$?\n"
+                f"printf '\\n%s:%d:%s\\n' '{sentinel}' \"$__termicode_rc\" \"$PWD\"\n"
+                f"printf '\\n%s\\n' '{sentinel}' >&2\n"
+            )
+
+            try:
+                self._write(script)
+            except (BrokenPipeError, OSError):
+                # Shell died since the last command
+                self.close()
+                self.start()
+                self._write(script)
+
+            return self._collect(sentinel, timeout, on_output)
+
+    def environment(self, timeout: float = 5) -> Optional[Dict[str, str]]:
+        """Exported variables of the shell as they are now (None if they cannot be read)"""
+        fd, path = tempfile.mkstemp(prefix='termicode-env-')
+        os.close(fd)
+        try:
+            result = self.run(f"env -0 > '{path}'", timeout=timeout)
+            if result.returncode != 0:
+                return None
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        env = {}
+        for item in data.decode('utf-8', errors='replace').split('\0'):
+            name, sep, value = item.partition('=')
+            if sep and name:
+                env[name] = value
+        return env
+
+    def _collect(self, sentinel: str, timeout: float, on_output: Optional[OutputListener]) -> ShellOutput:
+        """Read output until both sentinels arrive, interrupting on timeout"""
+        captures = {'stdout': OutputCapture(), 'stderr': OutputCapture()}
+        pending = {'stdout': '', 'stderr': ''}  # incomplete last line of each stream
+        done = {'stdout': False, 'stderr': False}
+        returncode = None
+        timed_out = False
+        deadline = time.monotonic() + timeout
+        kill_at = None
+
+        def emit(name: str, text: str):
+            captures[name].append(text)
+            if on_output is not None:
+                try:
+                    on_output(name, text)
+                except Exception:
+                    # Display problems must not break the command
+                    pass
+
+        while not all(done.values()):
+            now = time.monotonic()
+            if now >= deadline:
+                if kill_at is None:
+                    timed_out = True
+                    kill_at = now + self.INTERRUPT_GRACE
+                if now >= kill_at:
+                    # The command ignores SIGINT: give up on this shell
+                    self.close()
+                    for name in pending:
+                        captures[name].append(pending[name])
+                    return ShellOutput(self._text(captures['stdout']), self._text(captures['stderr']),
+                                       None, timed_out=True, shell_exited=True)
+                self._signal(signal.SIGINT)
+                deadline = now + 0.5
+
+            try:
+                name, piece = self._output.get(timeout=max(0.01, min(deadline, kill_at or deadline) - now))
+            except queue.Empty:
+                continue
+
+            if piece is None:
+                # Stream closed: the shell exited (e.g. the command ran `exit`)
+                done[name] = True
+                if pending[name]:
+                    emit(name, pending[name])
+                    pending[name] = ''
+                if all(done.values()) and returncode is None:
+                    code = self._process.wait() if self._process else None
+                    self.close()
+                    return ShellOutput(self._text(captures['stdout'], strip=False),
+                                       self._text(captures['stderr'], strip=False),
+                                       code, timed_out=timed_out, shell_exited=True)
+                continue
+
+            if done[name]:
+                # Late output (e.g. a background job) after this command finished
+                continue
+
+            # The sentinel always starts a line: only complete lines are searched
+            text = pending[name] + piece
+            cut = text.rfind('\n') + 1
+            complete, pending[name] = text[:cut], text[cut:]
+            if len(pending[name]) > READ_CHUNK:
+                complete, pending[name] = text, ''
+
+            position = complete.find(sentinel)
+            if position == -1:
+                if complete:
+                    emit(name, complete)
+                continue
+
+            if position:
+                emit(name, complete[:position])
+            done[name] = True
+            pending[name] = ''
+            if name == 'stdout':
+                line = complete[position:].split('\n', 1)[0]
+                _, code, cwd = line.split(':', 2)
+                returncode = int(code)
+                self.cwd = cwd
+
+        return ShellOutput(self._text(captures['stdout']), self._text(captures['stderr']),
+                           returncode, timed_out=timed_out)
+
+    @staticmethod
+    def _text(capture: OutputCapture, strip: bool = True) -> str:
+        """Captured text, dropping the newline printed before the sentinel"""
+        text = capture.text()
+        if strip and text.endswith('\n'):
+            text = text[:-1]
+        return text
+
+    def _signal(self, sig: int):
+        if self._process is not None:
+            try:
+                os.killpg(self._process.pid, sig)
+            except OSError:
+                pass
+
+    def _write(self, data: str):
+        self._process.stdin.write(data.encode('utf-8'))
+        self._process.stdin.flush()
@@ -0,0 +1,286 @@
+"""On-disk trigram index that narrows grep candidates across a session"""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .walker import DiskSource, walk
+from .search import is_binary_file, required_literals
+
+
+class TrigramIndex:
+    """
+    Trigram signatures of the files under a root directory
+
+    Every indexed file gets a Bloom filter of its (lowercased) trigrams,
+    sized to about 8 bits per distinct trigram. A grep for a pattern with
+    required literals only has to scan files whose filter contains all of
+    the literals' trigrams; checking a file is a single big-integer AND.
+    Built lazily from the files each query is about to scan: a candidate
+    whose mtime/size changed is re-read, the rest cost one stat, so a search
+    of a small subtree never walks the whole root. Stored in SQLite under
+    the user cache directory, keyed by the root path.
+
+    The index only narrows candidates (false positives are possible, false
+    negatives are not); matches are always verified with the real regex.
+    Files it cannot describe exactly (non-ASCII or very large) are always
+    candidates.
+    """
+
+    # File status values
+    INDEXED = 0        # signature stored
+    ALWAYS_SCAN = 1    # not indexed (non-ASCII or too large): always a candidate
+    SKIPPED = 2        # binary: never matched by grep
+
+    MAX_INDEXED_BYTES = 4 * 1024 * 1024
+    MIN_FILTER_BITS = 256
+    BITS_PER_TRIGRAM = 8
+
+    def __init__(self, root: str = ".", index_path: Optional[str] = None,
+                 source: Optional[DiskSource] = None):
+        """
+        Initialize index
+
+        Args:
+            root: Directory tree to index
+            index_path: SQLite file (default: <cache dir>/termicode/trigrams-<hash>.sqlite)
+            source: Listing source for walking root (e.g. the workspace index; default: disk)
+        """
+        self.root = os.path.abspath(root)
+        self.source = source
+
+        if index_path is None:
+            cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            root_hash = hashlib.sha256(self.root.encode('utf-8')).hexdigest()[:16]
+            index_path = os.path.join(cache_dir, 'termicode', f"trigrams-{root_hash}.sqlite")
+
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        self.index_path = index_path
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(index_path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                size INTEGER,
+                status INTEGER,
+                bits INTEGER,
+                bloom BLOB
+            )"""
+        )
+        self.conn.commit()
+
+        # path -> (mtime_ns, size, status, bits, bloom); loaded on first use
+        self._files: Optional[Dict[str, Tuple[int, int, int, int, int]]] = None
+
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        """All 3-character substrings of text"""
+        grams: Set[str] = set()
+        # Source files repeat lines a lot; only scan each distinct line once
+        for line in set(text.split('\n')):
+            grams.update(line[i:i + 3] for i in range(len(line) - 2))
+        return grams
+
+    @staticmethod
+    def _positions(gram: str, bits: int) -> Tuple[int, int]:
+        """Two Bloom filter bit positions for a trigram (bits is a power of two)"""
+        code = (ord(gram[0]) << 14) | (ord(gram[1]) << 7) | ord(gram[2])
+        h1 = (code * 2654435761) & 0xFFFFFFFF
+        h2 = ((code ^ 0x5BD1E995) * 40503 + 0x9E3779B9) & 0xFFFFFFFF
+        mask = bits - 1
+        return h1 & mask, (h2 >> 7) & mask
+
+    def _signature(self, grams: Set[str]) -> Tuple[int, int]:
+        """Build (bits, bloom) for a file's trigram set"""
+        bits = self.MIN_FILTER_BITS
+        while bits < len(grams) * self.BITS_PER_TRIGRAM:
+            bits <<= 1
+
+        # Set bits in a bytearray; OR-ing into a big int per trigram is quadratic
+        buffer = bytearray(bits // 8)
+        for gram in grams:
+            for position in self._positions(gram, bits):
+                buffer[position >> 3] |= 1 << (position & 7)
+        return bits, int.from_bytes(buffer, 'little')
+
+    def _scan(self, rel_path: str, mtime_ns: int, size: int) -> Tuple[int, int, int, int, int]:
+        """Compute the index entry for one file"""
+        full_path = os.path.join(self.root, rel_path)
+
+        if size > self.MAX_INDEXED_BYTES:
+            return mtime_ns, size, self.ALWAYS_SCAN, 0, 0
+        if is_binary_file(full_path):
+            return mtime_ns, size, self.SKIPPED, 0, 0
+
+        try:
+            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+        except OSError:
+            return mtime_ns, size, self.ALWAYS_SCAN, 0, 0
+
+        if not content.isascii():
+            return mtime_ns, size, self.ALWAYS_SCAN, 0, 0
+
+        bits, bloom = self._signature(self.trigrams(content.lower()))
+        return mtime_ns, size, self.INDEXED, bits, bloom
+
+    def _load(self) -> Dict[str, Tuple[int, int, int, int, int]]:
+        """Load all entries from disk (once)"""
+        if self._files is None:
+            self._files = {
+                path: (mtime_ns, size, status, bits, int.from_bytes(bloom or b'', 'little'))
+                for path, mtime_ns, size, status, bits, bloom in self.conn.execute(
+                    "SELECT path, mtime_ns, size, status, bits, bloom FROM files"
+                )
+            }
+        return self._files
+
+    def refresh(self) -> int:
+        """
+        Bring the whole index up to date with the tree (e.g. to build it ahead of queries)
+
+        Returns the number of files (re)indexed or removed. Queries do not
+        need this: filter_files updates the files it is given.
+        """
+        with self._lock:
+            files = self._load()
+            seen = set()
+            updated = []
+
+            for entry, relative in walk(self.root, include_hidden=True, source=self.source):
+                rel_path = relative.replace('/', os.sep)
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                seen.add(rel_path)
+                entry = files.get(rel_path)
+                if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                    continue
+
+                entry = self._scan(rel_path, stat.st_mtime_ns, stat.st_size)
+                files[rel_path] = entry
+                updated.append((rel_path, entry))
+
+            removed = [rel_path for rel_path in files if rel_path not in seen]
+            for rel_path in removed:
+                del files[rel_path]
+
+            if updated or removed:
+                self._store(updated, removed)
+
+            return len(updated) + len(removed)
+
+    def contains(self, path: str) -> bool:
+        """Whether path lies under the indexed root"""
+        path = os.path.abspath(path)
+        return path == self.root or path.startswith(self.root.rstrip(os.sep) + os.sep)
+
+    def _update(self, paths: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        Re-index the given (file_path, rel_path) pairs whose mtime or size changed (lock held)
+
+        Returns the pairs that still exist. Only these files are looked at, so
+        a query costs one stat per candidate instead of a walk of the root.
+        """
+        files = self._load()
+        existing = []
+        updated = []
+        removed = []
+
+        for file_path, rel_path in paths:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                if files.pop(rel_path, None) is not None:
+                    removed.append(rel_path)
+                continue
+
+            existing.append((file_path, rel_path))
+            entry = files.get(rel_path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                continue
+
+            entry = self._scan(rel_path, stat.st_mtime_ns, stat.st_size)
+            files[rel_path] = entry
+            updated.append((rel_path, entry))
+
+        if updated or removed:
+            self._store(updated, removed)
+        return existing
+
+    def _store(self, updated: List[Tuple[str, Tuple[int, int, int, int, int]]], removed: List[str]):
+        """Write changed entries to disk (lock held)"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, status, bits, bloom) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (rel_path, e[0], e[1], e[2], e[3], e[4].to_bytes((e[3] + 7) // 8, 'little'))
+                for rel_path, e in updated
+            )
+        )
+        self.conn.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in removed))
+        self.conn.commit()
+
+    def filter_files(self, files: Iterable[str], pattern: str) -> Iterable[str]:
+        """
+        Drop files the index proves cannot match pattern
+
+        Trigrams are compared lowercased, so this is valid for case-sensitive
+        and case-insensitive searches alike. Only the given files are brought
+        up to date (changed ones re-indexed), never the whole root. Files
+        outside root pass through unchanged.
+        """
+        grams: Set[str] = set()
+        for literal in required_literals(pattern):
+            if literal.isascii():
+                grams |= self.trigrams(literal.lower())
+        # Trigrams are indexed per line
+        grams = {gram for gram in grams if '\n' not in gram}
+
+        if not grams:
+            return files
+
+        masks: Dict[int, int] = {}
+        filtered: List[str] = []
+        candidates: List[Tuple[str, str]] = []
+
+        for file_path in files:
+            if self.contains(file_path):
+                candidates.append((file_path, os.path.relpath(os.path.abspath(file_path), self.root)))
+            else:
+                filtered.append(file_path)
+
+        with self._lock:
+            candidates = self._update(candidates)
+            entries = self._files
+
+            for file_path, rel_path in candidates:
+                entry = entries.get(rel_path)
+
+                if entry is None or entry[2] == self.ALWAYS_SCAN:
+                    filtered.append(file_path)
+                    continue
+                if entry[2] == self.SKIPPED:
+                    continue
+
+                bits, bloom = entry[3], entry[4]
+                mask = masks.get(bits)
+                if mask is None:
+                    mask = 0
+                    for gram in grams:
+                        p1, p2 = self._positions(gram, bits)
+                        mask |= (1 << p1) | (1 << p2)
+                    masks[bits] = mask
+
+                if bloom & mask == mask:
+                    filtered.append(file_path)
+
+        return filtered
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.conn.close()
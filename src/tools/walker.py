@@ -0,0 +1,319 @@
+"""Fast directory walking shared by file tools"""
+import fnmatch
+import os
+import re
+from typing import Callable, Iterator, FrozenSet, List, Optional, Tuple
+
+
+# Directories never worth descending into when searching a project
+DEFAULT_IGNORED_DIRS: FrozenSet[str] = frozenset({
+    '.git', '.hg', '.svn',
+    'node_modules', '__pycache__',
+    '.venv', 'venv', '.tox', '.nox', '.eggs',
+    '.mypy_cache', '.pytest_cache', '.ruff_cache',
+    '.termicode_sessions',
+})
+
+# Per-directory ignore files, in increasing precedence
+IGNORE_FILES = ('.gitignore', '.ignore')
+
+
+def compile_pattern(pattern: str) -> "re.Pattern":
+    """Compile a glob-style file pattern (fnmatch semantics, OS case rules)"""
+    return re.compile(fnmatch.translate(os.path.normcase(pattern)))
+
+
+def translate_glob(pattern: str) -> str:
+    """
+    Translate a path glob to a regex (without anchors)
+
+    '*' and '?' never cross '/', '**' matches any number of directories,
+    and '[...]' is a character class.
+    """
+    parts = []
+    i, n = 0, len(pattern)
+
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                i += 2
+                if at_start and pattern.startswith('/', i):
+                    parts.append('(?:[^/]*/)*')
+                    i += 1
+                elif at_start and i == n:
+                    parts.append('.*')
+                else:
+                    parts.append('[^/]*')
+                continue
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            # A ']' right after '[' or '[!' is part of the class
+            first = i + 2 if pattern[i + 1:i + 2] in ('!', '^') else i + 1
+            end = pattern.find(']', first + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """Rules from one .gitignore/.ignore file, relative to its directory"""
+
+    def __init__(self, base: str, lines: List[str]):
+        """
+        Args:
+            base: Directory of the ignore file, relative to the walk root ('' for root)
+            lines: Lines of the ignore file
+        """
+        self.base = base
+        self.rules: List[Tuple["re.Pattern", bool, bool]] = []  # (regex, negate, dir_only)
+
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line.endswith('\\ '):
+                line = line.rstrip(' ')
+            if not line or line.startswith('#'):
+                continue
+
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+
+            anchored = '/' in line
+            line = line.lstrip('/')
+            regex = translate_glob(line)
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+
+            self.rules.append((re.compile(regex + r'\Z', re.DOTALL), negate, dir_only))
+
+    @classmethod
+    def load(cls, directory: str, base: str) -> Optional["IgnoreRules"]:
+        """Read ignore files in directory (None if there are no rules)"""
+        lines: List[str] = []
+        for name in IGNORE_FILES:
+            try:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='ignore') as f:
+                    lines.extend(f.readlines())
+            except OSError:
+                continue
+
+        rules = cls(base, lines) if lines else None
+        return rules if rules and rules.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True = ignored, False = re-included (negated), None = no rule matched"""
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+def _is_ignored(rule_sets: List[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    """Apply ignore rules from the root-most to the deepest; last match wins"""
+    ignored = False
+    for rules in rule_sets:
+        result = rules.match(rel_path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+class DiskSource:
+    """Directory listings straight from the filesystem"""
+
+    def sync(self):
+        """Called once at the start of every walk"""
+
+    def scandir(self, directory: str) -> List[os.DirEntry]:
+        """Entries of directory, sorted by name (raises OSError)"""
+        with os.scandir(directory) as it:
+            return sorted(it, key=lambda entry: entry.name)
+
+    def ignore_rules(self, directory: str, relative: str) -> Optional[IgnoreRules]:
+        """Ignore rules declared in directory"""
+        return IgnoreRules.load(directory, relative)
+
+
+DISK = DiskSource()
+
+
+def walk(
+    root: str,
+    ignored_dirs: FrozenSet[str] = DEFAULT_IGNORED_DIRS,
+    include_hidden: bool = False,
+    respect_ignore_files: bool = True,
+    descend: Optional[Callable[[str], bool]] = None,
+    source: Optional[DiskSource] = None
+) -> Iterator[Tuple[os.DirEntry, str]]:
+    """
+    Yield (entry, relative_path) for every file under root
+
+    Walks with os.scandir (or a cached source such as the workspace index)
+    and never changes the working directory. Directories in ignored_dirs,
+    hidden entries (unless include_hidden) and paths excluded by
+    .gitignore/.ignore files are pruned before descending.
+    descend(relative_dir) can prune further. Relative paths use '/'. Order
+    is deterministic: files of a directory first, then its subdirectories,
+    each sorted by name.
+    """
+    source = source or DISK
+    source.sync()
+
+    root_rules = source.ignore_rules(root, "") if respect_ignore_files else None
+    stack: List[Tuple[str, str, List[IgnoreRules]]] = [(root, "", [root_rules] if root_rules else [])]
+
+    while stack:
+        directory, relative, rule_sets = stack.pop()
+
+        try:
+            entries = source.scandir(directory)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            if not include_hidden and name.startswith('.'):
+                continue
+
+            entry_relative = f"{relative}/{name}" if relative else name
+
+            try:
+                is_dir = entry.is_dir()
+                if not is_dir and not entry.is_file():
+                    continue
+            except OSError:
+                continue
+
+            if is_dir and name in ignored_dirs:
+                continue
+            if rule_sets and _is_ignored(rule_sets, entry_relative, is_dir):
+                continue
+
+            if is_dir:
+                if descend is None or descend(entry_relative):
+                    subdirs.append((entry.path, entry_relative))
+                continue
+
+            yield entry, entry_relative
+
+        for path, sub_relative in reversed(subdirs):
+            sub_rules = rule_sets
+            if respect_ignore_files:
+                rules = source.ignore_rules(path, sub_relative)
+                if rules:
+                    sub_rules = rule_sets + [rules]
+            stack.append((path, sub_relative, sub_rules))
+
+
+def walk_files(
+    root: str,
+    pattern: str = "*",
+    ignored_dirs: FrozenSet[str] = DEFAULT_IGNORED_DIRS,
+    include_hidden: bool = False,
+    respect_ignore_files: bool = True,
+    source: Optional[DiskSource] = None
+) -> Iterator[str]:
+    """
+    Yield files under root whose name matches pattern (like glob root/**/pattern)
+
+    Paths are joined onto root. A pattern containing '/' is matched against
+    the end of the path relative to root, at any depth ('sub/*.py' matches
+    src/sub/b.py), with '*' not crossing '/'.
+    """
+    pattern = pattern.replace('\\', '/') if os.sep == '\\' else pattern
+    match_relative = '/' in pattern
+    if match_relative:
+        while pattern.startswith('./'):
+            pattern = pattern[2:]
+        flags = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+        matcher = re.compile('(?:.*/)?' + translate_glob(pattern.lstrip('/')) + r'\Z', flags | re.DOTALL)
+    else:
+        matcher = compile_pattern(pattern)
+
+    for entry, relative in walk(root, ignored_dirs, include_hidden, respect_ignore_files, source=source):
+        if match_relative:
+            if matcher.match(relative):
+                yield entry.path
+        elif matcher.match(os.path.normcase(entry.name)):
+            yield entry.path
+
+
+def glob_files(
+    root: str,
+    pattern: str,
+    ignored_dirs: FrozenSet[str] = DEFAULT_IGNORED_DIRS,
+    respect_ignore_files: bool = True,
+    source: Optional[DiskSource] = None
+) -> Iterator[Tuple[os.DirEntry, str]]:
+    """
+    Yield (entry, relative_path) for files under root matching a path glob
+
+    The pattern is matched relative to root ('*.py' only matches top-level
+    files, '**/*.py' matches at any depth) and directories that cannot
+    match it are never entered. Hidden files are only matched when the
+    pattern names them.
+    """
+    pattern = pattern.replace('\\', '/') if os.sep == '\\' else pattern
+    while pattern.startswith('./'):
+        pattern = pattern[2:]
+
+    segments = [s for s in pattern.split('/') if s]
+    if not segments:
+        return
+
+    flags = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+    full_regex = re.compile(translate_glob("/".join(segments)) + r'\Z', flags | re.DOTALL)
+    segment_regexes = [
+        None if segment == '**' else re.compile(translate_glob(segment) + r'\Z', flags | re.DOTALL)
+        for segment in segments
+    ]
+    include_hidden = any(segment.startswith('.') for segment in segments)
+
+    def descend(relative_dir: str) -> bool:
+        # A directory at depth i must match segment i, until a '**' is reached
+        for i, part in enumerate(relative_dir.split('/')):
+            regex = segment_regexes[i] if i < len(segments) else None
+            if i >= len(segments) - 1 and regex is not None:
+                return False
+            if regex is None:
+                return True
+            if not regex.match(part):
+                return False
+        return True
+
+    for entry, relative in walk(root, ignored_dirs, include_hidden, respect_ignore_files, descend, source):
+        if full_regex.match(relative):
+            yield entry, relative
@@ -0,0 +1,396 @@
+"""In-memory file tree of the workspace, kept fresh by inotify or polling"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from .walker import IGNORE_FILES, IgnoreRules, DiskSource, walk_files
+
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+CONTENT_EVENTS = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE
+
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def _load_inotify():
+    """libc with inotify support, or None on other platforms"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        libc.inotify_rm_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _Node:
+    """Cached listing of one directory"""
+
+    __slots__ = ('entries', 'stats', 'rules', 'mtime_ns')
+
+    def __init__(self, entries: List[Tuple[str, bool]], mtime_ns: int, cache_stats: bool):
+        self.entries = entries                      # (name, is_dir), sorted by name
+        self.stats: Optional[Dict[str, os.stat_result]] = {} if cache_stats else None
+        self.rules: Dict[str, Optional[IgnoreRules]] = {}
+        self.mtime_ns = mtime_ns
+
+
+class CachedEntry:
+    """Directory entry served from the index (the parts of os.DirEntry the walker uses)"""
+
+    __slots__ = ('name', 'path', '_is_dir', '_node')
+
+    def __init__(self, name: str, path: str, is_dir: bool, node: _Node):
+        self.name = name
+        self.path = path
+        self._is_dir = is_dir
+        self._node = node
+
+    def is_dir(self) -> bool:
+        return self._is_dir
+
+    def is_file(self) -> bool:
+        return not self._is_dir
+
+    def stat(self) -> os.stat_result:
+        stats = self._node.stats
+        if stats is None:
+            return os.stat(self.path)
+        result = stats.get(self.name)
+        if result is None:
+            result = stats[self.name] = os.stat(self.path)
+        return result
+
+
+class WorkspaceIndex(DiskSource):
+    """
+    Directory listings, ignore rules and file stats under a root, held in memory
+
+    Drop-in listing source for the walker: directories are listed from disk
+    the first time a walk enters them and served from memory afterwards.
+    On Linux each cached directory gets an inotify watch and pending events
+    are drained at the start of every walk, so results are never stale and
+    walking an unchanged tree makes no listing or stat calls. Elsewhere (or
+    when the watch limit is hit) directory mtimes are polled at most every
+    poll_interval seconds; polling sees files being added, removed or
+    renamed, and file stats are then always read fresh.
+
+    Directories outside root are listed from disk as usual.
+    """
+
+    def __init__(self, root: str = ".", watch: str = "auto", poll_interval: float = 1.0):
+        """
+        Initialize index
+
+        Args:
+            root: Workspace directory
+            watch: "auto" (inotify when available), "inotify" or "poll"
+            poll_interval: Minimum seconds between directory mtime checks when polling
+        """
+        self.root = os.path.abspath(root)
+        self.poll_interval = poll_interval
+
+        self._lock = threading.RLock()
+        self._nodes: Dict[str, _Node] = {}
+        self._watches: Dict[int, str] = {}    # wd -> directory
+        self._watched: Dict[str, int] = {}    # directory -> wd
+        self._last_poll = time.monotonic()
+        self._fd = -1
+        self._libc = None
+
+        if watch in ("auto", "inotify"):
+            self._libc = _load_inotify()
+            if self._libc is not None:
+                self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+                if self._fd < 0:
+                    self._libc = None
+            if self._libc is None and watch == "inotify":
+                raise OSError("inotify is not available on this system")
+
+        self.mode = "inotify" if self._libc is not None else "poll"
+
+    # Walker source interface
+
+    def sync(self):
+        """Apply filesystem changes seen since the last walk"""
+        with self._lock:
+            if self.mode == "inotify":
+                self._drain_events()
+            elif time.monotonic() - self._last_poll >= self.poll_interval:
+                self._poll()
+
+    def scandir(self, directory: str) -> List[CachedEntry]:
+        """Entries of directory, sorted by name (raises OSError)"""
+        key = os.path.abspath(directory)
+        if not self._contains(key):
+            return super().scandir(directory)
+
+        node = self._node(key)
+        return [
+            CachedEntry(name, os.path.join(directory, name), is_dir, node)
+            for name, is_dir in node.entries
+        ]
+
+    def ignore_rules(self, directory: str, relative: str) -> Optional[IgnoreRules]:
+        """Ignore rules declared in directory (only read when an ignore file exists)"""
+        key = os.path.abspath(directory)
+        if not self._contains(key):
+            return super().ignore_rules(directory, relative)
+
+        try:
+            node = self._node(key)
+        except OSError:
+            return None
+
+        if relative in node.rules:
+            return node.rules[relative]
+
+        names = {name for name, is_dir in node.entries if not is_dir}
+        rules = None
+        if any(name in names for name in IGNORE_FILES):
+            rules = IgnoreRules.load(key, relative)
+
+        # Polling cannot see ignore files being edited in place: re-read them every walk
+        if node.stats is not None:
+            node.rules[relative] = rules
+        return rules
+
+    # Queries and updates
+
+    def find(self, name: str, limit: int = 5) -> List[str]:
+        """Workspace-relative paths of files called name (for "did you mean" hints)"""
+        matches = []
+        for path in walk_files(self.root, name, source=self):
+            matches.append(os.path.relpath(path, self.root))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def invalidate(self, path: str):
+        """Forget cached state for path after writing it (for changes not yet seen by the watcher)"""
+        path = os.path.abspath(path)
+        with self._lock:
+            while self._contains(path) and path != self.root:
+                parent, name = os.path.split(path)
+                node = self._nodes.get(parent)
+                if node is not None:
+                    if any(entry_name == name for entry_name, _ in node.entries):
+                        if node.stats is not None:
+                            node.stats.pop(name, None)
+                        node.rules.clear()
+                    else:
+                        # New entry: relist the parent on the next walk
+                        self._nodes.pop(parent, None)
+                    return
+                path = parent
+
+    def clear(self):
+        """Drop every cached listing"""
+        with self._lock:
+            for directory in list(self._nodes):
+                self._drop(directory)
+
+    def close(self):
+        """Stop watching and release the inotify descriptor"""
+        with self._lock:
+            self.clear()
+            if self._fd >= 0:
+                os.close(self._fd)
+                self._fd = -1
+            self._libc = None
+            self.mode = "poll"
+
+    def stats(self) -> Dict[str, object]:
+        """Cache statistics"""
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'directories': len(self._nodes),
+                'watches': len(self._watches),
+            }
+
+    # Internals
+
+    def _contains(self, path: str) -> bool:
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def _node(self, directory: str) -> _Node:
+        """Cached listing for an absolute directory path, listing it if needed"""
+        with self._lock:
+            node = self._nodes.get(directory)
+            if node is not None:
+                return node
+
+            # Watch before listing so no change between the two is missed
+            if self.mode == "inotify":
+                self._watch(directory)
+
+            mtime_ns = os.stat(directory).st_mtime_ns
+            entries = []
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                        if not is_dir and not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    entries.append((entry.name, is_dir))
+            entries.sort()
+
+            node = _Node(entries, mtime_ns, cache_stats=(self.mode == "inotify"))
+            self._nodes[directory] = node
+            return node
+
+    def _watch(self, directory: str):
+        """Add an inotify watch; falls back to polling when watches run out"""
+        if directory in self._watched:
+            return
+
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._watches[wd] = directory
+            self._watched[directory] = wd
+            return
+
+        err = ctypes.get_errno()
+        if err in (errno.ENOSPC, errno.ENOMEM):
+            # fs.inotify.max_user_watches reached: stop watching altogether
+            self.clear()
+            os.close(self._fd)
+            self._fd = -1
+            self._libc = None
+            self.mode = "poll"
+            self._last_poll = time.monotonic()
+        elif err != errno.EACCES:
+            raise OSError(err, os.strerror(err), directory)
+
+    def _drop(self, directory: str):
+        """Forget a directory and everything cached below it"""
+        prefix = directory + os.sep
+        for path in [p for p in self._nodes if p == directory or p.startswith(prefix)]:
+            del self._nodes[path]
+        for path in [p for p in self._watched if p == directory or p.startswith(prefix)]:
+            wd = self._watched.pop(path)
+            self._watches.pop(wd, None)
+            if self._fd >= 0:
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _drain_events(self):
+        """Read all pending inotify events without blocking"""
+        while self._fd >= 0:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.clear()
+                return
+
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                self._handle_event(wd, mask, os.fsdecode(name))
+
+    def _handle_event(self, wd: int, mask: int, name: str):
+        if mask & IN_Q_OVERFLOW:
+            # Events were lost: nothing cached can be trusted
+            self.clear()
+            return
+
+        directory = self._watches.get(wd)
+        if directory is None:
+            return
+
+        if mask & IN_IGNORED:
+            # Watch removed by the kernel (directory deleted or unmounted)
+            self._watches.pop(wd, None)
+            self._watched.pop(directory, None)
+            self._drop(directory)
+            return
+
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self._drop(directory)
+            return
+
+        node = self._nodes.get(directory)
+
+        if mask & IN_ISDIR and mask & (IN_DELETE | IN_MOVED_FROM):
+            self._drop(os.path.join(directory, name))
+
+        if mask & (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO):
+            # Entries changed: relist on the next walk (keeps the watch)
+            self._nodes.pop(directory, None)
+        elif node is not None and mask & CONTENT_EVENTS:
+            if node.stats is not None:
+                node.stats.pop(name, None)
+            if name in IGNORE_FILES:
+                node.rules.clear()
+
+    def _poll(self):
+        """Drop listings of directories whose mtime changed"""
+        self._last_poll = time.monotonic()
+        for directory, node in list(self._nodes.items()):
+            if directory not in self._nodes:
+                continue
+            try:
+                changed = os.stat(directory).st_mtime_ns != node.mtime_ns
+            except OSError:
+                changed = True
+            if changed:
+                if os.path.isdir(directory):
+                    self._nodes.pop(directory, None)
+                else:
+                    self._drop(directory)
+
+
+_workspaces: Dict[str, WorkspaceIndex] = {}
+_workspaces_lock = threading.Lock()
+
+
+def get_workspace(root: Optional[str] = None) -> Optional[WorkspaceIndex]:
+    """
+    Shared index for root (default: the current directory)
+
+    Controlled by the WORKSPACE_WATCH env var: "auto" (default), "inotify",
+    "poll", or "off" to disable caching (returns None; callers then walk
+    the disk directly).
+    """
+    watch = os.getenv('WORKSPACE_WATCH', 'auto').lower()
+    if watch == 'off':
+        return None
+
+    root = os.path.abspath(root or os.getcwd())
+    with _workspaces_lock:
+        workspace = _workspaces.get(root)
+        if workspace is None:
+            workspace = _workspaces[root] = WorkspaceIndex(root, watch=watch)
+        return workspace
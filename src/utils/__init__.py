@@ -1,12 +1,13 @@
 """Utility modules"""
 from .tool_executor import ToolExecutor
-from .response_parser import ResponseParser
+from .response_parser import ResponseParser, StreamingToolCallParser
 from .ui_helpers import Colors, Spinner, ProgressBar, print_box, print_section, print_success, print_error, print_info, print_warning
 from .diff_viewer import DiffViewer, FileSummary
 
 __all__ = [
     'ToolExecutor',
     'ResponseParser',
+    'StreamingToolCallParser',
     'Colors',
     'Spinner',
     'ProgressBar',
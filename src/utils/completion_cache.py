@@ -0,0 +1,179 @@
+"""On-disk cache of model completions, for replaying repeated prompts"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Messages reduced to what affects the completion
+
+    None fields are dropped and text content gets uniform line endings
+    without trailing whitespace, so transcripts that differ only in those
+    details share a cache entry.
+    """
+    normalized = []
+    for message in messages:
+        entry = {}
+        for name, value in message.items():
+            if value is None:
+                continue
+            if name == 'content' and isinstance(value, str):
+                value = value.replace('\r\n', '\n').rstrip()
+            entry[name] = value
+        normalized.append(entry)
+    return normalized
+
+
+def completion_key(
+    model: str,
+    temperature: float,
+    messages: List[Dict[str, Any]],
+    max_tokens: Optional[int] = None,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    kind: str = "chat"
+) -> str:
+    """Cache key for a request: hash of the model, sampling settings and normalized messages"""
+    request = {
+        'kind': kind,
+        'model': model,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'tools': tools,
+        'messages': normalize_messages(messages),
+    }
+    data = json.dumps(request, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class CompletionCache:
+    """
+    Completions stored in SQLite under the user cache directory
+
+    Values are JSON (a response message, or the chunks of a stream).
+    Entries older than ttl seconds are ignored and removed; when the stored
+    values exceed max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = 7 * 24 * 3600
+    ):
+        """
+        Args:
+            path: SQLite file (default: <cache dir>/termicode/completions.sqlite)
+            max_bytes: Total size of stored values before eviction
+            ttl: Seconds an entry stays valid (None = forever)
+        """
+        if path is None:
+            cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            path = os.path.join(cache_dir, 'termicode', 'completions.sqlite')
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                created REAL,
+                accessed REAL,
+                size INTEGER,
+                value TEXT
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)")
+        self.conn.commit()
+
+        with self._lock:
+            self._expire()
+            self._size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Stored value for key, or None if missing or expired"""
+        with self._lock:
+            row = self.conn.execute("SELECT created, size, value FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._expired(row[0]):
+                self._delete(key, row[1])
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE completions SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(row[2])
+
+    def put(self, key: str, value: Any):
+        """Store a JSON-serializable value, evicting old entries beyond max_bytes"""
+        data = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        size = len(data.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            old = self.conn.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO completions (key, created, accessed, size, value) VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, size, data)
+            )
+            self._size += size - (old[0] if old else 0)
+            self._evict()
+            self.conn.commit()
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self.conn.execute("DELETE FROM completions")
+            self.conn.commit()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            return {'entries': entries, 'bytes': self._size, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _delete(self, key: str, size: int):
+        """Remove one entry (lock held)"""
+        self.conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+        self.conn.commit()
+        self._size -= size
+
+    def _expire(self):
+        """Remove entries past their ttl (lock held)"""
+        if self.ttl is not None:
+            self.conn.execute("DELETE FROM completions WHERE created < ?", (time.time() - self.ttl,))
+            self.conn.commit()
+
+    def _evict(self):
+        """Remove least recently used entries until within max_bytes (lock held)"""
+        if self._size <= self.max_bytes:
+            return
+        self._expire()
+        self._size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        for key, size in self.conn.execute("SELECT key, size FROM completions ORDER BY accessed").fetchall():
+            if self._size <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._size -= size
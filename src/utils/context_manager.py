@@ -1,24 +1,69 @@
 """Context manager to handle conversation history with token limits"""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from .tokenizer import Tokenizer, load_tokenizer
+from .summarizer import HistorySummarizer
 
 
 class ContextManager:
     """Manage conversation context with token limits and summarization"""
 
-    def __init__(self, max_messages: int = 20, max_tokens_estimate: int = 8000):
+    # Maximum number of memoized message token counts
+    TOKEN_CACHE_SIZE = 10000
+
+    # Content prefix of user messages carrying tool results
+    TOOL_RESULTS_PREFIX = "Tool execution results:"
+
+    # Content prefix of the spliced-in summary of evicted messages
+    SUMMARY_PREFIX = "[Summary of earlier conversation]"
+
+    def __init__(
+        self,
+        max_messages: int = 20,
+        max_tokens_estimate: int = 8000,
+        tokenizer: Optional[Tokenizer] = None,
+        truncate_chunk: float = 0.25
+    ):
         """
         Initialize context manager
 
         Args:
             max_messages: Maximum number of messages to keep in history
-            max_tokens_estimate: Rough estimate of max tokens (4 chars ≈ 1 token)
+            max_tokens_estimate: Maximum number of tokens to send
+            tokenizer: Token counter (default: load_tokenizer(), which uses
+                TOKENIZER_PATH or falls back to 4 chars ≈ 1 token)
+            truncate_chunk: Share of the token budget (and message limit)
+                freed whenever the truncation window has to move, so the
+                window start stays put for the following turns
         """
         self.max_messages = max_messages
         self.max_tokens_estimate = max_tokens_estimate
+        self.tokenizer = tokenizer or load_tokenizer()
+        self.truncate_chunk = truncate_chunk
+        self._token_cache: Dict[str, int] = {}
+
+        # Cumulative token counts for the current history (see _prefix_sums)
+        self._prefix: List[int] = [0]
+        self._prefix_owner: Optional[List[Dict[str, str]]] = None
+        self._prefix_last: Optional[Dict[str, str]] = None
+        self._first_user_index: Optional[int] = None
+        self._last_tool_results_index: Optional[int] = None
+
+        # Start of the truncation window last used for the current history
+        self._window_start: Optional[int] = None
 
     def estimate_tokens(self, text: str) -> int:
-        """Estimate token count (rough approximation: 4 chars ≈ 1 token)"""
-        return len(text) // 4
+        """Count tokens in text (memoized, so unchanged messages are only tokenized once)"""
+        if not text:
+            return 0
+
+        count = self._token_cache.get(text)
+        if count is None:
+            count = self.tokenizer.count(text)
+            if len(self._token_cache) >= self.TOKEN_CACHE_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del self._token_cache[next(iter(self._token_cache))]
+            self._token_cache[text] = count
+        return count
 
     def get_total_tokens(self, messages: List[Dict[str, str]]) -> int:
         """Calculate total tokens in message history"""
@@ -27,6 +72,125 @@ class ContextManager:
             total += self.estimate_tokens(msg.get('content', ''))
         return total
 
+    def _prefix_sums(self, history: List[Dict[str, str]]) -> List[int]:
+        """
+        Cumulative token counts: prefix[i] = tokens in history[:i]
+
+        Cached for the most recent history list and extended incrementally,
+        assuming history is append-only (a new list or a changed prefix
+        triggers a rebuild).
+        """
+        prefix = self._prefix
+        counted = len(prefix) - 1
+
+        if (
+            self._prefix_owner is not history
+            or counted > len(history)
+            or (counted > 0 and history[counted - 1] is not self._prefix_last)
+        ):
+            prefix = [0]
+            counted = 0
+            self._prefix = prefix
+            self._prefix_owner = history
+            self._first_user_index = None
+            self._last_tool_results_index = None
+            self._window_start = None
+
+        for index in range(counted, len(history)):
+            message = history[index]
+            prefix.append(prefix[-1] + self.estimate_tokens(message.get('content', '')))
+
+            if message.get('role') == 'user':
+                if self._first_user_index is None:
+                    self._first_user_index = index
+                if message.get('content', '').startswith(self.TOOL_RESULTS_PREFIX):
+                    self._last_tool_results_index = index
+
+        self._prefix_last = history[-1] if history else None
+        return prefix
+
+    def _pinned_indices(self, history: List[Dict[str, str]]) -> List[int]:
+        """Messages kept regardless of truncation: first user task, latest tool results"""
+        self._prefix_sums(history)
+        pinned = {self._first_user_index, self._last_tool_results_index}
+        return sorted(i for i in pinned if i is not None)
+
+    def _cut_point(
+        self,
+        history: List[Dict[str, str]],
+        token_budget: int,
+        message_limit: int,
+        pinned: List[int]
+    ) -> int:
+        """
+        Earliest start such that history[start:] plus pinned messages before
+        start fit within token_budget and message_limit
+
+        Both tokens and message count are non-increasing in start, so the
+        cut point is found by binary search over the cached prefix sums.
+        """
+        prefix = self._prefix_sums(history)
+        total_tokens = prefix[-1]
+        n = len(history)
+
+        def fits(start: int) -> bool:
+            tokens = total_tokens - prefix[start]
+            count = n - start
+            for i in pinned:
+                if i < start:
+                    tokens += prefix[i + 1] - prefix[i]
+                    count += 1
+            return tokens <= token_budget and count <= message_limit
+
+        low, high = 0, n
+        while low < high:
+            mid = (low + high) // 2
+            if fits(mid):
+                high = mid
+            else:
+                low = mid + 1
+        return low
+
+    def _stable_cut_point(
+        self,
+        history: List[Dict[str, str]],
+        token_budget: int,
+        message_limit: int,
+        pinned: List[int]
+    ) -> int:
+        """
+        Cut point that moves in chunks, keeping the prompt prefix stable
+
+        Cutting at the minimal point on every turn would shift the start of
+        the kept window (and so the whole prompt after the pinned messages)
+        each time a message is added, defeating provider-side prompt caches.
+        Instead, the previous window start is reused for as long as the
+        window still fits; when it no longer does, the start jumps far
+        enough to free truncate_chunk of the budget, so it stays put again
+        for the next several turns.
+        """
+        minimal = self._cut_point(history, token_budget, message_limit, pinned)
+
+        previous = self._window_start
+        if previous is not None and minimal <= previous <= len(history):
+            return previous
+
+        start = minimal
+        if self.truncate_chunk > 0:
+            start = max(minimal, self._cut_point(
+                history,
+                int(token_budget * (1 - self.truncate_chunk)),
+                max(1, message_limit - int(message_limit * self.truncate_chunk)),
+                pinned
+            ))
+        self._window_start = start
+        return start
+
+    def _fits(self, history: List[Dict[str, str]], system_tokens: int) -> bool:
+        """Whether the whole history fits without truncation"""
+        total_tokens = self._prefix_sums(history)[-1]
+        return total_tokens + system_tokens <= self.max_tokens_estimate and len(history) <= self.max_messages
+
     def truncate_history(
         self,
         history: List[Dict[str, str]],
@@ -37,8 +201,11 @@ class ContextManager:
 
         Strategy:
         1. Keep most recent messages
-        2. Keep first message if it contains important context
-        3. Remove middle messages if needed
+        2. Always keep pinned messages (first user task, latest tool results)
+        3. Remove middle messages if needed, in chunks (see _stable_cut_point)
+
+        The cut point is found by binary search over cached cumulative
+        token counts, so each call is O(log n) plus building the result.
         """
         if not history:
             return history
@@ -47,29 +214,18 @@ class ContextManager:
         system_tokens = self.estimate_tokens(system_prompt)
 
         # Check if we're within limits
-        total_tokens = self.get_total_tokens(history)
-
-        if total_tokens + system_tokens <= self.max_tokens_estimate and len(history) <= self.max_messages:
+        if self._fits(history, system_tokens):
             return history
 
-        # Strategy: Keep recent messages
-        truncated = []
-        tokens_used = system_tokens
-
-        # Start from most recent and work backwards
-        for message in reversed(history):
-            msg_tokens = self.estimate_tokens(message.get('content', ''))
-
-            if tokens_used + msg_tokens > self.max_tokens_estimate:
-                break
-
-            if len(truncated) >= self.max_messages:
-                break
-
-            truncated.insert(0, message)
-            tokens_used += msg_tokens
+        pinned = self._pinned_indices(history)
+        start = self._stable_cut_point(
+            history,
+            self.max_tokens_estimate - system_tokens,
+            self.max_messages,
+            pinned
+        )
 
-        return truncated
+        return [history[i] for i in pinned if i < start] + history[start:]
 
     def sliding_window(
         self,
@@ -89,39 +245,88 @@ class ContextManager:
         # Keep last N pairs
         return history[-(window_size * 2):]
 
+    def schedule_summaries(
+        self,
+        history: List[Dict[str, str]],
+        system_prompt: str,
+        summarizer: HistorySummarizer
+    ):
+        """Start background summarization of messages truncation would evict"""
+        if not history:
+            return
+
+        system_tokens = self.estimate_tokens(system_prompt)
+        if self._fits(history, system_tokens):
+            return
+
+        pinned = self._pinned_indices(history)
+        start = self._stable_cut_point(
+            history,
+            self.max_tokens_estimate - system_tokens,
+            self.max_messages,
+            pinned
+        )
+        summarizer.schedule(history, start)
+
     def compress_history(
         self,
         history: List[Dict[str, str]],
-        keep_recent: int = 4
+        system_prompt: str = "",
+        summarizer: Optional[HistorySummarizer] = None
     ) -> List[Dict[str, str]]:
         """
-        Compress history by keeping first and last messages, summarizing middle
+        Truncate history, replacing evicted messages with a rolling summary
+
+        Evicted spans are summarized in the background by the summarizer;
+        this never blocks on it. The newest ready summary is spliced in as a
+        system message after the pinned first messages, and the recent window
+        shrinks to make room for it.
 
         Args:
             history: Full conversation history
-            keep_recent: Number of recent messages to keep in full
+            system_prompt: System prompt (counted against the token budget)
+            summarizer: HistorySummarizer; without one this is truncate_history
         """
-        if len(history) <= keep_recent + 2:
+        if summarizer is None or not history:
+            return self.truncate_history(history, system_prompt)
+
+        system_tokens = self.estimate_tokens(system_prompt)
+        if self._fits(history, system_tokens):
             return history
 
-        # Keep first message (often contains initial context)
-        first_messages = history[:2]  # First user message + response
+        pinned = self._pinned_indices(history)
+        budget = self.max_tokens_estimate - system_tokens
+        start = self._stable_cut_point(history, budget, self.max_messages, pinned)
+
+        summarizer.schedule(history, start)
+        covered_end, summary = summarizer.latest(history, start)
 
-        # Keep recent messages
-        recent_messages = history[-keep_recent:]
+        if not summary:
+            return [history[i] for i in pinned if i < start] + history[start:]
 
-        # Create summary of middle messages
-        middle_count = len(history) - keep_recent - 2
-        summary = {
+        summary_message = {
             "role": "system",
-            "content": f"[{middle_count} previous messages summarized for context]"
+            "content": f"{self.SUMMARY_PREFIX}\n{summary}"
         }
 
-        return first_messages + [summary] + recent_messages
+        # Make room for the summary in the recent window
+        start = max(start, self._stable_cut_point(
+            history,
+            budget - self.estimate_tokens(summary_message['content']),
+            self.max_messages - 1,
+            pinned
+        ))
+
+        return (
+            [history[i] for i in pinned if i < min(start, covered_end)]
+            + [summary_message]
+            + [history[i] for i in pinned if covered_end <= i < start]
+            + history[start:]
+        )
 
     def get_context_stats(self, history: List[Dict[str, str]]) -> Dict[str, Any]:
         """Get statistics about current context"""
-        total_tokens = self.get_total_tokens(history)
+        total_tokens = self._prefix_sums(history)[-1]
         user_messages = len([m for m in history if m.get('role') == 'user'])
         assistant_messages = len([m for m in history if m.get('role') == 'assistant'])
 
@@ -130,6 +335,7 @@ class ContextManager:
             'user_messages': user_messages,
             'assistant_messages': assistant_messages,
             'estimated_tokens': total_tokens,
+            'tokenizer': self.tokenizer.name,
             'tokens_remaining': self.max_tokens_estimate - total_tokens,
             'usage_percentage': (total_tokens / self.max_tokens_estimate) * 100
         }
@@ -1,10 +1,16 @@
 """Interactive tool executor with UI enhancements"""
 import os
-from typing import List, Dict, Any
+import re
+import shutil
+import threading
+from typing import Dict, Any, Optional
 from .tool_executor import ToolExecutor
+from ..tools.content_cache import get_content_cache
 from .ui_helpers import Colors, Spinner, print_success, print_error, print_info, clear_line
 from .diff_viewer import DiffViewer, FileSummary
 
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+
 
 class InteractiveToolExecutor(ToolExecutor):
     """Enhanced tool executor with interactive UI"""
@@ -12,38 +18,69 @@ class InteractiveToolExecutor(ToolExecutor):
     def __init__(self, verbose: bool = False):
         super().__init__()
         self.verbose = verbose
-        self._file_cache: Dict[str, str] = {}  # Cache original file contents for diffs
-
-    def execute_tool_calls_interactive(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, str]]:
-        """Execute tool calls with interactive UI feedback"""
-        results = []
-
-        for i, call in enumerate(tool_calls, 1):
-            tool_name = call.get('name')
-            arguments = call.get('arguments', {})
-
-            # Show spinner for tool execution
-            spinner = Spinner(f"Executing {tool_name}", style="dots")
-            spinner.start()
-
-            result = self.execute_tool(tool_name, **arguments)
-
+        self._file_cache = get_content_cache()  # Shared with the file tools
+        self._edit_snapshots: Dict[str, str] = {}  # Content of files just before an edit, for diffs
+        self._display_lock = threading.Lock()  # Tools may finish concurrently
+        self._bash_spinner: Optional[Spinner] = None  # Shows the live tail of a running command
+
+    def _run_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a single tool call and display its result as soon as it finishes"""
+        tool_name = call.get('name')
+        arguments = call.get('arguments', {})
+        if tool_name == 'edit_file':
+            self._snapshot_before_edit(self.tools[tool_name].resolve_path(arguments.get('file_path', '')))
+
+        bash_tool = self.tools.get('bash') if tool_name == 'bash' and not arguments.get('background') else None
+        if bash_tool is None:
+            return super()._run_call(call)
+
+        # Show the latest line of the running command next to a spinner. bash
+        # is a barrier in the scheduler, so no other tool call runs meanwhile.
+        label = f"Running {arguments.get('command', '')}"
+        self._bash_spinner = Spinner(label, style="dots")
+        bash_tool.on_output = self._live_tail(self._bash_spinner, label)
+        self._bash_spinner.start()
+        try:
+            return super()._run_call(call)
+        finally:
+            bash_tool.on_output = None
+            self._stop_bash_spinner()
+
+    def _stop_bash_spinner(self):
+        spinner, self._bash_spinner = self._bash_spinner, None
+        if spinner is not None:
             spinner.stop()
 
-            # Display result based on tool type
+    def _on_result(self, tool_name: str, arguments: Dict[str, Any], result: str):
+        """Display each full result as soon as its tool finishes"""
+        # The command finished: its result replaces the live tail
+        self._stop_bash_spinner()
+        # Display runs inside the scheduled task, so a later edit of the same
+        # file cannot land before this call's diff is computed
+        with self._display_lock:
             self._display_tool_result(tool_name, arguments, result)
 
-            results.append({
-                'tool': tool_name,
-                'arguments': arguments,
-                'result': result
-            })
+    @staticmethod
+    def _live_tail(spinner: Spinner, label: str):
+        """Output listener that shows the newest output line in the spinner"""
+        width = max(20, shutil.get_terminal_size().columns - 16)
+        label = label if len(label) <= width // 2 else label[:width // 2 - 3] + "..."
+
+        def show(_stream: str, piece: str):
+            # Last line of the piece; progress bars redraw with \r, so its last segment
+            line = piece.rstrip('\r\n').rsplit('\n', 1)[-1].rsplit('\r', 1)[-1]
+            text = ANSI_ESCAPE.sub('', line).strip()
+            if text:
+                spinner.update_message(f"{label} | {text[:width - len(label) - 3]}")
 
-        return results
+        return show
 
     def _display_tool_result(self, tool_name: str, arguments: Dict[str, Any], result: str):
         """Display tool execution result with appropriate formatting"""
         file_path = arguments.get('file_path', '')
+        if file_path and tool_name in self.tools:
+            # Relative to the shell's directory, like the tool resolved it
+            file_path = self.tools[tool_name].resolve_path(file_path)
 
         if tool_name == "read_file":
             self._display_read_result(file_path, result)
@@ -55,7 +92,10 @@ class InteractiveToolExecutor(ToolExecutor):
             self._display_edit_result(file_path, arguments, result)
 
         elif tool_name == "bash":
-            self._display_bash_result(arguments.get('command', ''), result)
+            if arguments.get('background') and not result.startswith("Error:"):
+                print_info(result.splitlines()[0])
+            else:
+                self._display_bash_result(arguments.get('command', ''), result)
 
         elif tool_name == "glob":
             self._display_glob_result(arguments.get('pattern', ''), result)
@@ -63,6 +103,22 @@ class InteractiveToolExecutor(ToolExecutor):
         elif tool_name == "grep":
             self._display_grep_result(arguments.get('pattern', ''), result)
 
+        elif tool_name == "read_output":
+            if result.startswith("Error:"):
+                print_error(result)
+            else:
+                print_info(f"Reading stored output {arguments.get('handle', '')}")
+
+        elif tool_name in ("job_status", "job_output", "job_cancel"):
+            if result.startswith("Error:"):
+                print_error(result)
+            elif tool_name == "job_output":
+                print_info(f"Reading output of {arguments.get('job_id', '')}")
+                if self.verbose:
+                    print(f"{Colors.DIM}{result}{Colors.RESET}")
+            else:
+                print_info(result.splitlines()[0])
+
         else:
             # Generic display
             if "Error:" in result:
@@ -80,8 +136,6 @@ class InteractiveToolExecutor(ToolExecutor):
             lines = result.count('\n') + 1
             FileSummary.print_file_read(file_path, lines)
 
-            # Cache content for potential diffs later
-            self._file_cache[file_path] = result
 
             if self.verbose:
                 print(f"\n{Colors.DIM}{result}{Colors.RESET}\n")
@@ -106,20 +160,18 @@ class InteractiveToolExecutor(ToolExecutor):
 
     def _display_edit_result(self, file_path: str, arguments: Dict[str, Any], result: str):
         """Display file edit result with diff"""
+        old_content = self._edit_snapshots.pop(os.path.abspath(file_path), "")
+
         if result.startswith("Error:"):
             print_error(f"Failed to edit {file_path}")
             # Always show error details
             print(f"{Colors.DIM}{result}{Colors.RESET}")
             return
 
-        # Get old and new content
-        old_content = self._file_cache.get(file_path, "")
-
         # Read new content
         try:
             if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    new_content = f.read()
+                new_content = self._file_cache.get_text(file_path)
 
                 # Calculate changes
                 old_lines = old_content.splitlines()
@@ -134,9 +186,6 @@ class InteractiveToolExecutor(ToolExecutor):
                     DiffViewer.print_diff(old_content, new_content, file_path)
                 else:
                     print_info("No previous content cached to show diff")
-
-                # Update cache
-                self._file_cache[file_path] = new_content
             else:
                 FileSummary.print_file_modified(file_path)
         except Exception as e:
@@ -145,6 +194,15 @@ class InteractiveToolExecutor(ToolExecutor):
             else:
                 FileSummary.print_file_modified(file_path)
 
+    def _snapshot_before_edit(self, file_path: str):
+        """Remember a file's content before it is edited (writes to a path are serialized)"""
+        if not file_path:
+            return
+        try:
+            self._edit_snapshots[os.path.abspath(file_path)] = self._file_cache.get_text(file_path)
+        except (OSError, UnicodeDecodeError):
+            pass
+
     def _display_bash_result(self, command: str, result: str):
         """Display bash command result"""
         if result.startswith("Error:"):
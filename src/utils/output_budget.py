@@ -0,0 +1,180 @@
+"""Per-tool output budgets applied before results enter the conversation"""
+import posixpath
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from src.tools.output_tools import OutputStore
+
+
+# Characters of each tool's output that may enter the conversation
+DEFAULT_BUDGETS: Dict[str, int] = {
+    'read_file': 16000,
+    'grep': 6000,
+    'glob': 4000,
+    'bash': 6000,
+}
+DEFAULT_BUDGET = 8000
+
+# Outputs that are already paged and must not be stored again
+UNBUDGETED_TOOLS = frozenset({'read_output'})
+
+ERROR_LINE = re.compile(r'\b(error|errors|failed|failure|exception|traceback|fatal)\b', re.IGNORECASE)
+GREP_LINE = re.compile(r'^(.+?):\d+:')
+
+
+class OutputBudget:
+    """
+    Shortens tool outputs that exceed their budget
+
+    Repeated consecutive lines are collapsed first. If the output is still
+    too long, its head and tail are kept around a marker that says what was
+    left out (line range, per-file match counts for grep, per-directory
+    counts for glob, error lines for everything else). The full output is
+    put in the output store, and the marker gives its handle so the model
+    can page through it with the read_output tool.
+    """
+
+    # Characters set aside for the omission marker
+    MARKER_RESERVE = 400
+
+    def __init__(
+        self,
+        store: OutputStore,
+        budgets: Optional[Dict[str, int]] = None,
+        default_budget: int = DEFAULT_BUDGET,
+        head_fraction: float = 0.6
+    ):
+        """
+        Args:
+            store: Where full outputs are kept
+            budgets: Per-tool character budgets (merged over DEFAULT_BUDGETS)
+            default_budget: Budget for tools without an entry
+            head_fraction: Share of the budget given to the head of the output
+        """
+        self.store = store
+        self.budgets = dict(DEFAULT_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+        for name, budget in [*self.budgets.items(), ('default', default_budget)]:
+            if budget <= 0:
+                raise ValueError(f"Output budget for {name} must be positive, got {budget}")
+        self.default_budget = default_budget
+        self.head_fraction = head_fraction
+
+    def budget_for(self, tool_name: str) -> Optional[int]:
+        """Character budget for a tool (None = unlimited)"""
+        if tool_name in UNBUDGETED_TOOLS:
+            return None
+        return self.budgets.get(tool_name, self.default_budget)
+
+    def apply(self, tool_name: str, output: str) -> str:
+        """Return output as it should enter the conversation"""
+        budget = self.budget_for(tool_name)
+        if budget is None or len(output) <= budget:
+            return output
+
+        lines = output.splitlines()
+        compacted = self._collapse_repeats(lines)
+
+        text = "\n".join(line for _, line in compacted)
+        if len(text) <= budget:
+            return text
+
+        handle = self.store.put(tool_name, output)
+        head, tail = self._head_tail(compacted, budget)
+
+        first_omitted = head[-1][0] + 2 if head else 1
+        last_omitted = tail[0][0] if tail else len(lines)
+        omitted = lines[first_omitted - 1:last_omitted]
+
+        marker = (
+            f"[... lines {first_omitted}-{last_omitted} of {len(lines)} omitted "
+            f"({len(output) // 1024} KB in total){self._summarize(tool_name, omitted, first_omitted)}. "
+            f"Full output stored as {handle}: use read_output with handle \"{handle}\" and "
+            f"start_line={first_omitted} to page through it, or pattern to filter it]"
+        )
+
+        return "\n".join([line for _, line in head] + [marker] + [line for _, line in tail])
+
+    @staticmethod
+    def _collapse_repeats(lines: List[str]) -> List[Tuple[int, str]]:
+        """(index of original line, text) with runs of identical lines collapsed"""
+        compacted: List[Tuple[int, str]] = []
+        i = 0
+        while i < len(lines):
+            j = i + 1
+            while j < len(lines) and lines[j] == lines[i]:
+                j += 1
+
+            compacted.append((i, lines[i]))
+            repeats = j - i - 1
+            if repeats == 1:
+                compacted.append((i + 1, lines[i]))
+            elif repeats > 1:
+                compacted.append((j - 1, f"[previous line repeated {repeats} more times]"))
+            i = j
+        return compacted
+
+    def _head_tail(self, compacted: List[Tuple[int, str]], budget: int) -> Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]:
+        """Lines kept from the start and the end of the output"""
+        max_line = max(200, budget // 4)
+
+        def clip(entry: Tuple[int, str]) -> Tuple[int, str]:
+            index, line = entry
+            if len(line) > max_line:
+                line = f"{line[:max_line]}... [+{len(line) - max_line} chars]"
+            return index, line
+
+        # Reserve room for the marker line (a share of small budgets)
+        available = budget - min(self.MARKER_RESERVE, budget // 4)
+        head_budget = int(available * self.head_fraction)
+        tail_budget = max(0, available - head_budget)
+
+        head: List[Tuple[int, str]] = []
+        used = 0
+        for entry in compacted:
+            entry = clip(entry)
+            if used + len(entry[1]) + 1 > head_budget and head:
+                break
+            head.append(entry)
+            used += len(entry[1]) + 1
+
+        tail: List[Tuple[int, str]] = []
+        used = 0
+        for entry in reversed(compacted[len(head):]):
+            entry = clip(entry)
+            if used + len(entry[1]) + 1 > tail_budget:
+                break
+            tail.append(entry)
+            used += len(entry[1]) + 1
+        tail.reverse()
+
+        return head, tail
+
+    @staticmethod
+    def _summarize(tool_name: str, omitted: List[str], first_line: int) -> str:
+        """Short description of the omitted lines"""
+        if not omitted:
+            return ""
+
+        if tool_name == 'grep':
+            files = Counter()
+            for line in omitted:
+                match = GREP_LINE.match(line)
+                if match:
+                    files[match.group(1)] += 1
+            if files:
+                top = ", ".join(f"{path} ({count})" for path, count in files.most_common(8))
+                more = f", +{len(files) - 8} more files" if len(files) > 8 else ""
+                return f"; omitted matches by file: {top}{more}"
+
+        if tool_name == 'glob':
+            dirs = Counter(posixpath.dirname(line.replace('\\', '/')) or '.' for line in omitted)
+            top = ", ".join(f"{path}/ ({count})" for path, count in dirs.most_common(8))
+            more = f", +{len(dirs) - 8} more directories" if len(dirs) > 8 else ""
+            return f"; omitted files by directory: {top}{more}"
+
+        errors = [first_line + i for i, line in enumerate(omitted) if ERROR_LINE.search(line)]
+        if errors:
+            return f"; {len(errors)} omitted line(s) mention errors, first at line {errors[0]}"
+        return ""
@@ -1,6 +1,5 @@
 """Parse AI responses for tool calls"""
 import json
-import re
 from typing import Optional, Dict, Any, List, Tuple
 
 
@@ -12,37 +11,32 @@ class ResponseParser:
         """
         Extract tool calls from AI response.
         Returns: (text_content, tool_calls)
+
+        Uses the same rules as StreamingToolCallParser (it parses the
+        block), so a streamed response runs the same calls as a complete one.
         """
-        # Try to find JSON with tool_calls (match multi-line JSON properly with non-greedy)
-        json_pattern = r'```json\s*(\{.*?\})\s*```'
-        json_match = re.search(json_pattern, response, re.DOTALL)
-
-        if json_match:
-            try:
-                json_str = json_match.group(1)
-                data = json.loads(json_str)
-
-                if 'tool_calls' in data:
-                    # Extract text before and after JSON
-                    text_parts = response.split('```json')
-                    text_before = text_parts[0].strip()
-                    text_after = text_parts[1].split('```', 1)[1].strip() if len(text_parts[1].split('```', 1)) > 1 else ""
-
-                    text_content = f"{text_before}\n{text_after}".strip()
-
-                    return (text_content or None, data['tool_calls'])
-            except json.JSONDecodeError as e:
-                # JSON parsing failed - return as text with error info
-                print(f"[DEBUG] JSON parsing failed: {e}")
-                print(f"[DEBUG] Attempted to parse: {json_str[:200]}...")
-                pass
-            except Exception as e:
-                print(f"[DEBUG] Unexpected error in extract_tool_calls: {e}")
-                pass
+        start = response.find(StreamingToolCallParser.FENCE_OPEN)
+        if start == -1:
+            return (response, None)
+
+        parser = StreamingToolCallParser()
+        parser.feed(response[start:])
+        parser.close()
+
+        if parser.tool_calls:
+            # Text before the block and after it (later blocks stay text)
+            text_content = f"{response[:start].strip()}\n{parser.visible_text.strip()}".strip()
+            return (text_content or None, parser.tool_calls)
 
         # No tool calls found, return full response as text
         return (response, None)
 
+    @staticmethod
+    def format_tool_calls(tool_calls: List[Dict[str, Any]]) -> str:
+        """Render tool calls as the ```json block the text protocol uses"""
+        calls = [{"name": call.get('name'), "arguments": call.get('arguments', {})} for call in tool_calls]
+        return "```json\n" + json.dumps({"tool_calls": calls}, indent=2, ensure_ascii=False) + "\n```"
+
     @staticmethod
     def format_tool_results(results: List[Dict[str, Any]]) -> str:
         """Format tool execution results for display"""
@@ -57,3 +51,316 @@ class ResponseParser:
             output.append("")
 
         return "\n".join(output)
+
+
+class StreamingToolCallParser:
+    """
+    Incremental parser for streamed AI responses.
+
+    Fed chunk-by-chunk, it tracks ```json fences with a small state machine
+    and returns each element of a `tool_calls` array as soon as its closing
+    brace arrives, so tools can start before the model finishes speaking.
+
+    Only the first ```json block is read for calls; later blocks are
+    ignored (and hidden like the first). An element is a call once it is
+    complete JSON with a name, even if the rest of the block turns out
+    malformed (it has already started). Text outside the blocks is kept
+    separately for display.
+    """
+
+    FENCE_OPEN = '```json'
+    FENCE_CLOSE = '```'
+
+    # Parser states
+    TEXT = 'text'          # plain text, looking for ```json
+    FENCE = 'fence'        # inside fence, waiting for the JSON object
+    JSON = 'json'          # inside the JSON object
+    SKIP = 'skip'          # JSON done (or not an object), waiting for ```
+    DONE = 'done'          # first block closed, later blocks are hidden
+
+    def __init__(self):
+        self.state = self.TEXT
+        self._chunks: List[str] = []
+        self._visible: List[str] = []
+        self._visible_taken = 0
+        self._held = ''
+        self._hiding = False  # inside a later ```json block (DONE state)
+        self.tool_calls: List[Dict[str, Any]] = []
+        self._reset_json()
+
+    def _reset_json(self):
+        """Reset per-object JSON scanning state"""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_chars: List[str] = []
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._in_calls = False
+        self._element: Optional[List[str]] = None
+
+    @property
+    def text(self) -> str:
+        """Full raw response received so far"""
+        return "".join(self._chunks)
+
+    @property
+    def visible_text(self) -> str:
+        """Response text with ```json blocks removed"""
+        return "".join(self._visible)
+
+    def take_visible(self) -> str:
+        """Return visible text produced since the last call"""
+        new_parts = self._visible[self._visible_taken:]
+        self._visible_taken = len(self._visible)
+        return "".join(new_parts)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk and return tool calls completed by it"""
+        self._chunks.append(chunk)
+        completed = []
+
+        for i, char in enumerate(chunk):
+            if self.state == self.DONE:
+                self._scan_after(chunk[i:])
+                break
+            if self.state == self.TEXT:
+                self._scan_text(char)
+            elif self.state == self.FENCE:
+                self._scan_fence(char)
+            elif self.state == self.JSON:
+                call = self._scan_json(char)
+                if call is not None:
+                    completed.append(call)
+            else:
+                self._scan_skip(char)
+
+        self.tool_calls.extend(completed)
+        return completed
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush remaining state at end of stream"""
+        if (self.state == self.TEXT or (self.state == self.DONE and not self._hiding)) and self._held:
+            self._visible.append(self._held)
+        self._held = ''
+        return []
+
+    def _scan_text(self, char: str):
+        """Match the opening fence, releasing anything that cannot be part of it"""
+        self._held += char
+        released = []
+        while self._held and not self.FENCE_OPEN.startswith(self._held):
+            released.append(self._held[0])
+            self._held = self._held[1:]
+        if released:
+            self._visible.append("".join(released))
+
+        if self._held == self.FENCE_OPEN:
+            self._held = ''
+            self.state = self.FENCE
+
+    def _scan_after(self, text: str):
+        """After the first block: release text, dropping later ```json blocks"""
+        text = self._held + text
+        self._held = ''
+        pos = 0
+        while pos < len(text):
+            if self._hiding:
+                end = text.find(self.FENCE_CLOSE, pos)
+                if end == -1:
+                    # Backticks at the end may start the closing fence
+                    tail = text[pos:]
+                    self._held = tail[len(tail.rstrip('`')):]
+                    return
+                pos = end + len(self.FENCE_CLOSE)
+                self._hiding = False
+                continue
+
+            begin = text.find(self.FENCE_OPEN, pos)
+            if begin == -1:
+                # Hold back a possible partial opening fence
+                tail = text[pos:]
+                keep = next((k for k in range(min(len(tail), len(self.FENCE_OPEN) - 1), 0, -1)
+                             if self.FENCE_OPEN.startswith(tail[-k:])), 0)
+                if len(tail) > keep:
+                    self._visible.append(tail[:len(tail) - keep])
+                self._held = tail[len(tail) - keep:]
+                return
+            if begin > pos:
+                self._visible.append(text[pos:begin])
+            pos = begin + len(self.FENCE_OPEN)
+            self._hiding = True
+
+    def _scan_fence(self, char: str):
+        """Wait for the JSON object that opens the fenced block"""
+        if char.isspace():
+            return
+        if char == '{':
+            self._reset_json()
+            self._stack.append('{')
+            self.state = self.JSON
+            return
+        # Not an object (or an empty fence): wait for the closing fence
+        self.state = self.SKIP
+        self._scan_skip(char)
+
+    def _scan_skip(self, char: str):
+        """Discard fenced content until the closing ```"""
+        if char == '`':
+            self._held += char
+            if self._held == self.FENCE_CLOSE:
+                self._held = ''
+                self.state = self.DONE
+        else:
+            self._held = ''
+
+    def _scan_json(self, char: str) -> Optional[Dict[str, Any]]:
+        """Advance the JSON scanner by one character"""
+        if self._element is not None:
+            self._element.append(char)
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if len(self._stack) == 1:
+                    self._last_string = "".join(self._string_chars)
+                return None
+            if len(self._stack) == 1:
+                self._string_chars.append(char)
+            return None
+
+        if char == '"':
+            self._in_string = True
+            self._string_chars = []
+        elif char == ':' and len(self._stack) == 1:
+            self._key = self._last_string
+        elif char == ',' and len(self._stack) == 1:
+            self._key = None
+        elif char in '{[':
+            if char == '[' and len(self._stack) == 1 and self._key == 'tool_calls':
+                self._in_calls = True
+            elif char == '{' and self._in_calls and len(self._stack) == 2:
+                self._element = ['{']
+            self._stack.append(char)
+        elif char in '}]':
+            if self._stack:
+                self._stack.pop()
+
+            if self._in_calls and len(self._stack) == 2 and char == '}' and self._element is not None:
+                element = "".join(self._element)
+                self._element = None
+                return self._parse_element(element)
+
+            if self._in_calls and len(self._stack) == 1:
+                self._in_calls = False
+
+            if not self._stack:
+                self.state = self.SKIP
+                self._held = ''
+
+        return None
+
+    @staticmethod
+    def _parse_element(element: str) -> Optional[Dict[str, Any]]:
+        """Decode one tool_calls element"""
+        try:
+            call = json.loads(element)
+        except json.JSONDecodeError as e:
+            print(f"[DEBUG] JSON parsing failed: {e}")
+            print(f"[DEBUG] Attempted to parse: {element[:200]}...")
+            return None
+
+        if isinstance(call, dict) and call.get('name'):
+            return call
+        return None
+
+
+def native_tool_call(call_id: Optional[str], name: str, arguments: Optional[str]) -> Dict[str, Any]:
+    """
+    Tool call dict (as executed by ToolExecutor) from a native function call
+
+    Arguments that are not valid JSON become {}, so the tool reports the
+    missing parameters and the call still gets a result.
+    """
+    try:
+        parsed = json.loads(arguments) if arguments else {}
+    except json.JSONDecodeError as e:
+        print(f"[DEBUG] JSON parsing failed: {e}")
+        print(f"[DEBUG] Attempted to parse: {arguments[:200]}...")
+        parsed = {}
+
+    return {
+        'id': call_id,
+        'name': name,
+        'arguments': parsed if isinstance(parsed, dict) else {}
+    }
+
+
+class ToolCallAssembler:
+    """
+    Assembles streamed `delta.tool_calls` fragments into complete tool calls
+
+    Fragments carry an index; the id and function name arrive first and the
+    arguments JSON in pieces. Calls are streamed in index order, so a call
+    is complete as soon as a fragment for a later index arrives; the last
+    one completes at the end of the stream.
+    """
+
+    def __init__(self):
+        self._partial: Dict[int, Dict[str, Any]] = {}
+        self._emitted = -1
+        self.tool_calls: List[Dict[str, Any]] = []
+
+    @property
+    def started(self) -> bool:
+        """Whether any tool call fragment has been received"""
+        return bool(self._partial) or bool(self.tool_calls)
+
+    def feed(self, fragments) -> List[Dict[str, Any]]:
+        """Consume one delta's tool_calls and return tool calls completed by it"""
+        completed = []
+        for fragment in fragments or []:
+            index = getattr(fragment, 'index', None)
+            if index is None:
+                index = self._emitted + 1 + len(self._partial)
+            if index <= self._emitted:
+                continue
+
+            if any(i < index for i in self._partial):
+                completed.extend(self._complete_before(index))
+
+            partial = self._partial.setdefault(index, {'id': None, 'name': '', 'arguments': []})
+            if getattr(fragment, 'id', None):
+                partial['id'] = fragment.id
+            function = getattr(fragment, 'function', None)
+            if function is not None:
+                if getattr(function, 'name', None):
+                    partial['name'] += function.name
+                if getattr(function, 'arguments', None):
+                    partial['arguments'].append(function.arguments)
+
+        self.tool_calls.extend(completed)
+        return completed
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Complete the remaining calls at the end of the stream"""
+        completed = self._complete_before(None)
+        self.tool_calls.extend(completed)
+        return completed
+
+    def _complete_before(self, index: Optional[int]) -> List[Dict[str, Any]]:
+        completed = []
+        for i in sorted(self._partial):
+            if index is not None and i >= index:
+                break
+            partial = self._partial.pop(i)
+            self._emitted = i
+            if partial['name']:
+                completed.append(native_tool_call(
+                    partial['id'] or f"call_{i}", partial['name'], "".join(partial['arguments'])
+                ))
+        return completed
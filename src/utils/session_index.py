@@ -0,0 +1,171 @@
+"""SQLite catalog of saved sessions for fast listing and search"""
+import sqlite3
+from typing import List, Dict, Any, Optional
+
+
+class SessionIndex:
+    """
+    Small SQLite index over the sessions directory
+
+    Holds one row of metadata per session (so listing never opens session
+    files) and, optionally, the message text for keyword search. Uses an
+    FTS5 table when SQLite supports it, otherwise falls back to LIKE.
+    SessionManager keeps it up to date on save/delete; rebuild it from disk
+    with SessionManager.rebuild_index().
+    """
+
+    def __init__(self, db_path: str, index_content: bool = True):
+        """
+        Initialize index
+
+        Args:
+            db_path: Path of the SQLite database file
+            index_content: Also index message text for keyword search
+        """
+        self.db_path = db_path
+        self.index_content = index_content
+        self.conn = sqlite3.connect(db_path)
+        self.fts = False
+        self._create_tables()
+
+    def _create_tables(self):
+        """Create tables if they don't exist"""
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                name TEXT PRIMARY KEY,
+                created_at TEXT,
+                updated_at TEXT,
+                message_count INTEGER,
+                size_kb REAL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS sessions_created ON sessions(created_at)")
+
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5(name UNINDEXED, seq UNINDEXED, content)"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages (name TEXT, seq INTEGER, content TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS messages_name ON messages(name)")
+
+        self.conn.commit()
+
+    def upsert(self, info: Dict[str, Any]):
+        """Insert or update a session's metadata"""
+        self.conn.execute(
+            """INSERT OR REPLACE INTO sessions (name, created_at, updated_at, message_count, size_kb)
+               VALUES (?, ?, ?, ?, ?)""",
+            (
+                info['name'],
+                info.get('created_at'),
+                info.get('updated_at'),
+                info.get('message_count', 0),
+                info.get('size_kb', 0.0)
+            )
+        )
+        self.conn.commit()
+
+    def add_messages(self, name: str, messages: List[Dict[str, str]], start_seq: int = 0):
+        """Index the text of newly saved messages"""
+        if not self.index_content or not messages:
+            return
+
+        self.conn.executemany(
+            "INSERT INTO messages (name, seq, content) VALUES (?, ?, ?)",
+            [
+                (name, start_seq + i, message.get('content', ''))
+                for i, message in enumerate(messages)
+            ]
+        )
+        self.conn.commit()
+
+    def replace_messages(self, name: str, messages: List[Dict[str, str]]):
+        """Re-index all message text of a rewritten session"""
+        self.conn.execute("DELETE FROM messages WHERE name = ?", (name,))
+        self.add_messages(name, messages)
+        self.conn.commit()
+
+    def remove(self, name: str):
+        """Drop a session from the index"""
+        self.conn.execute("DELETE FROM sessions WHERE name = ?", (name,))
+        self.conn.execute("DELETE FROM messages WHERE name = ?", (name,))
+        self.conn.commit()
+
+    def clear(self):
+        """Drop everything (before a rebuild)"""
+        self.conn.execute("DELETE FROM sessions")
+        self.conn.execute("DELETE FROM messages")
+        self.conn.commit()
+
+    def search(
+        self,
+        name: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find sessions, newest first
+
+        Args:
+            name: Substring of the session name
+            since: Earliest created_at (ISO date/time, inclusive)
+            until: Latest created_at (ISO date/time, inclusive prefix match)
+            keyword: Word or phrase that must appear in a message
+            limit: Maximum number of results
+        """
+        query = "SELECT name, created_at, updated_at, message_count, size_kb FROM sessions"
+        conditions = []
+        params: List[Any] = []
+
+        if name:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            params.append('%' + name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+
+        if since:
+            conditions.append("created_at >= ?")
+            params.append(since)
+
+        if until:
+            # '~' sorts after digits, so a date prefix includes the whole day
+            conditions.append("created_at <= ?")
+            params.append(until + '~')
+
+        if keyword:
+            if self.fts:
+                phrase = '"' + keyword.replace('"', '""') + '"'
+                conditions.append("name IN (SELECT name FROM messages WHERE messages MATCH ?)")
+                params.append(f"content:{phrase}")
+            else:
+                conditions.append("name IN (SELECT name FROM messages WHERE content LIKE ?)")
+                params.append(f"%{keyword}%")
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        query += " ORDER BY created_at DESC"
+
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return [
+            {
+                'name': row[0],
+                'created_at': row[1],
+                'updated_at': row[2],
+                'message_count': row[3],
+                'size_kb': row[4]
+            }
+            for row in self.conn.execute(query, params)
+        ]
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
@@ -1,21 +1,75 @@
 """Session manager for conversation persistence"""
 import json
 import os
+import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from .session_index import SessionIndex
 
 
 class SessionManager:
-    """Manage conversation sessions with local storage"""
+    """
+    Manage conversation sessions with local storage
+
+    Each session is an append-only JSONL log (`<name>.jsonl`, one message per
+    line) plus a small metadata file (`<name>.meta.json`) replaced atomically.
+    Saving a conversation that only grew appends the new messages, so save
+    cost is O(new messages); a crash mid-write can only lose the last line.
+    Legacy `<name>.json` sessions are still loaded and migrated on next save.
+    A SQLite catalog (`index.sqlite`) answers list/search without opening
+    session files.
+    """
+
+    LOG_EXT = '.jsonl'
+    META_EXT = '.meta.json'
+    LEGACY_EXT = '.json'
+    INDEX_FILE = 'index.sqlite'
+
+    # fsync policies: 'always' (every save), 'interval' (at most every
+    # fsync_interval seconds), 'never' (leave it to the OS)
+    FSYNC_POLICIES = ('always', 'interval', 'never')
+
+    def __init__(
+        self,
+        sessions_dir: str = ".termicode_sessions",
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        index_content: bool = True
+    ):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {self.FSYNC_POLICIES}, got '{fsync}'")
 
-    def __init__(self, sessions_dir: str = ".termicode_sessions"):
         self.sessions_dir = sessions_dir
         self.current_session_file: Optional[str] = None
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = 0.0
+
+        # What the current log already contains (for append-only saves)
+        self._saved_count = 0
+        self._saved_last: Optional[Dict[str, str]] = None
+        self._created_at: Optional[str] = None
 
         # Create sessions directory if not exists
         if not os.path.exists(sessions_dir):
             os.makedirs(sessions_dir)
 
+        # Session catalog; built from disk the first time it is created
+        index_path = os.path.join(sessions_dir, self.INDEX_FILE)
+        index_exists = os.path.exists(index_path)
+        self.index = SessionIndex(index_path, index_content=index_content)
+        if not index_exists:
+            self.rebuild_index()
+
+    def _path(self, session_name: str, ext: str) -> str:
+        """Path of a session file with the given extension"""
+        return os.path.join(self.sessions_dir, f"{session_name}{ext}")
+
+    @classmethod
+    def _session_name(cls, session_file: str) -> str:
+        """Session name from its log file path"""
+        return os.path.basename(session_file)[:-len(cls.LOG_EXT)]
+
     def create_session(self, session_name: Optional[str] = None) -> str:
         """Create new session and return session file path"""
         if session_name is None:
@@ -23,25 +77,45 @@ class SessionManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             session_name = f"session_{timestamp}"
 
-        session_file = os.path.join(self.sessions_dir, f"{session_name}.json")
+        session_file = self._path(session_name, self.LOG_EXT)
         self.current_session_file = session_file
+        self._created_at = datetime.now().isoformat()
 
         # Initialize empty session
-        self._save_session([])
+        self._rewrite_log([])
         return session_file
 
     def load_session(self, session_name: str) -> List[Dict[str, str]]:
         """Load conversation history from session file"""
-        session_file = os.path.join(self.sessions_dir, f"{session_name}.json")
+        session_file = self._path(session_name, self.LOG_EXT)
+        legacy_file = self._path(session_name, self.LEGACY_EXT)
 
-        if not os.path.exists(session_file):
-            raise FileNotFoundError(f"Session '{session_name}' not found")
+        if os.path.exists(session_file):
+            history, intact = self._read_log(session_file)
+            meta = self._read_meta(session_name)
+            self._created_at = meta.get('created_at')
+            self.current_session_file = session_file
+            self._mark_saved(history)
+            if not intact:
+                # Never append after a torn record; the next save rewrites the log
+                self._saved_last = None
+                self._saved_count = len(history) + 1
+            return history
 
-        self.current_session_file = session_file
+        if not os.path.exists(legacy_file):
+            raise FileNotFoundError(f"Session '{session_name}' not found")
 
-        with open(session_file, 'r', encoding='utf-8') as f:
+        with open(legacy_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
-            return data.get('history', [])
+
+        history = data.get('history', [])
+        self._created_at = data.get('created_at')
+
+        # Migrate to the JSONL log on first save
+        self.current_session_file = session_file
+        self._saved_count = 0
+        self._saved_last = None
+        return history
 
     def save_message(self, conversation_history: List[Dict[str, str]]):
         """Save current conversation to session file"""
@@ -51,58 +125,239 @@ class SessionManager:
         self._save_session(conversation_history)
 
     def _save_session(self, conversation_history: List[Dict[str, str]]):
-        """Internal method to save session data"""
-        session_data = {
-            'created_at': datetime.now().isoformat(),
-            'message_count': len(conversation_history),
-            'history': conversation_history
+        """Internal method to save session data (append-only when possible)"""
+        saved = self._saved_count
+        is_continuation = (
+            os.path.exists(self.current_session_file)
+            and len(conversation_history) >= saved
+            and (saved == 0 or conversation_history[saved - 1] is self._saved_last)
+        )
+
+        if not is_continuation:
+            # History was cleared or rewritten: replace the log atomically
+            self._rewrite_log(conversation_history)
+            return
+
+        new_messages = conversation_history[saved:]
+        if new_messages:
+            with open(self.current_session_file, 'a', encoding='utf-8') as f:
+                for message in new_messages:
+                    f.write(json.dumps(message, ensure_ascii=False) + "\n")
+                self._maybe_fsync(f)
+
+        session_name = self._session_name(self.current_session_file)
+        self.index.add_messages(session_name, new_messages, start_seq=saved)
+
+        self._mark_saved(conversation_history)
+        self._write_meta(len(conversation_history))
+
+    def _rewrite_log(self, conversation_history: List[Dict[str, str]]):
+        """Write the whole log to a temp file and atomically replace the old one"""
+        tmp_file = self.current_session_file + '.tmp'
+
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for message in conversation_history:
+                f.write(json.dumps(message, ensure_ascii=False) + "\n")
+            f.flush()
+            if self.fsync != 'never':
+                os.fsync(f.fileno())
+
+        os.replace(tmp_file, self.current_session_file)
+
+        # A migrated legacy session now lives in the log
+        session_name = self._session_name(self.current_session_file)
+        legacy_file = self._path(session_name, self.LEGACY_EXT)
+        if os.path.exists(legacy_file):
+            os.remove(legacy_file)
+
+        self.index.replace_messages(session_name, conversation_history)
+
+        self._mark_saved(conversation_history)
+        self._write_meta(len(conversation_history))
+
+    def _mark_saved(self, conversation_history: List[Dict[str, str]]):
+        """Remember how much of the history the log holds"""
+        self._saved_count = len(conversation_history)
+        self._saved_last = conversation_history[-1] if conversation_history else None
+
+    def _maybe_fsync(self, f):
+        """Flush to disk according to the fsync policy"""
+        if self.fsync == 'never':
+            return
+
+        now = time.monotonic()
+        if self.fsync == 'always' or now - self._last_fsync >= self.fsync_interval:
+            f.flush()
+            os.fsync(f.fileno())
+            self._last_fsync = now
+
+    def _write_meta(self, message_count: int):
+        """Atomically replace the session metadata file"""
+        session_name = self._session_name(self.current_session_file)
+        meta_file = self._path(session_name, self.META_EXT)
+        now = datetime.now().isoformat()
+
+        meta = {
+            'created_at': self._created_at or now,
+            'updated_at': now,
+            'message_count': message_count
         }
 
-        with open(self.current_session_file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=2, ensure_ascii=False)
+        tmp_file = meta_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_file, meta_file)
 
-    def list_sessions(self) -> List[Dict[str, Any]]:
-        """List all available sessions"""
-        sessions = []
+        self.index.upsert({
+            'name': session_name,
+            **meta,
+            'size_kb': os.path.getsize(self.current_session_file) / 1024
+        })
 
-        for filename in os.listdir(self.sessions_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(self.sessions_dir, filename)
+    def _read_meta(self, session_name: str) -> Dict[str, Any]:
+        """Read session metadata (empty dict if missing or unreadable)"""
+        meta_file = self._path(session_name, self.META_EXT)
 
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        sessions.append({
-                            'name': filename.replace('.json', ''),
-                            'created_at': data.get('created_at'),
-                            'message_count': data.get('message_count', 0)
-                        })
-                except Exception:
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _read_log(session_file: str) -> Tuple[List[Dict[str, str]], bool]:
+        """
+        Read messages from a JSONL log, skipping torn records
+
+        Returns (history, intact); intact is False when a record from an
+        interrupted save was found.
+        """
+        history = []
+        intact = True
+
+        with open(session_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    intact = False
+                line = line.strip()
+                if not line:
                     continue
+                try:
+                    history.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Partially written record from an interrupted save
+                    intact = False
+
+        return history, intact
+
+    def compact_session(self, session_name: str) -> Dict[str, Any]:
+        """
+        Rewrite a session log from scratch (drops torn lines, migrates legacy
+        .json files) and return its updated info
+        """
+        history = self.load_session(session_name)
+        self._rewrite_log(history)
+        return self.get_session_info(session_name)
+
+    def _session_names(self) -> List[str]:
+        """Names of all sessions on disk (JSONL logs and legacy files)"""
+        names = set()
+
+        for filename in os.listdir(self.sessions_dir):
+            if filename.endswith(self.META_EXT):
+                continue
+            if filename.endswith(self.LOG_EXT):
+                names.add(filename[:-len(self.LOG_EXT)])
+            elif filename.endswith(self.LEGACY_EXT):
+                names.add(filename[:-len(self.LEGACY_EXT)])
+
+        return sorted(names)
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """List all available sessions (from the index, newest first)"""
+        return [
+            {
+                'name': session['name'],
+                'created_at': session['created_at'],
+                'message_count': session['message_count']
+            }
+            for session in self.index.search()
+        ]
 
-        # Sort by created_at descending
-        sessions.sort(key=lambda x: x['created_at'], reverse=True)
-        return sessions
+    def search_sessions(
+        self,
+        name: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search sessions by name substring, creation date range and/or message keyword
+
+        Example: search_sessions(since="2025-10-01", keyword="migration")
+        """
+        return self.index.search(name=name, since=since, until=until, keyword=keyword, limit=limit)
+
+    def rebuild_index(self) -> int:
+        """Rebuild the session catalog from the files on disk; returns the session count"""
+        self.index.clear()
+
+        for session_name in self._session_names():
+            try:
+                info = self.get_session_info(session_name)
+                self.index.upsert(info)
+
+                if self.index.index_content:
+                    session_file = self._path(session_name, self.LOG_EXT)
+                    if os.path.exists(session_file):
+                        history = self._read_log(session_file)[0]
+                    else:
+                        with open(self._path(session_name, self.LEGACY_EXT), 'r', encoding='utf-8') as f:
+                            history = json.load(f).get('history', [])
+                    self.index.add_messages(session_name, history)
+            except Exception:
+                continue
+
+        return len(self.index.search())
 
     def delete_session(self, session_name: str):
-        """Delete a session file"""
-        session_file = os.path.join(self.sessions_dir, f"{session_name}.json")
+        """Delete a session's files"""
+        for ext in (self.LOG_EXT, self.META_EXT, self.LEGACY_EXT):
+            session_file = self._path(session_name, ext)
 
-        if os.path.exists(session_file):
-            os.remove(session_file)
+            if os.path.exists(session_file):
+                os.remove(session_file)
+
+        self.index.remove(session_name)
 
     def get_session_info(self, session_name: str) -> Dict[str, Any]:
         """Get session metadata"""
-        session_file = os.path.join(self.sessions_dir, f"{session_name}.json")
+        session_file = self._path(session_name, self.LOG_EXT)
+
+        if os.path.exists(session_file):
+            meta = self._read_meta(session_name)
+            if 'message_count' not in meta:
+                meta['message_count'] = len(self._read_log(session_file)[0])
+
+            return {
+                'name': session_name,
+                'created_at': meta.get('created_at'),
+                'updated_at': meta.get('updated_at'),
+                'message_count': meta.get('message_count', 0),
+                'size_kb': os.path.getsize(session_file) / 1024
+            }
 
-        if not os.path.exists(session_file):
+        legacy_file = self._path(session_name, self.LEGACY_EXT)
+        if not os.path.exists(legacy_file):
             raise FileNotFoundError(f"Session '{session_name}' not found")
 
-        with open(session_file, 'r', encoding='utf-8') as f:
+        with open(legacy_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
             return {
                 'name': session_name,
                 'created_at': data.get('created_at'),
+                'updated_at': data.get('created_at'),
                 'message_count': data.get('message_count', 0),
-                'size_kb': os.path.getsize(session_file) / 1024
+                'size_kb': os.path.getsize(legacy_file) / 1024
             }
@@ -0,0 +1,152 @@
+"""Background summarization of conversation history evicted from the context"""
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from src.prompts import SUMMARY_PROMPT
+
+
+class HistorySummarizer:
+    """
+    Rolling summaries of old conversation history, produced in the background
+
+    History is split into fixed chunks of chunk_size messages. The summary of
+    chunk k is built from the summary of chunk k-1 plus chunk k's messages,
+    so the newest ready summary covers everything before it and prompt size
+    stays flat. Summaries are cached by a hash chained over the chunk
+    contents, so unchanged history is never summarized twice.
+    """
+
+    # Per-message character cap when feeding messages to the summarizer
+    MAX_MESSAGE_CHARS = 2000
+
+    def __init__(self, ai_client, chunk_size: int = 8, max_summary_tokens: int = 500):
+        """
+        Initialize summarizer
+
+        Args:
+            ai_client: AIClient used for summarization requests
+            chunk_size: Number of messages condensed per summarization step
+            max_summary_tokens: Completion limit for each summary
+        """
+        self.ai_client = ai_client
+        self.chunk_size = chunk_size
+        self.max_summary_tokens = max_summary_tokens
+
+        self._summaries: Dict[str, str] = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker: Optional[ThreadPoolExecutor] = None
+
+        # Chained chunk keys for the current history (append-only, like ContextManager's prefix sums)
+        self._keys: List[str] = []
+        self._keys_owner: Optional[List[Dict[str, str]]] = None
+        self._keys_last: List[Dict[str, str]] = []
+
+    def _chunk_keys(self, history: List[Dict[str, str]], end: int) -> List[str]:
+        """Chained hash keys for the complete chunks in history[:end]"""
+        count = end // self.chunk_size
+
+        cached = len(self._keys)
+        if self._keys_owner is not history or (cached and (
+            len(history) < cached * self.chunk_size
+            or history[cached * self.chunk_size - 1] is not self._keys_last[-1]
+        )):
+            self._keys = []
+            self._keys_last = []
+            self._keys_owner = history
+
+        while len(self._keys) < count:
+            k = len(self._keys)
+            chunk = history[k * self.chunk_size:(k + 1) * self.chunk_size]
+            digest = hashlib.sha256()
+            digest.update((self._keys[-1] if self._keys else "").encode('utf-8'))
+            digest.update(json.dumps(chunk, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+            self._keys.append(digest.hexdigest())
+            self._keys_last.append(chunk[-1])
+
+        return self._keys[:count]
+
+    def schedule(self, history: List[Dict[str, str]], end: int):
+        """Summarize complete chunks of history[:end] in the background (non-blocking)"""
+        keys = self._chunk_keys(history, end)
+
+        with self._lock:
+            for k, key in enumerate(keys):
+                if key in self._summaries or key in self._pending:
+                    continue
+
+                if self._worker is None:
+                    self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="termicode-summary")
+
+                chunk = history[k * self.chunk_size:(k + 1) * self.chunk_size]
+                previous_key = keys[k - 1] if k > 0 else None
+                self._pending.add(key)
+                # Single worker: chunk k-1 is always processed before chunk k
+                self._worker.submit(self._summarize, key, previous_key, chunk)
+
+    def latest(self, history: List[Dict[str, str]], end: int) -> Tuple[int, Optional[str]]:
+        """
+        Newest ready summary covering a prefix of history[:end]
+
+        Returns (covered_end, summary); covered_end is 0 when nothing is ready.
+        """
+        keys = self._chunk_keys(history, end)
+
+        with self._lock:
+            for k in range(len(keys) - 1, -1, -1):
+                summary = self._summaries.get(keys[k])
+                if summary:
+                    return (k + 1) * self.chunk_size, summary
+
+        return 0, None
+
+    def _summarize(self, key: str, previous_key: Optional[str], chunk: List[Dict[str, str]]):
+        """Worker: condense one chunk on top of the previous summary"""
+        try:
+            with self._lock:
+                previous = self._summaries.get(previous_key) if previous_key else None
+
+            if previous_key and previous is None:
+                # Previous chunk failed; a summary here would silently drop it
+                return
+
+            lines = []
+            for message in chunk:
+                content = message.get('content', '')
+                if len(content) > self.MAX_MESSAGE_CHARS:
+                    content = content[:self.MAX_MESSAGE_CHARS] + " ...[truncated]"
+                lines.append(f"{message.get('role', 'user').upper()}: {content}")
+
+            request = (
+                f"Previous summary:\n{previous or '(none)'}\n\n"
+                f"New messages:\n" + "\n\n".join(lines)
+            )
+
+            response = self.ai_client.chat(
+                [
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": request}
+                ],
+                temperature=0.2,
+                max_tokens=self.max_summary_tokens
+            )
+
+            with self._lock:
+                if response.content:
+                    self._summaries[key] = response.content.strip()
+        except Exception:
+            # Leave it unsummarized; the next schedule() call retries
+            pass
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def shutdown(self):
+        """Stop the background worker"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker:
+            worker.shutdown(wait=False)
@@ -0,0 +1,152 @@
+"""Token counting for context management"""
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+
+class Tokenizer(ABC):
+    """Base class for token counters"""
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Tokenizer name (shown in context stats)"""
+        pass
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Count tokens in text"""
+        pass
+
+
+class HeuristicTokenizer(Tokenizer):
+    """Rough approximation: 4 chars ≈ 1 token"""
+
+    @property
+    def name(self) -> str:
+        return "heuristic"
+
+    def count(self, text: str) -> int:
+        return len(text) // 4
+
+
+def _bytes_to_unicode() -> Dict[int, str]:
+    """Byte-level BPE byte -> printable unicode mapping (GPT-2 scheme)"""
+    printable = (
+        list(range(ord("!"), ord("~") + 1))
+        + list(range(ord("¡"), ord("¬") + 1))
+        + list(range(ord("®"), ord("ÿ") + 1))
+    )
+    mapping = {b: chr(b) for b in printable}
+    offset = 0
+    for b in range(256):
+        if b not in mapping:
+            mapping[b] = chr(256 + offset)
+            offset += 1
+    return mapping
+
+
+class BPETokenizer(Tokenizer):
+    """
+    Byte-level BPE tokenizer loaded from a HuggingFace tokenizer.json
+
+    Uses the `tokenizers` package for exact counts when it is installed,
+    otherwise runs the BPE merges in pure Python (pre-tokenization is an
+    approximation of the model's regex, so counts may differ slightly).
+    """
+
+    # GPT-2 style pre-tokenization, expressed with the stdlib `re` module
+    PRETOKENIZE_PATTERN = re.compile(
+        r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d+| ?(?:[^\s\w]|_)+|\s+(?!\S)|\s+"""
+    )
+    WORD_CACHE_SIZE = 50000
+
+    def __init__(self, vocab_path: str):
+        self.vocab_path = vocab_path
+        self._fast = None
+
+        try:
+            from tokenizers import Tokenizer as FastTokenizer
+            self._fast = FastTokenizer.from_file(vocab_path)
+            return
+        except ImportError:
+            pass
+
+        with open(vocab_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        model = data.get('model', {})
+        if model.get('type') != 'BPE':
+            raise ValueError(f"Unsupported tokenizer model: {model.get('type')}")
+
+        self._ranks: Dict[Tuple[str, str], int] = {}
+        for rank, merge in enumerate(model.get('merges', [])):
+            pair = tuple(merge.split(' ', 1)) if isinstance(merge, str) else tuple(merge)
+            self._ranks[pair] = rank
+
+        self._byte_encoder = _bytes_to_unicode()
+        self._word_cache: Dict[str, int] = {}
+
+    @property
+    def name(self) -> str:
+        return f"bpe:{os.path.basename(self.vocab_path)}"
+
+    def _bpe_length(self, word: str) -> int:
+        """Number of tokens a pre-tokenized (byte-mapped) word merges into"""
+        parts = list(word)
+
+        while len(parts) > 1:
+            best_rank = None
+            best_index = -1
+            for i in range(len(parts) - 1):
+                rank = self._ranks.get((parts[i], parts[i + 1]))
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_index = i
+
+            if best_rank is None:
+                break
+
+            parts[best_index:best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+
+        if self._fast is not None:
+            return len(self._fast.encode(text, add_special_tokens=False).ids)
+
+        total = 0
+        for piece in self.PRETOKENIZE_PATTERN.findall(text):
+            cached = self._word_cache.get(piece)
+            if cached is None:
+                mapped = "".join(self._byte_encoder[b] for b in piece.encode('utf-8'))
+                cached = self._bpe_length(mapped)
+                if len(self._word_cache) >= self.WORD_CACHE_SIZE:
+                    self._word_cache.clear()
+                self._word_cache[piece] = cached
+            total += cached
+        return total
+
+
+def load_tokenizer(vocab_path: Optional[str] = None) -> Tokenizer:
+    """
+    Load the best available tokenizer
+
+    Args:
+        vocab_path: Path to a tokenizer.json (default: TOKENIZER_PATH env var).
+            Falls back to the 4-chars-per-token heuristic when missing or unreadable.
+    """
+    vocab_path = vocab_path or os.getenv('TOKENIZER_PATH')
+
+    if vocab_path and os.path.exists(vocab_path):
+        try:
+            return BPETokenizer(vocab_path)
+        except Exception as e:
+            print(f"[DEBUG] Could not load tokenizer from {vocab_path}: {e}")
+
+    return HeuristicTokenizer()
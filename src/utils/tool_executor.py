@@ -1,22 +1,43 @@
 """Tool execution manager"""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from concurrent.futures import Future
 from src.tools import (
-    ReadTool, WriteTool, EditTool, GlobTool, GrepTool, BashTool
+    ReadTool, WriteTool, EditTool, GlobTool, GrepTool, BashTool, ReadOutputTool, OutputStore,
+    JobManager, JobStatusTool, JobOutputTool, JobCancelTool
 )
+from .tool_scheduler import ToolScheduler
+from .output_budget import OutputBudget
 
 
 class ToolExecutor:
     """Manages and executes tools"""
 
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, output_budgets: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            max_workers: Threads for running tools concurrently
+            output_budgets: Per-tool character budgets for results entering the conversation
+        """
+        self.output_store = OutputStore()
+        self.output_budget = OutputBudget(self.output_store, budgets=output_budgets)
+        self.jobs = JobManager()
+
         self.tools = {
             'read_file': ReadTool(),
             'write_file': WriteTool(),
             'edit_file': EditTool(),
             'glob': GlobTool(),
             'grep': GrepTool(),
-            'bash': BashTool(),
+            'bash': BashTool(jobs=self.jobs),
+            'read_output': ReadOutputTool(self.output_store),
+            'job_status': JobStatusTool(self.jobs),
+            'job_output': JobOutputTool(self.jobs),
+            'job_cancel': JobCancelTool(self.jobs),
         }
+        # Relative paths in every tool follow the bash session's cd
+        for tool in self.tools.values():
+            tool.working_directory = self.tools['bash'].current_directory
+        self.scheduler = ToolScheduler(self._run_call, self.tools, max_workers=max_workers)
 
     def get_tool_definitions(self) -> List[Dict[str, Any]]:
         """Get all tool definitions for function calling"""
@@ -44,20 +65,31 @@ class ToolExecutor:
         except Exception as e:
             return f"Error executing {tool_name}: {str(e)}"
 
-    def execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, str]]:
-        """Execute multiple tool calls and return results"""
-        results = []
+    def _run_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a single tool call and build its result entry"""
+        tool_name = call.get('name')
+        arguments = call.get('arguments', {})
 
-        for call in tool_calls:
-            tool_name = call.get('name')
-            arguments = call.get('arguments', {})
+        result = self.execute_tool(tool_name, **arguments)
+        self._on_result(tool_name, arguments, result)
 
-            result = self.execute_tool(tool_name, **arguments)
+        entry = {
+            'tool': tool_name,
+            'arguments': arguments,
+            'result': self.output_budget.apply(tool_name, result)
+        }
+        if call.get('id'):
+            # Native function calls: results are matched to calls by id
+            entry['id'] = call['id']
+        return entry
 
-            results.append({
-                'tool': tool_name,
-                'arguments': arguments,
-                'result': result
-            })
+    def _on_result(self, tool_name: str, arguments: Dict[str, Any], result: str):
+        """Called with each full result before it is shortened for the conversation"""
 
-        return results
+    def submit_tool_call(self, call: Dict[str, Any]) -> Future:
+        """Schedule a tool call without waiting for it (used while streaming)"""
+        return self.scheduler.submit(call)
+
+    def execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Execute multiple tool calls (concurrently where safe) and return results in order"""
+        return self.scheduler.run(tool_calls)
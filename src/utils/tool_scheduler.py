@@ -0,0 +1,138 @@
+"""Dependency-aware scheduler for concurrent tool execution"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Callable, Optional
+
+
+class ToolScheduler:
+    """
+    Run tool calls concurrently while preserving their observable ordering
+
+    Rules:
+    - Read-only tools run concurrently with each other
+    - Writes/edits are serialized per file path (and wait for earlier reads
+      of that path, plus earlier tree-wide reads such as grep)
+    - Any other tool (e.g. bash) is a barrier: it waits for everything
+      submitted before it, and everything submitted after waits for it
+
+    Dependencies always point at earlier submissions and the pool runs work
+    in FIFO order, so waiting inside a worker cannot deadlock.
+    """
+
+    def __init__(
+        self,
+        run_call: Callable[[Dict[str, Any]], Dict[str, Any]],
+        tools: Dict[str, Any],
+        max_workers: int = 8
+    ):
+        """
+        Initialize scheduler
+
+        Args:
+            run_call: Function executing a single tool call and returning its result entry
+            tools: Tool registry used to classify calls (name -> Tool)
+            max_workers: Maximum number of tools running at once
+        """
+        self.run_call = run_call
+        self.tools = tools
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._reset_tracking()
+
+    def _reset_tracking(self, barrier: Optional[Future] = None):
+        """Forget dependencies older than the given barrier"""
+        self._barrier = barrier
+        self._since_barrier: List[Future] = []
+        self._tree_reads: List[Future] = []
+        self._all_writes: List[Future] = []
+        self._path_reads: Dict[str, List[Future]] = {}
+        self._path_writes: Dict[str, Future] = {}
+
+    def _classify(self, call: Dict[str, Any]):
+        """Return (kind, path) where kind is 'read', 'write' or 'barrier'"""
+        tool = self.tools.get(call.get('name'))
+        arguments = call.get('arguments') or {}
+        file_path = arguments.get('file_path') if isinstance(arguments, dict) else None
+        if tool is None:
+            # Unknown tools fail fast; no need to order them
+            return 'read', None
+        path = os.path.abspath(tool.resolve_path(file_path)) if isinstance(file_path, str) and file_path else None
+
+        if getattr(tool, 'read_only', False):
+            return 'read', path
+        if path:
+            return 'write', path
+        return 'barrier', None
+
+    def _dependencies(self, kind: str, path: Optional[str]) -> List[Future]:
+        """Collect futures a new call must wait for, and record it"""
+        deps = [self._barrier] if self._barrier else []
+
+        if kind == 'barrier':
+            deps.extend(self._since_barrier)
+        elif kind == 'read':
+            if path:
+                if path in self._path_writes:
+                    deps.append(self._path_writes[path])
+            else:
+                deps.extend(self._all_writes)
+        else:
+            if path in self._path_writes:
+                deps.append(self._path_writes[path])
+            deps.extend(self._path_reads.get(path, []))
+            deps.extend(self._tree_reads)
+
+        return [d for d in deps if not d.done()]
+
+    def _record(self, kind: str, path: Optional[str], future: Future):
+        """Track a submitted call for later dependency lookups"""
+        if kind == 'barrier':
+            self._reset_tracking(barrier=future)
+            return
+
+        self._since_barrier.append(future)
+        if kind == 'read':
+            if path:
+                self._path_reads.setdefault(path, []).append(future)
+            else:
+                self._tree_reads.append(future)
+        else:
+            self._all_writes.append(future)
+            self._path_writes[path] = future
+            self._path_reads[path] = []
+
+    def _run_after(self, deps: List[Future], call: Dict[str, Any]) -> Dict[str, Any]:
+        """Wait for dependencies, then execute the call"""
+        if deps:
+            wait(deps)
+        return self.run_call(call)
+
+    def submit(self, call: Dict[str, Any]) -> Future:
+        """Schedule a single tool call and return a future for its result entry"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="termicode-tool"
+                )
+
+            kind, path = self._classify(call)
+            deps = self._dependencies(kind, path)
+            future = self._pool.submit(self._run_after, deps, call)
+            self._record(kind, path, future)
+            return future
+
+    def run(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute tool calls and return results in their original order"""
+        futures = [self.submit(call) for call in tool_calls]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """Stop the worker pool (waits for running tools)"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+            self._reset_tracking()
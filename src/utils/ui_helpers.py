@@ -65,7 +65,8 @@ class Spinner:
         """Spinner animation loop"""
         while self.is_running:
             frame = self.frames[self.current_frame]
-            sys.stdout.write(f'\r{Colors.CYAN}{frame}{Colors.RESET} {Colors.DIM}{self.message}...{Colors.RESET}')
+            # Clear to end of line: the message may have become shorter
+            sys.stdout.write(f'\r{Colors.CYAN}{frame}{Colors.RESET} {Colors.DIM}{self.message}...{Colors.RESET}\033[K')
             sys.stdout.flush()
             self.current_frame = (self.current_frame + 1) % len(self.frames)
             time.sleep(0.1)
@@ -0,0 +1,42 @@
+"""Test that a running bash command feeds the live tail through the scheduled path"""
+from src.utils.interactive_executor import InteractiveToolExecutor
+
+updates = []
+
+
+class RecordingExecutor(InteractiveToolExecutor):
+    """Records every live tail update shown in the spinner"""
+
+    @staticmethod
+    def _live_tail(spinner, label):
+        show = InteractiveToolExecutor._live_tail(spinner, label)
+
+        def record(stream, piece):
+            show(stream, piece)
+            updates.append(spinner.message)
+
+        return record
+
+
+executor = RecordingExecutor()
+call = {"name": "bash", "arguments": {"command": "for i in 1 2 3; do echo step $i; sleep 0.2; done"}}
+
+# Same path the assistant uses: every tool call goes through the scheduler
+result = executor.submit_tool_call(call).result()
+
+print("\n=== LIVE TAIL UPDATES ===")
+for message in updates:
+    print(message)
+
+if any("step 1" in m for m in updates) and any("step 3" in m for m in updates):
+    print("\n✅ Output reached the spinner while the command ran")
+else:
+    print("\n❌ No live tail updates!")
+
+if executor.tools['bash'].on_output is None:
+    print("✅ Output listener cleared after the command")
+else:
+    print("❌ Output listener left attached!")
+
+print(f"Result: {result['result']!r}")
+executor.scheduler.shutdown()
@@ -0,0 +1,105 @@
+"""Test the completion cache: expiry, eviction, and replaying cached chat and stream answers"""
+import os
+import tempfile
+import time
+from src.ai_client import AIClient, RetryPolicy
+from src.fake_llm import FakeLLM, FakeLLMServer, Transcript
+from src.utils.completion_cache import CompletionCache, completion_key
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+class FlakyLLM(FakeLLM):
+    """Fails the first `failures` requests (a 502 from the server), then answers with a count"""
+
+    def __init__(self, failures=0):
+        super().__init__(Transcript(sequential=False))
+        self.failures = failures
+        self.requests = 0
+
+    def respond(self, messages, tools=None, temperature=0.7, max_tokens=None):
+        self.requests += 1
+        if self.requests <= self.failures:
+            raise RuntimeError("primary model unavailable")
+        return {'content': f"answer number {self.requests} to {messages[-1]['content']}", 'tool_calls': []}
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    print("=== PUT / GET ===")
+    cache = CompletionCache(os.path.join(tmp, "basic.sqlite"))
+    cache.put("a", {"content": "hello"})
+    check("a stored value comes back", cache.get("a") == {"content": "hello"})
+    check("a missing key is a miss", cache.get("b") is None and cache.stats()['misses'] == 1, cache.stats())
+    cache.close()
+    reopened = CompletionCache(os.path.join(tmp, "basic.sqlite"))
+    check("values survive reopening", reopened.get("a") == {"content": "hello"})
+    reopened.close()
+
+    print("\n=== EXPIRY ===")
+    short = CompletionCache(os.path.join(tmp, "ttl.sqlite"), ttl=0.2)
+    short.put("soon", [1, 2, 3])
+    check("fresh entries are served", short.get("soon") == [1, 2, 3])
+    time.sleep(0.3)
+    check("expired entries are not", short.get("soon") is None)
+    check("and are removed", short.stats()['entries'] == 0 and short.stats()['bytes'] == 0, short.stats())
+    short.close()
+
+    print("\n=== EVICTION ===")
+    small = CompletionCache(os.path.join(tmp, "lru.sqlite"), max_bytes=350)
+    for name in ("first", "second", "third"):
+        small.put(name, "x" * 100)
+        time.sleep(0.01)
+    small.get("first")  # now more recent than "second"
+    time.sleep(0.01)
+    small.put("fourth", "x" * 100)
+    stats = small.stats()
+    check("stored bytes stay within max_bytes", stats["bytes"] <= 350, stats)
+    check("the least recently used entry goes first", small.get("second") is None
+          and small.get("first") is not None and small.get("fourth") is not None)
+    small.put("huge", "x" * 1000)
+    check("a value larger than max_bytes is not stored", small.get("huge") is None)
+    small.close()
+
+    print("\n=== REPLAY THROUGH AICLIENT ===")
+    os.environ.setdefault("HF_TOKEN", "test-token")
+    messages = [{"role": "user", "content": "hi"}]
+    llm = FlakyLLM()
+    with FakeLLMServer(llm) as server:
+        client = AIClient(model="primary", base_url=server.base_url,
+                          completion_cache=CompletionCache(os.path.join(tmp, "client.sqlite")))
+        first = client.chat(messages, temperature=0)
+        again = client.chat(messages, temperature=0)
+        check("a repeated chat request is answered from the cache", again.content == first.content
+              and llm.requests == 1, (again.content, llm.requests))
+
+        streamed = "".join(chunk.choices[0].delta.content or "" for chunk in client.chat(messages, temperature=0, stream=True)
+                           if chunk.choices)
+        replayed = "".join(chunk.choices[0].delta.content or "" for chunk in client.chat(messages, temperature=0, stream=True)
+                           if chunk.choices)
+        check("a recorded stream is replayed chunk by chunk", replayed == streamed and llm.requests == 2,
+              (replayed, streamed, llm.requests))
+        client.close()
+
+    print("\n=== FALLBACK ANSWERS ===")
+    llm = FlakyLLM(failures=1)
+    with FakeLLMServer(llm) as server:
+        cache = CompletionCache(os.path.join(tmp, "fallback.sqlite"))
+        client = AIClient(model="primary", base_url=server.base_url, fallback_models=["backup"],
+                          retry_policy=RetryPolicy(max_attempts=1), completion_cache=cache)
+        answer = client.chat(messages, temperature=0)
+        check("the fallback model answered", answer.content.startswith("answer number 2"), answer.content)
+        check("its answer is not stored as the primary model's",
+              cache.get(completion_key("primary", 0, messages, kind="chat")) is None)
+        check("but under the model that answered",
+              cache.get(completion_key("backup", 0, messages, kind="chat")) is not None)
+        answer = client.chat(messages, temperature=0)
+        check("the next request asks the primary model again", llm.requests == 3, llm.requests)
+        client.close()
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
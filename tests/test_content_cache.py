@@ -0,0 +1,79 @@
+"""Test the read/edit content cache: invalidation after writes and LRU eviction"""
+import os
+import tempfile
+from src.tools import content_cache
+from src.tools.content_cache import FileContentCache, get_content_cache
+from src.tools.file_tools import EditTool, ReadTool, WriteTool
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, "module.py")
+    with open(path, 'w') as f:
+        f.write("value = 'aaaa'\n")
+
+    cache = FileContentCache()
+    read, write, edit = ReadTool(cache=cache), WriteTool(cache=cache), EditTool(cache=cache)
+
+    print("=== INVALIDATION ===")
+    read.execute(path)
+    read.execute(path)
+    check("a second read is served from the cache", cache.hits == 1, cache.stats())
+
+    stat = os.stat(path)
+    edit.execute(path, "aaaa", "bbbb")
+    # Same size, and the old mtime put back: only invalidation can tell
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    output = read.execute(path).output
+    check("a read after edit_file sees the edit, even with the same mtime and size", "bbbb" in output, output)
+
+    write.execute(path, "value = 'cccc'\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    output = read.execute(path).output
+    check("a read after write_file sees the new content", "cccc" in output, output)
+
+    edit.execute(path, "cccc", "dddd")
+    check("edit_file edits the latest content", "dddd" in read.execute(path).output)
+
+    with open(path, 'w') as f:
+        f.write("value = 'changed outside'\n")
+    check("a change made outside the tools is picked up", "changed outside" in read.execute(path).output)
+
+    print("\n=== EVICTION ===")
+    small = FileContentCache(max_bytes=1000)
+    paths = []
+    for i in range(4):
+        paths.append(os.path.join(tmp, f"f{i}.txt"))
+        with open(paths[-1], 'w') as f:
+            f.write(f"{i}" * 399 + "\n")
+        small.get_lines(paths[-1])
+    stats = small.stats()
+    check("memory stays within max_bytes", stats['bytes'] <= 1000, stats)
+    check("least recently used files are evicted", stats['evictions'] == 2 and small.peek(paths[0]) is None
+          and small.peek(paths[3]) is not None, stats)
+
+    big = os.path.join(tmp, "big.txt")
+    with open(big, 'w') as f:
+        f.write("x" * 2000 + "\n")
+    check("a file larger than the cache is still read", small.get_text(big) == "x" * 2000 + "\n")
+    check("but not cached", small.peek(big) is None)
+
+    print("\n=== READ_CACHE_MB ===")
+    previous = content_cache._content_cache
+    os.environ['READ_CACHE_MB'] = "0.5"
+    content_cache._content_cache = None
+    try:
+        check("READ_CACHE_MB sizes the shared cache", get_content_cache().max_bytes == 512 * 1024,
+              get_content_cache().max_bytes)
+    finally:
+        del os.environ['READ_CACHE_MB']
+        content_cache._content_cache = previous
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
@@ -0,0 +1,32 @@
+"""Test that shortened tool outputs keep both head and tail, also for small budgets"""
+from src.tools.output_tools import OutputStore
+from src.utils.output_budget import OutputBudget
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+output = "\n".join(f"line {i:04d} of the build log" for i in range(2000))
+
+for budget in (120, 300, 600, 700, 6000):
+    shortened = OutputBudget(OutputStore(), budgets={'bash': budget}).apply('bash', output)
+    lines = shortened.splitlines()
+    check(f"budget {budget}: keeps the head", lines[0] == "line 0000 of the build log", lines[0])
+    check(f"budget {budget}: keeps the tail", lines[-1] == "line 1999 of the build log", lines[-1])
+    check(f"budget {budget}: marks the omission", any(line.startswith("[... lines") for line in lines))
+    kept = sum(len(line) + 1 for line in lines if not line.startswith("[... lines"))
+    check(f"budget {budget}: kept lines fit the budget", kept <= budget, kept)
+
+for bad in (0, -5):
+    try:
+        OutputBudget(OutputStore(), budgets={'grep': bad})
+        check(f"budget {bad} is rejected", False)
+    except ValueError:
+        check(f"budget {bad} is rejected", True)
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
@@ -0,0 +1,40 @@
+"""Test concurrent tool execution ordering"""
+import os
+import tempfile
+import time
+from src.utils.tool_executor import ToolExecutor
+
+executor = ToolExecutor()
+
+with tempfile.TemporaryDirectory() as tmp:
+    path_a = os.path.join(tmp, "a.txt")
+    path_b = os.path.join(tmp, "b.txt")
+
+    tool_calls = [
+        {"name": "write_file", "arguments": {"file_path": path_a, "content": "first"}},
+        {"name": "write_file", "arguments": {"file_path": path_b, "content": "other"}},
+        {"name": "edit_file", "arguments": {"file_path": path_a, "old_text": "first", "new_text": "second"}},
+        {"name": "read_file", "arguments": {"file_path": path_a}},
+        {"name": "grep", "arguments": {"pattern": "o", "path": tmp}},
+        {"name": "bash", "arguments": {"command": "echo barrier"}},
+        {"name": "read_file", "arguments": {"file_path": path_b}},
+    ]
+
+    start = time.time()
+    results = executor.execute_tool_calls(tool_calls)
+    elapsed = time.time() - start
+
+    print("=== RESULTS (original order) ===")
+    for call, result in zip(tool_calls, results):
+        print(f"\nTool: {result['tool']}")
+        print(f"Result: {result['result']}")
+        assert result['tool'] == call['name']
+
+    if "second" in results[3]['result']:
+        print("\n✅ Read after edit saw the edited content")
+    else:
+        print("\n❌ Read ran before the edit finished!")
+
+    print(f"Elapsed: {elapsed:.3f}s")
+
+executor.scheduler.shutdown()
@@ -0,0 +1,65 @@
+"""Test that streamed and complete responses yield the same tool calls"""
+import json
+from src.utils.response_parser import ResponseParser, StreamingToolCallParser
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+def block(*calls, **extra):
+    return "```json\n" + json.dumps(dict(extra, tool_calls=list(calls)), indent=2) + "\n```"
+
+
+READ = {"name": "read_file", "arguments": {"file_path": "README.md"}}
+GLOB = {"name": "glob", "arguments": {"pattern": "**/*.py"}}
+
+OUTPUTS = {
+    "single block": f"Reading it now:\n\n{block(READ, GLOB)}\n\nThen I will explain.",
+    "two blocks": f"First:\n{block(READ)}\nand later:\n{block(GLOB)}\nDone.",
+    "example before the calls": 'Config looks like:\n```json\n{"debug": true}\n```\nNow:\n' + block(READ),
+    "malformed after a call": 'Go:\n```json\n{"tool_calls": [' + json.dumps(READ) + ', {"name": "glob", "argu\n```',
+    "element without a name": f"Go:\n{block({'arguments': {}}, GLOB)}",
+    "array instead of object": 'Go:\n```json\n[1, 2]\n```\n' + block(READ),
+    "other keys first": f"Go:\n{block(READ, note='} tricky ]')}",
+    "no block": "Just an answer, no tools.",
+}
+
+for label, output in OUTPUTS.items():
+    _, expected = ResponseParser.extract_tool_calls(output)
+    visible = set()
+    for size in (1, 2, 7, len(output)):
+        parser = StreamingToolCallParser()
+        dispatched = []
+        for i in range(0, len(output), size):
+            dispatched.extend(parser.feed(output[i:i + size]))
+        parser.close()
+        visible.add(parser.visible_text)
+        check(f"{label} (chunks of {size})", dispatched == (expected or []), f"{dispatched} != {expected}")
+    check(f"{label}: same visible text for every chunking", len(visible) == 1, visible)
+    check(f"{label}: no fenced JSON is visible", "```json" not in visible.pop())
+
+print("\n=== SEMANTICS ===")
+_, calls = ResponseParser.extract_tool_calls(OUTPUTS["two blocks"])
+check("only the first block is read", calls == [READ], calls)
+text, _ = ResponseParser.extract_tool_calls(OUTPUTS["two blocks"])
+check("later blocks are hidden from the text", '"glob"' not in text and "and later:" in text and "Done." in text, text)
+_, calls = ResponseParser.extract_tool_calls(OUTPUTS["example before the calls"])
+check("a first block without tool_calls yields none", calls is None, calls)
+_, calls = ResponseParser.extract_tool_calls(OUTPUTS["malformed after a call"])
+check("complete elements of a malformed block still count", calls == [READ], calls)
+
+parser = StreamingToolCallParser()
+parser.feed('Hi ```json{"tool_calls": [' + json.dumps(READ) + ']}``` then ```json{"tool_calls": ['
+            + json.dumps(GLOB) + ']}``` bye `code` and a ```json')
+parser.feed(' {"half": "open')
+parser.close()
+check("later blocks are hidden while streaming", parser.visible_text == "Hi  then  bye `code` and a ",
+      repr(parser.visible_text))
+check("but not dispatched", parser.tool_calls == [READ], parser.tool_calls)
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
@@ -0,0 +1,93 @@
+"""Test that read_file numbers lines the same way for small files and large (mmap) files"""
+import os
+import tempfile
+from src.tools.content_cache import FileContentCache
+from src.tools.file_tools import ReadTool
+from src.tools.line_reader import LargeFileReader
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+CONTENTS = {
+    "mixed endings": "one\rstill one\ntwo\x0cstill two\r\nthree still three\x85\nfour",
+    "trailing newline": "alpha\nbeta\n",
+    "blank lines": "\n\nthird\n\n",
+    "empty": "",
+}
+
+with tempfile.TemporaryDirectory() as tmp:
+    small = ReadTool(cache=FileContentCache())
+    large = ReadTool(cache=FileContentCache())
+    # Every file takes the mmap path
+    large.LARGE_FILE_BYTES = -1
+
+    print("=== SAME NUMBERING ON BOTH PATHS ===")
+    for label, content in CONTENTS.items():
+        path = os.path.join(tmp, label.replace(" ", "_") + ".txt")
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        expected = content.count('\n') + (1 if content and not content.endswith('\n') else 0)
+
+        small_output = small.execute(path).output
+        large_output = large.execute(path).output
+        check(f"{label}: identical output", small_output == large_output, f"{small_output!r} != {large_output!r}")
+        check(f"{label}: one line per '\\n'", len(small_output.split("\n")) == expected if expected else
+              small_output == "", small_output)
+
+        for start, end in ((2, 3), (3, 3)):
+            small_range = small.execute(path, start_line=start, end_line=end).output
+            large_range = large.execute(path, start_line=start, end_line=end).output
+            check(f"{label}: lines {start}-{end} match", small_range == large_range,
+                  f"{small_range!r} != {large_range!r}")
+
+    print("\n=== EDITS STILL SEE UNIVERSAL NEWLINES ===")
+    path = os.path.join(tmp, "crlf.txt")
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write("first\r\nsecond\r\n")
+    cache = FileContentCache()
+    check("get_text translates line endings", cache.get_text(path) == "first\nsecond\n", cache.get_text(path))
+    check("get_lines keeps them", cache.get_lines(path) == ["first\r\n", "second\r\n"], cache.get_lines(path))
+
+    print("\n=== TAILS READ BACKWARD ===")
+    for label, content in {**CONTENTS, "long last line": "short\n" + "x" * 5000,
+                           "only a newline": "\n", "no newline": "a\nb\nc"}.items():
+        path = os.path.join(tmp, "tail_" + label.replace(" ", "_") + ".txt")
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        lines = content.split('\n')
+        if content.endswith('\n'):
+            lines.pop()
+        for count in (1, 2, 50):
+            reader = LargeFileReader()
+            tail, total, _ = reader.read_lines(path, tail_lines=count, max_bytes=10000)
+            expected = [line.rstrip() for line in lines[-count:]] if content else []
+            check(f"{label}: last {count} lines", [text for _, text in tail] == expected, f"{tail} != {expected}")
+            check(f"{label}: no index is built for the tail", not reader._indexes)
+
+    path = os.path.join(tmp, "growing.log")
+    with open(path, 'w') as f:
+        f.writelines(f"entry {i}\n" for i in range(1000))
+    reader = LargeFileReader()
+    reader.read_lines(path, start_line=1, end_line=1)
+    tail, total, _ = reader.read_lines(path, tail_lines=2)
+    check("a cached index numbers the tail", tail == [(999, "entry 998"), (1000, "entry 999")] and total == 1000, tail)
+    with open(path, 'a') as f:
+        f.write("entry 1000\n")
+    tail, total, _ = reader.read_lines(path, tail_lines=2)
+    check("after an append the tail is read without reindexing", tail == [(None, "entry 999"), (None, "entry 1000")]
+          and total is None, tail)
+    tail, _, truncated = reader.read_lines(path, tail_lines=100, max_bytes=40)
+    check("max_bytes keeps the last lines", truncated and [text for _, text in tail][-1] == "entry 1000"
+          and sum(len(text) + 1 for _, text in tail) <= 40, tail)
+    output = large.execute(path, tail_lines=2).output
+    check("read_file shows an unnumbered tail", output == "     | entry 999\n     | entry 1000", repr(output))
+    output = small.execute(path, tail_lines=2).output
+    check("small files keep numbered tails", output == "1000 | entry 999\n1001 | entry 1000", repr(output))
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
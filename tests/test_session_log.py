@@ -0,0 +1,86 @@
+"""Test JSONL session logs: appends, legacy migration and recovery from torn writes"""
+import json
+import os
+import tempfile
+from src.utils.session_manager import SessionManager
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+def message(index):
+    return {"role": "user" if index % 2 == 0 else "assistant", "content": f"message {index}"}
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    sessions_dir = os.path.join(tmp, "sessions")
+    manager = SessionManager(sessions_dir, fsync='never')
+    log = os.path.join(sessions_dir, "work.jsonl")
+
+    print("=== APPEND-ONLY SAVES ===")
+    history = [message(0), message(1)]
+    manager.create_session("work")
+    manager.save_message(history)
+    with open(log, 'rb') as f:
+        before = f.read()
+    history.append(message(2))
+    manager.save_message(history)
+    with open(log, 'rb') as f:
+        after = f.read()
+    check("earlier records are left in place", after.startswith(before) and len(after) > len(before))
+    check("the log loads back", SessionManager(sessions_dir).load_session("work") == history)
+
+    history = [message(10)]
+    manager.save_message(history)
+    check("a cleared history rewrites the log", SessionManager(sessions_dir).load_session("work") == history)
+
+    print("\n=== TORN TAIL ===")
+    with open(log, 'a', encoding='utf-8') as f:
+        f.write('{"role": "assistant", "content": "cut of')
+    recovering = SessionManager(sessions_dir)
+    loaded = recovering.load_session("work")
+    check("a torn record is skipped on load", loaded == [message(10)], loaded)
+    loaded.append(message(11))
+    recovering.save_message(loaded)
+    with open(log, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    check("the next save does not append after the torn record",
+          [json.loads(line) for line in lines] == [message(10), message(11)], lines)
+
+    with open(log, 'a', encoding='utf-8') as f:
+        f.write('{"broken": \n')
+    info = SessionManager(sessions_dir).compact_session("work")
+    with open(log, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    check("compacting drops torn records", records == [message(10), message(11)], records)
+    check("and reports the message count", info['message_count'] == 2, info)
+
+    print("\n=== LEGACY .JSON SESSIONS ===")
+    legacy = os.path.join(sessions_dir, "old.json")
+    legacy_history = [message(0), message(1), message(2)]
+    with open(legacy, 'w', encoding='utf-8') as f:
+        json.dump({"created_at": "2024-01-02T03:04:05", "history": legacy_history}, f)
+
+    migrating = SessionManager(sessions_dir)
+    check("a copied-in legacy session shows up after a rebuild", migrating.rebuild_index() == 2)
+    loaded = migrating.load_session("old")
+    check("the legacy file loads", loaded == legacy_history, loaded)
+    loaded.append(message(3))
+    migrating.save_message(loaded)
+    check("the first save migrates it to a log", os.path.exists(os.path.join(sessions_dir, "old.jsonl")))
+    check("and removes the legacy file", not os.path.exists(legacy))
+    reloaded = SessionManager(sessions_dir)
+    check("the migrated session loads", reloaded.load_session("old") == legacy_history + [message(3)])
+    check("the creation date is kept", reloaded.get_session_info("old")['created_at'] == "2024-01-02T03:04:05",
+          reloaded.get_session_info("old"))
+    names = [session['name'] for session in reloaded.list_sessions()]
+    check("the catalog lists both sessions once", sorted(names) == ["old", "work"], names)
+    found = [session['name'] for session in reloaded.search_sessions(keyword="message 3")]
+    check("migrated messages are searchable", "old" in found, found)
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
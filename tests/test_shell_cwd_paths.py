@@ -0,0 +1,55 @@
+"""Test that relative paths in the file tools follow cd in the persistent bash shell"""
+import os
+import tempfile
+from src.utils.tool_executor import ToolExecutor
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    sub = os.path.join(tmp, "sub")
+    os.makedirs(sub)
+    with open(os.path.join(sub, "x.py"), 'w') as f:
+        f.write("value = 'inside sub'\n")
+    with open(os.path.join(tmp, "x.py"), 'w') as f:
+        f.write("value = 'at the top'\n")
+
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    executor = ToolExecutor()
+    try:
+        print("=== BEFORE CD ===")
+        output = executor.execute_tool('read_file', file_path="x.py")
+        check("read_file resolves against the starting directory", "at the top" in output, output)
+
+        print("\n=== AFTER CD ===")
+        executor.execute_tool('bash', command="cd sub")
+        output = executor.execute_tool('read_file', file_path="x.py")
+        check("read_file follows the shell's cd", "inside sub" in output, output)
+
+        output = executor.execute_tool('grep', pattern="value", path=".")
+        check("grep searches the shell's directory", "inside sub" in output and "at the top" not in output, output)
+
+        output = executor.execute_tool('glob', pattern="*.py")
+        check("glob lists the shell's directory", "x.py" in output, output)
+
+        executor.execute_tool('write_file', file_path="new.txt", content="written\n")
+        check("write_file writes into the shell's directory", os.path.exists(os.path.join(sub, "new.txt")))
+
+        executor.execute_tool('edit_file', file_path="new.txt", old_text="written", new_text="edited")
+        with open(os.path.join(sub, "new.txt")) as f:
+            check("edit_file edits in the shell's directory", f.read() == "edited\n")
+
+        output = executor.execute_tool('read_file', file_path=os.path.join(tmp, "x.py"))
+        check("absolute paths are unaffected", "at the top" in output, output)
+    finally:
+        executor.tools['bash'].session.close()
+        os.chdir(cwd)
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
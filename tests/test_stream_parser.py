@@ -0,0 +1,47 @@
+"""Test incremental streaming tool call parser"""
+from src.utils.response_parser import ResponseParser, StreamingToolCallParser
+
+# Simulate AI response with two tool calls, streamed in small chunks
+test_response = """Saya akan cek struktur project dulu:
+
+```json
+{
+  "tool_calls": [
+    {
+      "name": "glob",
+      "arguments": {
+        "pattern": "**/*.py"
+      }
+    },
+    {
+      "name": "grep",
+      "arguments": {
+        "pattern": "def \\\\w+\\\\(",
+        "file_pattern": "*.py"
+      }
+    }
+  ]
+}
+```
+
+Setelah itu saya akan jelaskan hasilnya."""
+
+parser = StreamingToolCallParser()
+chunk_size = 5
+
+print("=== STREAMING ===")
+for i in range(0, len(test_response), chunk_size):
+    for call in parser.feed(test_response[i:i + chunk_size]):
+        print(f"Tool call ready at char {i + chunk_size}/{len(test_response)}: {call.get('name')} {call.get('arguments')}")
+parser.close()
+
+print(f"\nVisible text:\n{parser.visible_text}")
+
+# Compare with the regex-based parser on the full response
+_, expected_calls = ResponseParser.extract_tool_calls(test_response)
+if parser.tool_calls == expected_calls:
+    print("\n✅ Streaming parser matches ResponseParser.extract_tool_calls")
+else:
+    print("\n❌ Streaming parser result differs!")
+    print(f"Streaming: {parser.tool_calls}")
+    print(f"Expected:  {expected_calls}")
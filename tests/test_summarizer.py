@@ -0,0 +1,93 @@
+"""Test rolling history summaries against the in-process fake model client"""
+import re
+import time
+from openai.types.chat import ChatCompletionMessage
+from src.fake_llm import FakeAIClient, FakeLLM, Transcript
+from src.utils.context_manager import ContextManager
+from src.utils.summarizer import HistorySummarizer
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+class MarkerModel:
+    """Upstream for the fake client: 'summarizes' by listing the #n markers it was shown"""
+
+    def chat(self, messages, temperature=0.7, max_tokens=None, tools=None):
+        markers = sorted(set(re.findall(r'#\d+\b', messages[-1]['content'])), key=lambda m: int(m[1:]))
+        return ChatCompletionMessage(role="assistant", content="covers " + " ".join(markers))
+
+
+def wait_idle(summarizer):
+    deadline = time.time() + 10
+    while summarizer._pending and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def make_history(size):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message #{i} " + "word " * 40}
+            for i in range(size)]
+
+
+# Fresh transcript: every request reaches the model (and is counted in usage)
+client = FakeAIClient(FakeLLM(Transcript(sequential=False), upstream=MarkerModel()))
+summarizer = HistorySummarizer(client, chunk_size=4)
+manager = ContextManager(max_messages=12, max_tokens_estimate=600)
+history = make_history(40)
+
+print("=== SPLICED SUMMARY ===")
+manager.compress_history(history, summarizer=summarizer)
+wait_idle(summarizer)
+compressed = manager.compress_history(history, summarizer=summarizer)
+summaries = [m for m in compressed if m['content'].startswith(ContextManager.SUMMARY_PREFIX)]
+check("one summary is spliced in", len(summaries) == 1, [m['content'][:40] for m in compressed])
+
+covered_end, _ = summarizer.latest(history, len(history))
+covered = re.findall(r'#(\d+)', summaries[0]['content']) if summaries else []
+check("the rolling summary covers every summarized message", covered == [str(i) for i in range(covered_end)],
+      covered)
+
+numbers = [int(re.match(r'message #(\d+)', m['content']).group(1)) for m in compressed if m['role'] != 'system']
+check("kept messages come back in order", numbers == sorted(numbers), numbers)
+check("the first user task stays first", compressed[0] is history[0], compressed[0]['content'][:20])
+check("the newest message stays last", compressed[-1] is history[-1])
+check("the summary follows the pinned message", compressed[1] is (summaries[0] if summaries else None))
+check("the result fits the budget", manager.get_total_tokens(compressed) <= 600
+      and len(compressed) <= 12, manager.get_total_tokens(compressed))
+
+print("\n=== NO REPEATED WORK ===")
+requests = client.usage.requests
+check("each chunk was summarized once", requests == covered_end // 4, f"{requests} requests")
+
+manager.compress_history(history, summarizer=summarizer)
+wait_idle(summarizer)
+check("an unchanged history is not summarized again", client.usage.requests == requests, client.usage.requests)
+
+copy = [dict(m) for m in history]
+summarizer.schedule(copy, covered_end)
+wait_idle(summarizer)
+check("an equal history in a new list reuses the summaries", client.usage.requests == requests,
+      client.usage.requests)
+
+history.append({"role": "user", "content": "message #40 one more"})
+manager.compress_history(history, summarizer=summarizer)
+wait_idle(summarizer)
+new_end, _ = summarizer.latest(history, len(history))
+check("a longer history only summarizes its new chunks",
+      client.usage.requests - requests == (new_end - covered_end) // 4, client.usage.requests - requests)
+
+changed = [dict(m) for m in history]
+changed[1]["content"] = "message #1 rewritten"
+before = client.usage.requests
+summarizer.schedule(changed, 8)
+wait_idle(summarizer)
+check("a changed early message invalidates the chained chunks after it", client.usage.requests - before == 2,
+      client.usage.requests - before)
+
+summarizer.shutdown()
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
@@ -0,0 +1,38 @@
+"""Test assembly of streamed native tool call fragments"""
+from types import SimpleNamespace
+from src.utils.response_parser import ToolCallAssembler
+
+
+def fragment(index, call_id=None, name=None, arguments=None):
+    """One delta.tool_calls entry as the OpenAI SDK streams it"""
+    return SimpleNamespace(index=index, id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+# Two calls; arguments arrive in pieces, the second call starts after the first
+deltas = [
+    [fragment(0, "call_1", "read_file", "")],
+    [fragment(0, arguments='{"file_')],
+    [fragment(0, arguments='path": "main.py"}')],
+    [fragment(1, "call_2", "grep", '{"pattern": ')],
+    [fragment(1, arguments='"TODO"}')],
+]
+
+assembler = ToolCallAssembler()
+
+print("=== STREAMING ===")
+for number, delta in enumerate(deltas, 1):
+    for call in assembler.feed(delta):
+        print(f"Tool call ready after delta {number}/{len(deltas)}: {call}")
+for call in assembler.close():
+    print(f"Tool call ready at end of stream: {call}")
+
+expected = [
+    {'id': 'call_1', 'name': 'read_file', 'arguments': {'file_path': 'main.py'}},
+    {'id': 'call_2', 'name': 'grep', 'arguments': {'pattern': 'TODO'}},
+]
+if assembler.tool_calls == expected:
+    print("\n✅ Assembled tool calls match")
+else:
+    print("\n❌ Assembled tool calls differ!")
+    print(f"Assembled: {assembler.tool_calls}")
+    print(f"Expected:  {expected}")
@@ -0,0 +1,69 @@
+"""Test that the grep trigram index only touches the files being searched"""
+import os
+import tempfile
+import time
+from src.tools.file_tools import GrepTool
+from src.tools.trigram_index import TrigramIndex
+from src.tools.walker import walk_files
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as outside:
+    root = os.path.join(tmp, "repo")
+    for directory in ("small", "big"):
+        os.makedirs(os.path.join(root, directory))
+    for i in range(50):
+        with open(os.path.join(root, "big", f"f{i}.txt"), 'w') as f:
+            f.write(f"filler line {i}\n")
+    with open(os.path.join(root, "small", "hit.txt"), 'w') as f:
+        f.write("the needle is here\n")
+    with open(os.path.join(root, "small", "miss.txt"), 'w') as f:
+        f.write("nothing to see\n")
+    with open(os.path.join(outside, "far.txt"), 'w') as f:
+        f.write("needle outside the root\n")
+
+    index = TrigramIndex(root, index_path=os.path.join(tmp, "index.sqlite"))
+
+    print("=== SUBTREE QUERY ===")
+    small = os.path.join(root, "small")
+    result = index.filter_files(list(walk_files(small, source=None)), "needle")
+    check("only the matching file is a candidate", [os.path.basename(p) for p in result] == ["hit.txt"], result)
+    check("only the searched subtree was indexed", len(index._files) == 2, sorted(index._files))
+
+    print("\n=== CHANGES ===")
+    time.sleep(0.01)
+    with open(os.path.join(small, "miss.txt"), 'w') as f:
+        f.write("now a needle too\n")
+    result = index.filter_files(list(walk_files(small, source=None)), "needle")
+    check("a changed file is re-indexed", sorted(os.path.basename(p) for p in result) == ["hit.txt", "miss.txt"], result)
+
+    os.remove(os.path.join(small, "hit.txt"))
+    result = index.filter_files([os.path.join(small, "hit.txt"), os.path.join(small, "miss.txt")], "needle")
+    check("a deleted file is dropped", [os.path.basename(p) for p in result] == ["miss.txt"], result)
+
+    far = os.path.join(outside, "far.txt")
+    check("files outside the root pass through", index.filter_files([far], "needle") == [far])
+    index.close()
+
+    print("\n=== GREP OUTSIDE THE WORKING DIRECTORY ===")
+    cwd = os.getcwd()
+    os.environ['XDG_CACHE_HOME'] = os.path.join(tmp, "cache")
+    os.chdir(root)
+    try:
+        grep = GrepTool(use_index=True)
+        output = grep.execute("needle", outside).output
+        check("grep of a path outside cwd still finds matches", "far.txt" in output, output)
+        output = grep.execute("needle", "small").output
+        check("grep of a subtree uses the index", "miss.txt" in output and len(grep._get_index()._files) == 1,
+              output)
+    finally:
+        os.chdir(cwd)
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
@@ -0,0 +1,102 @@
+"""Test ContextManager truncation cut points against a linear reference"""
+import random
+from src.utils.context_manager import ContextManager
+from src.utils.tokenizer import Tokenizer
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+class WordTokenizer(Tokenizer):
+    """One token per word, so budgets are easy to reason about"""
+
+    @property
+    def name(self) -> str:
+        return "words"
+
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+
+def make_history(rng, size):
+    history = []
+    for index in range(size):
+        if index % 3 == 2:
+            content = ContextManager.TOOL_RESULTS_PREFIX + " ok" * rng.randint(1, 40)
+            role = "user"
+        else:
+            content = " ".join(["word"] * rng.randint(1, 60))
+            role = "user" if index % 3 == 0 else "assistant"
+        history.append({"role": role, "content": f"{content} #{index}"})
+    return history
+
+
+def reference_start(history, budget, limit, pinned):
+    """Earliest start that fits, by trying every one"""
+    tokenizer = WordTokenizer()
+    for start in range(len(history) + 1):
+        kept = [history[i] for i in pinned if i < start] + history[start:]
+        if sum(tokenizer.count(m['content']) for m in kept) <= budget and len(kept) <= limit:
+            return start
+    return len(history)
+
+
+print("=== MINIMAL CUT POINT ===")
+rng = random.Random(5)
+mismatches = []
+for trial in range(200):
+    history = make_history(rng, rng.randint(1, 80))
+    budget, limit = rng.randint(0, 800), rng.randint(1, 40)
+    manager = ContextManager(max_messages=limit, max_tokens_estimate=budget, tokenizer=WordTokenizer())
+    pinned = manager._pinned_indices(history)
+    start = manager._cut_point(history, budget, limit, pinned)
+    expected = reference_start(history, budget, limit, pinned)
+    if start != expected:
+        mismatches.append((trial, start, expected))
+check("binary search matches the linear reference", not mismatches, mismatches[:5])
+
+print("\n=== TRUNCATED HISTORY ===")
+# The latest tool results are far outside the window
+history = make_history(random.Random(1), 120)
+history += [{"role": "assistant", "content": " ".join(["talk"] * 40)} for _ in range(60)]
+manager = ContextManager(max_messages=30, max_tokens_estimate=1500, tokenizer=WordTokenizer())
+kept = manager.truncate_history(history, "system prompt")
+tokens = manager.get_total_tokens(kept) + manager.estimate_tokens("system prompt")
+check("fits the token budget", tokens <= 1500, tokens)
+check("fits the message limit", len(kept) <= 30, len(kept))
+check("keeps the first user task", kept[0] is history[0], kept[0]['content'][:20])
+last_results = max(i for i, m in enumerate(history) if m['content'].startswith(ContextManager.TOOL_RESULTS_PREFIX))
+check("keeps the latest tool results", kept[1] is history[last_results], kept[1]['content'][:30])
+check("keeps the newest message", kept[-1] is history[-1])
+small = history[:3]
+check("short histories are returned as is", manager.truncate_history(small) is small)
+
+print("\n=== STABLE WINDOW ===")
+rng = random.Random(2)
+growing = make_history(rng, 120)
+manager = ContextManager(max_messages=30, max_tokens_estimate=1500, tokenizer=WordTokenizer())
+starts = []
+for turn in range(60):
+    kept = manager.truncate_history(growing)
+    starts.append(manager._window_start)
+    check_ok = manager.get_total_tokens(kept) <= 1500 and len(kept) <= 30
+    if not check_ok:
+        break
+    growing.append({"role": "user", "content": " ".join(["next"] * rng.randint(1, 60))})
+check("every turn fits", check_ok, turn)
+moves = sum(1 for a, b in zip(starts, starts[1:]) if a != b)
+check("the window start moves in chunks, not every turn", 0 < moves < len(starts) // 3, f"{moves} moves in {len(starts)}")
+check("the window start never moves back", starts == sorted(starts), starts)
+
+print("\n=== NEW HISTORY ===")
+replaced = make_history(random.Random(3), 50)
+kept = manager.truncate_history(replaced)
+check("a new history list rebuilds the prefix sums", len(manager._prefix) == len(replaced) + 1, len(manager._prefix))
+check("and fits", manager.get_total_tokens(kept) <= 1500 and len(kept) <= 30)
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")
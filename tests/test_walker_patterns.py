@@ -0,0 +1,75 @@
+"""Test file patterns with a directory part and grep line numbering"""
+import os
+import tempfile
+from src.tools.walker import walk_files
+from src.tools.search import search_files
+from src.tools.file_tools import GrepTool
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    print(f"{'✅' if ok else '❌'} {label}{'' if ok else f' ({detail})'}")
+    failures += 0 if ok else 1
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    files = {
+        "src/sub/b.py": "needle\n",
+        "sub/a.py": "needle\n",
+        "src/sub/deep/c.py": "needle\n",
+        "src/other/d.py": "needle\n",
+        "ignored/sub/e.py": "needle\n",
+        "lines.txt": "one\x0ctwo\u2028three\x85four\nneedle here\r\nlast needle",
+    }
+    for path, content in files.items():
+        full = os.path.join(tmp, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+    with open(os.path.join(tmp, ".gitignore"), 'w') as f:
+        f.write("ignored/\n")
+
+    def found(pattern):
+        return sorted(os.path.relpath(p, tmp).replace(os.sep, '/') for p in walk_files(tmp, pattern, source=None))
+
+    print("=== WALKER PATTERNS ===")
+    result = found("sub/*.py")
+    check("'sub/*.py' matches sub/ at any depth", result == ["src/sub/b.py", "sub/a.py"], result)
+
+    result = found("src/*.py")
+    check("'*' does not cross '/'", result == [], result)
+
+    result = found("src/**/*.py")
+    check("'src/**/*.py' matches every depth under src", result == ["src/other/d.py", "src/sub/b.py", "src/sub/deep/c.py"], result)
+
+    result = found("*.py")
+    check("name pattern matches everywhere except ignored dirs", len(result) == 4 and "ignored/sub/e.py" not in result, result)
+
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        output = GrepTool(use_index=False).execute("needle", ".", file_pattern="sub/*.py").output
+    finally:
+        os.chdir(cwd)
+    check("grep with file_pattern='sub/*.py' finds src/sub/b.py", "src/sub/b.py" in output, output)
+
+    print("\n=== HIDDEN FILES ===")
+    for name in (".github/workflows/ci.yml", ".eslintrc", ".git/config", "a.py"):
+        os.makedirs(os.path.join(tmp, "hidden", os.path.dirname(name)), exist_ok=True)
+        with open(os.path.join(tmp, "hidden", name), 'w') as f:
+            f.write("needle\n")
+    output = GrepTool(use_index=False).execute("needle", os.path.join(tmp, "hidden")).output
+    check("grep searches hidden files and directories", ".github/workflows/ci.yml" in output.replace(os.sep, "/")
+          and ".eslintrc" in output and "a.py" in output, output)
+    check("but still skips .git", ".git/config" not in output.replace(os.sep, "/"), output)
+
+    print("\n=== LINE NUMBERS ===")
+    results, _ = search_files([os.path.join(tmp, "lines.txt")], "needle")
+    numbers = [line.split(':')[1] for line in results]
+    # Only '\n' ends a line: form feed and U+2028 do not, and '\r\n' counts once
+    check("grep numbers lines by '\\n' only", numbers == ["2", "3"], results)
+    check("trailing '\\r' is not part of the match line", not any(line.endswith('\r') for line in results), results)
+
+print(f"\n{'✅ All checks passed' if not failures else f'❌ {failures} check(s) failed'}")